@@ -21,6 +21,29 @@ if sys.version_info[:3] < MIN_PYTHON_VERSION:
 os.environ['RFM_INSTALL_PREFIX'] = INSTALL_PREFIX
 
 
-# Import important names for user tests
-from reframe.core.pipeline import *     # noqa: F401, F403
-from reframe.core.decorators import *   # noqa: F401, F403
+# Important names for user tests; these are imported lazily, because they
+# pull in most of the framework, which is not needed for simple invocations,
+# such as `reframe --version`
+_lazy_modules = ['reframe.core.pipeline', 'reframe.core.decorators']
+
+if sys.version_info[:2] < (3, 7):
+    from reframe.core.pipeline import *     # noqa: F401, F403
+    from reframe.core.decorators import *   # noqa: F401, F403
+else:
+    def __getattr__(name):
+        import importlib
+
+        if name == '__all__':
+            ret = ['INSTALL_PREFIX', 'MIN_PYTHON_VERSION', 'VERSION']
+            for modname in _lazy_modules:
+                ret += importlib.import_module(modname).__all__
+
+            return ret
+
+        for modname in _lazy_modules:
+            mod = importlib.import_module(modname)
+            if name in mod.__all__:
+                globals()[name] = getattr(mod, name)
+                return globals()[name]
+
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -10,22 +10,37 @@ import functools
 import reframe.core.fields as fields
 from reframe.core.exceptions import ConfigError
 
-_launcher_backend_modules = [
-    'reframe.core.launchers.local',
-    'reframe.core.launchers.mpi',
-    'reframe.core.launchers.rsh'
-]
+# The modules registering the builtin backends indexed by backend name; the
+# modules are imported only when one of their backends is requested
+_launcher_backend_modules = {
+    'alps': 'reframe.core.launchers.mpi',
+    'clush': 'reframe.core.launchers.rsh',
+    'ibrun': 'reframe.core.launchers.mpi',
+    'local': 'reframe.core.launchers.local',
+    'lrun': 'reframe.core.launchers.mpi',
+    'lrun-gpu': 'reframe.core.launchers.mpi',
+    'mpiexec': 'reframe.core.launchers.mpi',
+    'mpirun': 'reframe.core.launchers.mpi',
+    'pdsh': 'reframe.core.launchers.rsh',
+    'srun': 'reframe.core.launchers.mpi',
+    'srunalloc': 'reframe.core.launchers.mpi',
+    'ssh': 'reframe.core.launchers.rsh',
+    'upcrun': 'reframe.core.launchers.mpi',
+    'upcxx-run': 'reframe.core.launchers.mpi'
+}
 _launchers = {}
-_scheduler_backend_modules = [
-    'reframe.core.schedulers.flux',
-    'reframe.core.schedulers.local',
-    'reframe.core.schedulers.lsf',
-    'reframe.core.schedulers.pbs',
-    'reframe.core.schedulers.oar',
-    'reframe.core.schedulers.sge',
-    'reframe.core.schedulers.slurm',
-    'reframe.core.schedulers.ssh'
-]
+_scheduler_backend_modules = {
+    'flux': 'reframe.core.schedulers.flux',
+    'local': 'reframe.core.schedulers.local',
+    'lsf': 'reframe.core.schedulers.lsf',
+    'oar': 'reframe.core.schedulers.oar',
+    'pbs': 'reframe.core.schedulers.pbs',
+    'sge': 'reframe.core.schedulers.sge',
+    'slurm': 'reframe.core.schedulers.slurm',
+    'squeue': 'reframe.core.schedulers.slurm',
+    'ssh': 'reframe.core.schedulers.ssh',
+    'torque': 'reframe.core.schedulers.pbs'
+}
 _schedulers = {}
 
 
@@ -47,8 +62,11 @@ def _register_backend(name, local=False, error=None, *, backend_type):
 
 def _get_backend(name, *, backend_type):
     backend_modules = globals()[f'_{backend_type}_backend_modules']
-    for mod in backend_modules:
-        importlib.import_module(mod)
+    if name in backend_modules:
+        importlib.import_module(backend_modules[name])
+    else:
+        for mod in dict.fromkeys(backend_modules.values()):
+            importlib.import_module(mod)
 
     try:
         cls, error = globals()[f'_{backend_type}s'][name]
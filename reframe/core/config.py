@@ -10,7 +10,6 @@ import functools
 import importlib
 import itertools
 import json
-import jsonschema
 import os
 import re
 
@@ -443,6 +442,8 @@ class _SiteConfig:
                           f'for the current system: {hostname!r}')
 
     def validate(self):
+        import jsonschema
+
         site_config = self._pick_config()
         try:
             jsonschema.validate(site_config, self._schema)
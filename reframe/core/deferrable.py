@@ -4,7 +4,9 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import builtins
+import collections.abc
 import functools
+import time
 
 
 def deferrable(func):
@@ -58,6 +60,16 @@ class _DeferredExpression:
         elif cache:
             self._return_cached = cache
 
+        if _session is None:
+            ret = self._evaluate()
+        else:
+            ret = _session.evaluate(self)
+
+        # Cache the results for any subsequent evaluate calls.
+        self._cached = (ret,)
+        return ret
+
+    def _evaluate(self):
         fn_args = []
         for arg in self._args:
             fn_args.append(
@@ -70,15 +82,16 @@ class _DeferredExpression:
                 v.evaluate() if isinstance(v, _DeferredExpression) else v
             )
 
-        ret = self._fn(*fn_args, **fn_kwargs)
+        if _session is None:
+            ret = self._fn(*fn_args, **fn_kwargs)
+        else:
+            ret = _session.call(self._fn, fn_args, fn_kwargs)
 
         # Evaluate the return for as long as a deferred expression returns
         # another deferred expression.
         while isinstance(ret, _DeferredExpression):
             ret = ret.evaluate()
 
-        # Cache the results for any subsequent evaluate calls.
-        self._cached = (ret,)
         return ret
 
     def __bool__(self):
@@ -366,6 +379,124 @@ class _DeferredExpression:
         return ~a
 
 
+# Types of the arguments that are compared by value when looking up an
+# expression in an evaluation session; other arguments are compared by
+# identity
+_VALUE_TYPES = frozenset({type(None), bool, int, float, complex, str, bytes})
+
+# Mutable types of results that are copied when reused in an evaluation
+# session, so that modifying a result does not affect the other expressions
+_COPIED_TYPES = frozenset({list, dict, set})
+
+
+# The current evaluation session
+_session = None
+
+
+class _EvaluationSession:
+    '''Context manager for evaluating deferred expressions in a session.
+
+    Within a session, deferred expressions that call the same function with
+    the same arguments are evaluated only once, no matter if they are the
+    same object or not. Results that are iterators are not reused, since they
+    can be consumed only once. Results that are lists, dictionaries or sets
+    are reused as shallow copies.
+
+    The number of calls and the time spent in every deferred function during
+    the session are recorded in :attr:`timings`.
+    '''
+
+    def __init__(self):
+        self._memo = {}
+
+        # Keys of the expressions evaluated in the session by their id; we
+        # store also the expressions, so that they and their arguments, which
+        # may be identified by their id in the keys, are kept alive
+        self._keys = {}
+
+        #: Maps deferred function names to a list holding the number of
+        #: calls, the number of reused results and the time spent in calls.
+        self.timings = {}
+
+    def __enter__(self):
+        global _session
+
+        # Nested sessions are merged with the outermost one
+        self._outer = _session
+        if _session is None:
+            _session = self
+
+        return _session
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _session
+
+        if self._outer is None:
+            _session = None
+
+    def _stats(self, fn):
+        name = getattr(fn, '__qualname__', repr(fn))
+        return self.timings.setdefault(name, [0, 0, 0.0])
+
+    def _key(self, expr):
+        '''Return the key of a deferred expression.
+
+        Expressions calling the same function with the same arguments have the
+        same key.
+        '''
+        try:
+            return self._keys[id(expr)][1]
+        except KeyError:
+            key = (expr._fn,
+                   tuple(self._arg_key(a) for a in expr._args),
+                   tuple((k, self._arg_key(v))
+                         for k, v in expr._kwargs.items()))
+            self._keys[id(expr)] = (expr, key)
+            return key
+
+    def _arg_key(self, arg):
+        if isinstance(arg, _DeferredExpression):
+            return self._key(arg)
+
+        arg_type = type(arg)
+        if arg_type in _VALUE_TYPES:
+            return (arg_type, arg)
+        elif arg_type is tuple:
+            return (arg_type, tuple(self._arg_key(a) for a in arg))
+        else:
+            return (arg_type, id(arg))
+
+    def evaluate(self, expr):
+        key = self._key(expr)
+        try:
+            ret = self._memo[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable arguments; the expression cannot be memoized
+            return expr._evaluate()
+        else:
+            self._stats(expr._fn)[1] += 1
+            return ret.copy() if type(ret) in _COPIED_TYPES else ret
+
+        ret = expr._evaluate()
+        if type(ret) in _COPIED_TYPES:
+            self._memo[key] = ret.copy()
+        elif not isinstance(ret, collections.abc.Iterator):
+            self._memo[key] = ret
+
+        return ret
+
+    def call(self, fn, args, kwargs):
+        t_start = time.time()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            stats = self._stats(fn)
+            stats[0] += 1
+            stats[2] += time.time() - t_start
+
+
 class _DeferredPerformanceExpression(_DeferredExpression):
     '''Represents a performance function whose evaluation has been deferred.
 
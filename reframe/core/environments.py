@@ -56,6 +56,7 @@ class Environment(jsonext.JSONSerializable):
 
         self._extras = extras or {}
         self._features = features or []
+        self._feature_set = frozenset(self._features)
         self._prepare_cmds = prepare_cmds or []
 
     @property
@@ -4,15 +4,19 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import abc
+import collections
 import logging
 import logging.handlers
+import json
 import numbers
 import os
+import queue
 import re
-import requests
 import shutil
 import socket
+import sqlite3
 import sys
+import threading
 import time
 import urllib
 
@@ -156,15 +160,25 @@ class MultiFileHandler(logging.FileHandler):
     '''
 
     def __init__(self, prefix, mode='a', encoding=None, fmt=None,
-                 perffmt=None, ignore_keys=None):
+                 perffmt=None, ignore_keys=None, max_open_files=128):
         super().__init__(prefix, mode, encoding, delay=True)
 
         # Reset FileHandler's filename
         self.baseFilename = None
         self._prefix = prefix
 
-        # Associates filenames with open streams
-        self.__streams = {}
+        # Associates filenames with open streams; the least recently used
+        # streams are closed first if there are too many open
+        self.__streams = collections.OrderedDict()
+        self.__max_open_files = max_open_files
+
+        # Filenames of the streams written since the last flush
+        self.__unflushed = set()
+
+        # Log files whose header has been checked and directories that have
+        # been created already
+        self.__log_files = set()
+        self.__dirs = set()
 
         # Format specifiers
         self.__fmt = fmt
@@ -249,21 +263,63 @@ class MultiFileHandler(logging.FileHandler):
 
             self.__streams[self.baseFilename] = fp
 
+    def _open_stream(self, record):
+        try:
+            self.__streams.move_to_end(self.baseFilename)
+            return self.__streams[self.baseFilename]
+        except KeyError:
+            pass
+
+        if len(self.__streams) >= self.__max_open_files:
+            filename, stream = self.__streams.popitem(last=False)
+            self.__unflushed.discard(filename)
+            stream.close()
+
+        if self.baseFilename in self.__log_files:
+            # The file was closed to make room for others; simply reopen it
+            self.__streams[self.baseFilename] = open(
+                self.baseFilename, mode='a', encoding=self.encoding
+            )
+        else:
+            self._emit_header(record)
+            self.__log_files.add(self.baseFilename)
+
+        return self.__streams[self.baseFilename]
+
     def emit(self, record):
         try:
             dirname = self._prefix % record.__dict__
-            os.makedirs(dirname, exist_ok=True)
         except KeyError as e:
             raise LoggingError(f'logging failed: unknown placeholder in '
                                f'filename pattern: {e}') from None
-        except OSError as e:
-            raise LoggingError('logging failed') from e
+
+        if dirname not in self.__dirs:
+            try:
+                os.makedirs(dirname, exist_ok=True)
+            except OSError as e:
+                raise LoggingError('logging failed') from e
+
+            self.__dirs.add(dirname)
 
         check_basename = type(record.__rfm_check__).variant_name()
         self.baseFilename = os.path.join(dirname, f'{check_basename}.log')
-        self._emit_header(record)
-        self.stream = self.__streams[self.baseFilename]
-        super().emit(record)
+        self.stream = self._open_stream(record)
+
+        # Records are buffered until the handler is flushed
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            self.__unflushed.add(self.baseFilename)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        with self.lock:
+            for filename in self.__unflushed:
+                self.__streams[filename].flush()
+
+            self.__unflushed.clear()
 
     def close(self):
         # Close all open streams
@@ -271,6 +327,9 @@ class MultiFileHandler(logging.FileHandler):
             self.stream = s
             super().close()
 
+        self.__streams.clear()
+        self.__unflushed.clear()
+
 
 def _format_time_rfc3339(timestamp, datefmt):
     tz_suffix = time.strftime('%z', timestamp)
@@ -450,9 +509,11 @@ def _create_filelog_handler(site_config, config_prefix):
     format = site_config.get(f'{config_prefix}/format')
     format_perf = site_config.get(f'{config_prefix}/format_perfvars')
     ignore_keys = site_config.get(f'{config_prefix}/ignore_keys')
+    max_open_files = site_config.get(f'{config_prefix}/max_open_files')
     return MultiFileHandler(filename_patt, mode='a+' if append else 'w+',
                             fmt=format, perffmt=format_perf,
-                            ignore_keys=ignore_keys)
+                            ignore_keys=ignore_keys,
+                            max_open_files=max_open_files)
 
 
 def _create_syslog_handler(site_config, config_prefix):
@@ -543,6 +604,12 @@ def _create_httpjson_handler(site_config, config_prefix):
     json_formatter = site_config.get(f'{config_prefix}/json_formatter')
     extra_headers = site_config.get(f'{config_prefix}/extra_headers')
     debug = site_config.get(f'{config_prefix}/debug')
+    batch_size = site_config.get(f'{config_prefix}/batch_size')
+    queue_size = site_config.get(f'{config_prefix}/queue_size')
+    retries = site_config.get(f'{config_prefix}/retries')
+    retry_backoff = site_config.get(f'{config_prefix}/retry_backoff')
+    timeout = site_config.get(f'{config_prefix}/timeout')
+    spool_file = site_config.get(f'{config_prefix}/spool_file')
 
     parsed_url = urllib.parse.urlparse(url)
     if parsed_url.scheme not in {'http', 'https'}:
@@ -576,7 +643,11 @@ def _create_httpjson_handler(site_config, config_prefix):
             f'httpjson: could not connect to server '
             f'{parsed_url.hostname}:{port}: {e}'
         )
-        if not debug:
+        if spool_file:
+            getlogger().warning(
+                f'httpjson: log records will be spooled to {spool_file!r}'
+            )
+        elif not debug:
             return None
 
     if debug:
@@ -584,7 +655,21 @@ def _create_httpjson_handler(site_config, config_prefix):
                             'no data will be sent to the server')
 
     return HTTPJSONHandler(url, extras, ignore_keys, json_formatter,
-                           extra_headers, debug)
+                           extra_headers, debug, batch_size, queue_size,
+                           retries, retry_backoff, timeout, spool_file)
+
+
+def _create_sqlite_handler(site_config, config_prefix):
+    database = os.path.abspath(os.path.join(
+        site_config.get('systems/0/prefix'),
+        osext.expandvars(site_config.get(f'{config_prefix}/database'))
+    ))
+    try:
+        os.makedirs(os.path.dirname(database), exist_ok=True)
+        return SQLiteHandler(database)
+    except (OSError, sqlite3.Error) as e:
+        raise LoggingError(f'could not open perflog database '
+                           f'{database!r}') from e
 
 
 def _record_to_json(record, extras, ignore_keys):
@@ -632,9 +717,15 @@ class HTTPJSONHandler(logging.Handler):
         'stack_info', 'thread', 'threadName', 'exc_text'
     }
 
+    # Time in seconds to wait for the pending records to be sent when the
+    # handler is flushed or closed; any records left are spooled
+    SHUTDOWN_TIMEOUT = 30
+
     def __init__(self, url, extras=None, ignore_keys=None,
                  json_formatter=None, extra_headers=None,
-                 debug=False):
+                 debug=False, batch_size=1, queue_size=1000,
+                 retries=3, retry_backoff=1.0, timeout=10,
+                 spool_file=None):
         super().__init__()
         self._url = url
         self._extras = extras
@@ -654,10 +745,28 @@ class HTTPJSONHandler(logging.Handler):
 
         self._headers = {'Content-type': 'application/json',
                          'Accept-Charset': 'UTF-8'}
+        if batch_size > 1:
+            self._headers['Content-type'] = 'application/x-ndjson'
+
         if extra_headers:
             self._headers.update(extra_headers)
 
         self._debug = debug
+        self._batch_size = batch_size
+        self._retries = retries
+        self._retry_backoff = retry_backoff
+        self._timeout = timeout
+        self._spool_file = spool_file
+        self._spool_lock = threading.Lock()
+
+        # Records are sent to the server by a background thread, so that a
+        # slow server does not stall the test session
+        self._queue = queue.Queue(queue_size)
+        self._worker = None
+
+        # Set when a batch could not be sent; in this case, the rest of the
+        # records are spooled without contacting the server
+        self._server_down = False
 
     def emit(self, record):
         # Convert tags to a list to make them JSON friendly
@@ -677,14 +786,331 @@ class HTTPJSONHandler(logging.Handler):
 
             return
 
+        if '\n' in json_record:
+            # Batched and spooled records are newline-delimited
+            json_record = json.dumps(json.loads(json_record))
+
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._ship_records,
+                                            name='httpjson', daemon=True)
+            self._worker.start()
+
         try:
-            requests.post(
-                self._url, data=json_record,
-                headers=self._headers
+            self._queue.put_nowait(json_record)
+        except queue.Full:
+            # The server cannot keep up with us
+            self._spool([json_record])
+
+    def flush(self):
+        if self._worker is None or not self._worker.is_alive():
+            return
+
+        with self._queue.all_tasks_done:
+            self._queue.all_tasks_done.wait_for(
+                lambda: not self._queue.unfinished_tasks,
+                self.SHUTDOWN_TIMEOUT
             )
-        except requests.exceptions.RequestException as e:
+
+    def close(self):
+        # Send any pending records before closing, but do not wait for a
+        # slow server for longer than the shutdown timeout
+        if self._worker is not None:
+            deadline = time.time() + self.SHUTDOWN_TIMEOUT
+            try:
+                self._queue.put(None, timeout=self.SHUTDOWN_TIMEOUT)
+            except queue.Full:
+                pass
+
+            self._worker.join(max(0, deadline - time.time()))
+            if self._worker.is_alive():
+                getlogger().warning('httpjson: timed out sending log records')
+                self._server_down = True
+                records = self._drain_queue()
+                if records:
+                    self._spool(records)
+
+                # Let the worker finish once its current request is over
+                try:
+                    self._queue.put_nowait(None)
+                except queue.Full:
+                    pass
+
+            self._worker = None
+
+        super().close()
+
+    def _drain_queue(self):
+        records = []
+        while True:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                return records
+
+            if record is not None:
+                records.append(record)
+
+            self._queue.task_done()
+
+    def _ship_records(self):
+        import requests
+
+        with requests.Session() as session:
+            # Resend first any records spooled in a previous session
+            spooled = self._unspool()
+            for i in range(0, len(spooled), self._batch_size):
+                if self._server_down:
+                    self._spool(spooled[i:])
+                    break
+
+                self._send(session, spooled[i:i+self._batch_size])
+
+            done = False
+            while not done:
+                records = [self._queue.get()]
+                while len(records) < self._batch_size:
+                    try:
+                        records.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                if records[-1] is None:
+                    records.pop()
+                    done = True
+
+                if records and self._server_down:
+                    self._spool(records)
+                elif records:
+                    self._send(session, records)
+
+                for _ in range(len(records) + done):
+                    self._queue.task_done()
+
+    def _send(self, session, records):
+        import requests
+
+        if self._batch_size > 1:
+            data = ''.join(f'{r}\n' for r in records)
+        else:
+            data = records[0]
+
+        for attempt in range(self._retries + 1):
+            if attempt:
+                time.sleep(self._retry_backoff * 2**(attempt - 1))
+
+            try:
+                response = session.post(self._url, data=data,
+                                        headers=self._headers,
+                                        timeout=self._timeout)
+            except requests.exceptions.RequestException as e:
+                error = e
+            else:
+                if response.ok:
+                    return
+
+                error = f'server responded with {response.status_code}'
+                if (400 <= response.status_code < 500 and
+                    response.status_code not in (408, 429)):
+                    # Client errors will not go away by retrying
+                    break
+
+        self._server_down = True
+        getlogger().warning(
+            f'httpjson: could not send {len(records)} log record(s): {error}'
+        )
+        self._spool(records)
+
+    def _spool(self, records):
+        if not self._spool_file:
+            getlogger().warning(f'httpjson: dropping {len(records)} '
+                                f'log record(s)', cache=True)
+            return
+
+        with self._spool_lock:
+            with open(self._spool_file, 'a') as fp:
+                fp.writelines(f'{r}\n' for r in records)
+
+    def _unspool(self):
+        if not self._spool_file:
+            return []
+
+        with self._spool_lock:
+            try:
+                with open(self._spool_file) as fp:
+                    records = fp.read().splitlines()
+
+                os.remove(self._spool_file)
+            except FileNotFoundError:
+                return []
+            except OSError as e:
+                getlogger().warning(f'httpjson: could not read spooled '
+                                    f'log records: {e}')
+                return []
+
+        return [r for r in records if r]
+
+
+class PerflogDatabase:
+    '''An SQLite database of performance log records.
+
+    Each row of the ``perflogs`` table holds the result of a single
+    performance variable of a test case.
+
+    :arg filename: The database file; it is created if it does not exist.
+
+    .. versionadded:: 4.7
+    '''
+
+    _COLUMNS = (
+        'timestamp', 'test', 'display_name', 'system', 'partition',
+        'environ', 'jobid', 'result', 'perf_var', 'perf_value', 'perf_ref',
+        'perf_lower_thres', 'perf_upper_thres', 'perf_unit'
+    )
+
+    def __init__(self, filename):
+        self._conn = sqlite3.connect(filename, timeout=60)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS perflogs('
+                'id INTEGER PRIMARY KEY, '
+                'timestamp REAL NOT NULL, '
+                'test TEXT NOT NULL, '
+                'display_name TEXT, '
+                'system TEXT, '
+                'partition TEXT, '
+                'environ TEXT, '
+                'jobid TEXT, '
+                'result TEXT, '
+                'perf_var TEXT NOT NULL, '
+                'perf_value REAL, '
+                'perf_ref REAL, '
+                'perf_lower_thres REAL, '
+                'perf_upper_thres REAL, '
+                'perf_unit TEXT)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS perflogs_test_system_timestamp '
+                'ON perflogs(test, system, timestamp)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS perflogs_timestamp '
+                'ON perflogs(timestamp)'
+            )
+
+    def append(self, rows):
+        '''Append rows to the database.
+
+        The rows are not committed until :func:`commit` is called.
+
+        :arg rows: An iterable of dictionaries with the column values of each
+            row; missing columns are set to :obj:`None`.
+        '''
+        columns = ', '.join(self._COLUMNS)
+        placeholders = ', '.join(f':{c}' for c in self._COLUMNS)
+        self._conn.executemany(
+            f'INSERT INTO perflogs({columns}) VALUES ({placeholders})',
+            ({c: r.get(c) for c in self._COLUMNS} for r in rows)
+        )
+
+    def commit(self):
+        '''Commit the appended rows.'''
+        self._conn.commit()
+
+    def last_results(self, test, num=1, system=None, partition=None,
+                     environ=None, perf_var=None):
+        '''Return the last results of a test.
+
+        :arg test: The name of the test.
+        :arg num: The maximum number of results to return.
+        :arg system: Return only the results on this system.
+        :arg partition: Return only the results on this system partition.
+        :arg environ: Return only the results with this environment.
+        :arg perf_var: Return only the results of this performance variable.
+        :returns: A list of dictionaries with the column values of each
+            result, latest first.
+        '''
+        conditions = {
+            'test': test, 'system': system, 'partition': partition,
+            'environ': environ, 'perf_var': perf_var
+        }
+        where = ' AND '.join(f'{c} = :{c}'
+                             for c, v in conditions.items() if v is not None)
+        cursor = self._conn.execute(
+            f'SELECT {", ".join(self._COLUMNS)} FROM perflogs '
+            f'WHERE {where} ORDER BY timestamp DESC, id DESC LIMIT :num',
+            {**conditions, 'num': num}
+        )
+        return [dict(zip(self._COLUMNS, row)) for row in cursor]
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+
+class SQLiteHandler(logging.Handler):
+    '''A handler that appends performance log records to a
+    :class:`PerflogDatabase`.'''
+
+    def __init__(self, filename):
+        super().__init__()
+        self.baseFilename = filename
+        self._db = PerflogDatabase(filename)
+
+    def _rows(self, record):
+        common = {
+            'timestamp': (getattr(record, 'check_job_completion_time_unix',
+                                  None) or record.created),
+            'test': record.check_name,
+            'display_name': getattr(record, 'check_display_name', None),
+            'system': getattr(record, 'check_system', None),
+            'partition': getattr(record, 'check_partition', None),
+            'environ': getattr(record, 'check_environ', None),
+            'jobid': getattr(record, 'check_jobid', None),
+            'result': getattr(record, 'check_result', None)
+        }
+        if getattr(record, 'check_perf_var', None) is not None:
+            # The record refers to a single performance variable
+            yield {
+                **common,
+                'perf_var': record.check_perf_var,
+                'perf_value': record.check_perf_value,
+                'perf_ref': record.check_perf_ref,
+                'perf_lower_thres': record.check_perf_lower_thres,
+                'perf_upper_thres': record.check_perf_upper_thres,
+                'perf_unit': record.check_perf_unit
+            }
+            return
+
+        perfvalues = getattr(record, 'check_perfvalues', None) or {}
+        for var, info in perfvalues.items():
+            val, ref, lower, upper, unit = info
+            yield {
+                **common,
+                'perf_var': var.split(':')[-1],
+                'perf_value': val,
+                'perf_ref': ref,
+                'perf_lower_thres': lower,
+                'perf_upper_thres': upper,
+                'perf_unit': unit
+            }
+
+    def emit(self, record):
+        try:
+            self._db.append(self._rows(record))
+        except sqlite3.Error as e:
             raise LoggingError('logging failed') from e
 
+    def flush(self):
+        with self.lock:
+            try:
+                self._db.commit()
+            except sqlite3.Error as e:
+                raise LoggingError('logging failed') from e
+
+    def close(self):
+        self._db.close()
+        super().close()
+
 
 def _extract_handlers(site_config, handlers_group):
     handler_prefix = f'logging/0/{handlers_group}'
@@ -718,6 +1144,8 @@ def _extract_handlers(site_config, handlers_group):
                 getlogger().warning('could not initialize the '
                                     'httpjson handler; ignoring ...')
                 continue
+        elif handler_type == 'sqlite':
+            hdlr = _create_sqlite_handler(site_config, f'{handler_prefix}/{i}')
         else:
             # Should not enter here
             raise AssertionError(f'unknown handler type: {handler_type}')
@@ -888,6 +1316,14 @@ class LoggerAdapter(logging.LoggerAdapter):
         else:
             self.log(level, msg)
 
+        if not self.logger:
+            return
+
+        # Write out the records of this task buffered by the file handlers
+        for hdlr in self.logger.handlers:
+            if isinstance(hdlr, (MultiFileHandler, SQLiteHandler)):
+                hdlr.flush()
+
     def process(self, msg, kwargs):
         # Setup dynamic fields of the check
         self._update_check_extras()
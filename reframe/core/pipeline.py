@@ -13,6 +13,8 @@ __all__ = [
 ]
 
 
+import contextlib
+import copy
 import glob
 import hashlib
 import inspect
@@ -35,7 +37,8 @@ from reframe.core.backends import getlauncher, getscheduler
 from reframe.core.buildsystems import BuildSystemField
 from reframe.core.containers import (ContainerPlatform, ContainerPlatformField)
 from reframe.core.deferrable import (_DeferredExpression,
-                                     _DeferredPerformanceExpression)
+                                     _DeferredPerformanceExpression,
+                                     _EvaluationSession)
 from reframe.core.environments import Environment
 from reframe.core.exceptions import (BuildError, DependencyError,
                                      PerformanceError, PipelineError,
@@ -63,6 +66,11 @@ class _NoRuntime(ContainerPlatform):
 Deferrable = typ.make_meta_type('Deferrable', _DeferredExpression)
 
 
+# Types of the test attribute values that can be shared by test copies
+_IMMUTABLE_TYPES = frozenset({type(None), bool, int, float, complex, str,
+                              bytes, type})
+
+
 # Valid systems/environments mini-language
 _N = r'(\w[-.\w]*)'         # name
 _NW = rf'(\*|{_N})'         # name or wildcard
@@ -1053,6 +1061,22 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
     def __init__(self):
         pass
 
+    def __deepcopy__(self, memo):
+        # Every test case gets its own copy of its test, so we bypass
+        # `__new__()`, which sets up the initialization of a new test, and we
+        # share with the copy the immutable attribute values as well as the
+        # deferred initialization, which has already been evaluated.
+        ret = object.__new__(type(self))
+        memo[id(self)] = ret
+        for name, value in self.__dict__.items():
+            if (type(value) not in _IMMUTABLE_TYPES and
+                name != '_RegressionTest__deferred_rfm_init'):
+                value = copy.deepcopy(value, memo)
+
+            ret.__dict__[name] = value
+
+        return ret
+
     @classmethod
     def __init_subclass__(cls, *, special=False, pin_prefix=False,
                           require_version=None, **kwargs):
@@ -1118,6 +1142,16 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
         # Disabled hooks
         self._disabled_hooks = set()
 
+        # Results of the sanity and performance expressions evaluated ahead
+        # of time in a worker process and record of the evaluations of the
+        # current process, if requested
+        self._eval_results = None
+        self._eval_log = None
+
+        # Function for performing the file operations of the cleanup phase
+        # asynchronously; it is set by the execution policies
+        self._cleanup_executor = None
+
     @classmethod
     def _process_hook_registry(cls):
         '''Process and validate the pipeline hooks.'''
@@ -1754,12 +1788,24 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
         self._resolve_fixtures()
 
     def _copy_to_stagedir(self, path):
-        self.logger.debug(f'Copying {path} to stage directory')
+        stage_mode = rt.runtime().get_option('general/0/stage_mode')
+        max_workers = int(
+            rt.runtime().get_option('general/0/max_stage_workers')
+        )
+        self.logger.debug(f'Copying {path} to stage directory '
+                          f'[stage_mode: {stage_mode}]')
         self.logger.debug(f'Symlinking files: {self.readonly_files}')
         try:
-            osext.copytree_virtual(
-                path, self._stagedir, self.readonly_files, dirs_exist_ok=True
-            )
+            if stage_mode == 'copy':
+                osext.copytree_virtual(
+                    path, self._stagedir, self.readonly_files,
+                    dirs_exist_ok=True, max_workers=max_workers
+                )
+            else:
+                rt.runtime().source_snapshots.copytree(
+                    path, self._stagedir, self.readonly_files, stage_mode,
+                    dirs_exist_ok=True, max_workers=max_workers
+                )
         except (OSError, ValueError, TypeError) as e:
             raise PipelineError('copying of files failed') from e
 
@@ -2028,7 +2074,13 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
 
             if not self.is_dry_run():
                 self._job.submit()
-                self.logger.debug(f'Spawned run job (id={self.job.jobid})')
+                if self.job.jobid is None:
+                    # The scheduler has deferred the actual submission
+                    self.logger.debug('Queued run job for submission')
+                else:
+                    self.logger.debug(
+                        f'Spawned run job (id={self.job.jobid})'
+                    )
 
         # Update num_tasks if test is flexible
         if self.job.sched_flex_alloc_nodes:
@@ -2178,11 +2230,59 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
         if self.is_dry_run():
             return
 
-        with osext.change_dir(self._stagedir):
-            success = sn.evaluate(self.sanity_patterns)
+        with self.__evaluation_session('sanity'):
+            success = self.__evaluate('sanity', self.sanity_patterns)
             if not success:
                 raise SanityError()
 
+    @contextlib.contextmanager
+    def __evaluation_session(self, stage):
+        '''Evaluate the expressions of a stage sharing the files read and
+        the results of identical subexpressions.'''
+
+        with osext.change_dir(self._stagedir), sn.file_cache():
+            with _EvaluationSession() as session:
+                try:
+                    yield
+                finally:
+                    timings = ', '.join(
+                        f'{name}: {t:.6f}s ({num_calls} call(s), '
+                        f'{num_reused} reused)'
+                        for name, (num_calls, num_reused, t) in
+                        session.timings.items()
+                    )
+                    if timings:
+                        self.logger.debug(
+                            f'Time spent in deferred functions ({stage}): '
+                            f'{timings}'
+                        )
+
+    def __evaluate(self, key, expr):
+        '''Evaluate a sanity or performance expression.
+
+        If the expression has already been evaluated in a worker process, its
+        result is reused instead.
+        '''
+        if self._eval_results and key in self._eval_results:
+            value, exc = self._eval_results.pop(key)
+            if exc is not None:
+                raise exc
+
+            return value
+
+        try:
+            value = sn.evaluate(expr)
+        except Exception as e:
+            if self._eval_log is not None:
+                self._eval_log[key] = (None, e)
+
+            raise
+        else:
+            if self._eval_log is not None:
+                self._eval_log[key] = (value, None)
+
+            return value
+
     def is_performance_check(self):
         '''Return :obj:`True` if the test is a performance test.'''
         return self.perf_variables or hasattr(self, 'perf_patterns')
@@ -2238,10 +2338,10 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
             return
 
         # Evaluate the performance function and retrieve the metrics
-        with osext.change_dir(self._stagedir):
+        with self.__evaluation_session('performance'):
             for tag, expr in self.perf_variables.items():
                 try:
-                    value = expr.evaluate()
+                    value = self.__evaluate(f'perf:{tag}', expr)
                     unit = expr.unit
                 except Exception as e:
                     logging.getlogger().warning(
@@ -2316,26 +2416,34 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
 
     def _copy_to_outputdir(self):
         '''Copy check's interesting files to the output directory.'''
-        self.logger.debug('Copying test files to output directory')
         self._copy_job_files(self._job, self.outputdir)
         self._copy_job_files(self._build_job, self.outputdir)
 
-        with osext.change_dir(self.stagedir):
-            # Copy files specified by the user, but expand any glob patterns
-            keep_files = itertools.chain(
-                *(glob.iglob(f) for f in self.keep_files)
-            )
-            for f in keep_files:
-                f = os.path.abspath(f)
-                if os.path.isdir(f):
-                    # We need to keep the directory structure when copying
-                    # over to outputdir
-                    dst = os.path.join(
-                        self.outputdir, os.path.relpath(f, self.stagedir)
-                    )
-                    osext.copytree(f, dst, dirs_exist_ok=True)
-                else:
-                    shutil.copy2(f, self.outputdir)
+        # Copy files specified by the user, but expand any glob patterns;
+        # relative patterns are expanded against the stage directory without
+        # changing to it, since this may run in a separate thread
+        stagedir = glob.escape(self.stagedir)
+        keep_files = itertools.chain(
+            *(glob.iglob(os.path.join(stagedir, f)) for f in self.keep_files)
+        )
+        for f in keep_files:
+            f = os.path.abspath(f)
+            if os.path.isdir(f):
+                # We need to keep the directory structure when copying
+                # over to outputdir
+                dst = os.path.join(
+                    self.outputdir, os.path.relpath(f, self.stagedir)
+                )
+                osext.copytree(f, dst, dirs_exist_ok=True)
+            else:
+                shutil.copy2(f, self.outputdir)
+
+    def _cleanup_files(self, copy_files, remove_files):
+        if copy_files:
+            self._copy_to_outputdir()
+
+        if remove_files:
+            osext.rmtree(self._stagedir)
 
     @final
     def cleanup(self, remove_files=False):
@@ -2367,11 +2475,16 @@ class RegressionTest(RegressionMixin, jsonext.JSONSerializable):
                 f'outputdir and stagedir are the same; copying skipped'
             )
         else:
-            self._copy_to_outputdir()
+            self.logger.debug('Copying test files to output directory')
 
         if remove_files:
             self.logger.debug('Removing stage directory')
-            osext.rmtree(self._stagedir)
+
+        if self._cleanup_executor is None:
+            self._cleanup_files(not aliased, remove_files)
+        else:
+            self._cleanup_executor(self._cleanup_files,
+                                   not aliased, remove_files)
 
     # Dependency API
 
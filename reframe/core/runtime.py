@@ -32,6 +32,7 @@ class RuntimeContext:
         self._system = System.create(site_config)
         self._current_run = 0
         self._timestamp = time.localtime()
+        self._source_snapshots = None
 
     def _makedir(self, *dirs, wipeout=False):
         ret = os.path.join(*dirs)
@@ -139,6 +140,24 @@ class RuntimeContext:
 
         return os.path.abspath(ret)
 
+    @property
+    def source_snapshots(self):
+        '''The snapshots of the test sources taken during this session.
+
+        The snapshots are stored in a private directory under the stage
+        directory prefix.
+
+        :type: :class:`reframe.utility.osext.TreeSnapshots`
+
+        .. versionadded:: 4.7
+        '''
+        if self._source_snapshots is None:
+            self._source_snapshots = osext.TreeSnapshots(
+                os.path.join(self.stage_prefix, '.snapshots')
+            )
+
+        return self._source_snapshots
+
     def make_stagedir(self, *dirs):
         wipeout = self.get_option('general/0/clean_stagedir')
         ret = self._makedir(self.stage_prefix,
@@ -283,93 +302,77 @@ def is_env_loaded(environ):
                 for k, v in environ.env_vars.items()))
 
 
-def _is_valid_part(part, valid_systems):
-    for spec in valid_systems:
+@functools.lru_cache(maxsize=None)
+def _compile_specs(specs):
+    '''Compile a tuple of system or environment specs for matching.
+
+    :returns: a tuple of the set of the plain names in ``specs`` and of the
+        feature specs; each feature spec is a tuple of the required features,
+        the excluded features and the required extras.
+    '''
+    names = set()
+    feature_specs = []
+    for spec in specs:
         if spec[0] not in ('+', '-', '%'):
             # This is the standard case
-            sysname, partname = part.fullname.split(':')
-            valid_matches = ['*', '*:*', sysname, f'{sysname}:*',
-                             f'*:{partname}', f'{part.fullname}']
-            if spec in valid_matches:
-                return True
-        else:
-            plus_feats = []
-            minus_feats = []
-            props = {}
-            for subspec in spec.split(' '):
-                if subspec.startswith('+'):
-                    plus_feats.append(subspec[1:])
-                elif subspec.startswith('-'):
-                    minus_feats.append(subspec[1:])
-                elif subspec.startswith('%'):
-                    key, val = subspec[1:].split('=')
-                    props[key] = val
-
-            have_plus_feats = all(
-                ft in part.features or ft in part.resources
-                for ft in plus_feats
-            )
-            have_minus_feats = any(
-                ft in part.features or ft in part.resources
-                for ft in minus_feats
-            )
-            try:
-                have_props = True
-                for k, v in props.items():
-                    extra_value = part.extras[k]
-                    extra_type  = type(extra_value)
-                    if extra_value != extra_type(v):
-                        have_props = False
-                        break
-            except (KeyError, ValueError):
-                have_props = False
-
-            if have_plus_feats and not have_minus_feats and have_props:
-                return True
+            names.add(spec)
+            continue
+
+        plus_feats = set()
+        minus_feats = set()
+        props = []
+        for subspec in spec.split(' '):
+            if subspec.startswith('+'):
+                plus_feats.add(subspec[1:])
+            elif subspec.startswith('-'):
+                minus_feats.add(subspec[1:])
+            elif subspec.startswith('%'):
+                key, val = subspec[1:].split('=')
+                props.append((key, val))
+
+        feature_specs.append(
+            (frozenset(plus_feats), frozenset(minus_feats), tuple(props))
+        )
+
+    return frozenset(names), tuple(feature_specs)
+
+
+def _have_extras(extras, props):
+    try:
+        for k, v in props:
+            extra_value = extras[k]
+            extra_type  = type(extra_value)
+            if extra_value != extra_type(v):
+                return False
+    except (KeyError, ValueError):
+        return False
+
+    return True
+
+
+def _match_features(feature_specs, features, extras):
+    for plus_feats, minus_feats, props in feature_specs:
+        if (plus_feats <= features and features.isdisjoint(minus_feats) and
+            _have_extras(extras, props)):
+            return True
 
     return False
 
 
-def _is_valid_env(env, valid_prog_environs):
-    if '*' in valid_prog_environs:
+def _is_valid_part(part, valid_systems):
+    names, feature_specs = _compile_specs(tuple(valid_systems))
+    if not names.isdisjoint(part._match_names):
         return True
 
-    for spec in valid_prog_environs:
-        if spec[0] not in ('+', '-', '%'):
-            # This is the standard case
-            if env.name == spec:
-                return True
-        else:
-            plus_feats = []
-            minus_feats = []
-            props = {}
-            for subspec in spec.split(' '):
-                if subspec.startswith('+'):
-                    plus_feats.append(subspec[1:])
-                elif subspec.startswith('-'):
-                    minus_feats.append(subspec[1:])
-                elif subspec.startswith('%'):
-                    key, val = subspec[1:].split('=')
-                    props[key] = val
-
-            have_plus_feats = all(ft in env.features for ft in plus_feats)
-            have_minus_feats = any(ft in env.features
-                                   for ft in minus_feats)
-            try:
-                have_props = True
-                for k, v in props.items():
-                    extra_value = env.extras[k]
-                    extra_type  = type(extra_value)
-                    if extra_value != extra_type(v):
-                        have_props = False
-                        break
-            except (KeyError, ValueError):
-                have_props = False
-
-            if have_plus_feats and not have_minus_feats and have_props:
-                return True
+    return _match_features(feature_specs, part._feature_set, part.extras)
 
-    return False
+
+def _is_valid_env(env, valid_prog_environs):
+    names, feature_specs = _compile_specs(tuple(valid_prog_environs))
+    if '*' in names or env.name in names:
+        return True
+
+    return _match_features(feature_specs, env._feature_set, env.extras)
 
 
 def valid_sysenv_comb(valid_systems, valid_prog_environs,
@@ -144,6 +144,23 @@ class JobScheduler(abc.ABC, metaclass=JobSchedulerMeta):
         :meta private:
         '''
 
+    def event_sources(self, *jobs):
+        '''Return the file descriptors to wait on for state changes of jobs.
+
+        The returned file descriptors become readable as soon as any of the
+        given jobs changes its state, so that the caller may wait on them
+        instead of sleeping for a fixed amount of time between polls.
+
+        Backends that cannot notify about job state changes return
+        :obj:`None`, in which case the caller must fall back to periodic
+        polling.
+
+        :arg jobs: The job descriptors to wait on.
+        :returns: A list of file descriptors or :obj:`None`.
+        :meta private:
+        '''
+        return None
+
     def log(self, message, level=DEBUG2):
         '''Convenience method for logging debug messages from the scheduler
         backends.
@@ -632,12 +649,6 @@ class Job(jsonext.JSONSerializable, metaclass=JobMeta):
 
         return done
 
-    def __eq__(self, other):
-        return type(self) == type(other) and self.jobid == other.jobid
-
-    def __hash__(self):
-        return hash(self.jobid)
-
 
 class Node(abc.ABC):
     '''Abstract base class for representing system nodes.
@@ -3,8 +3,10 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import contextlib
 import errno
 import os
+import shutil
 import signal
 import socket
 import time
@@ -15,6 +17,17 @@ from reframe.core.backends import register_scheduler
 from reframe.core.exceptions import JobError
 
 
+def _pidfd_open(pid):
+    '''Return a file descriptor referring to process ``pid``.
+
+    If this is not supported by the platform, :obj:`None` is returned.
+    '''
+    try:
+        return os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        return None
+
+
 class _LocalJob(sched.Job):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -24,6 +37,14 @@ class _LocalJob(sched.Job):
         self._signal = None
         self._cancel_time = None
 
+        # File descriptor that becomes readable when the job process exits
+        self._pidfd = None
+
+        # CPUs and GPUs assigned to the job by the execution policy; if
+        # `None`, the job is not pinned
+        self._cpuset = None
+        self._gpus = None
+
     @property
     def proc(self):
         return self._proc
@@ -58,20 +79,45 @@ class LocalJobScheduler(sched.JobScheduler):
         f_stdout = open(job.stdout, 'w+')
         f_stderr = open(job.stderr, 'w+')
 
+        cmd = [os.path.abspath(job.script_filename)]
+        taskset = None
+        if job._cpuset:
+            # Pin the job through `taskset`, so that it is pinned before it
+            # starts and any processes it spawns inherit its affinity; we
+            # cannot set the affinity in a `preexec_fn`, since this is not
+            # safe when other threads are running
+            taskset = shutil.which('taskset')
+            if taskset:
+                cpulist = ','.join(str(c) for c in sorted(job._cpuset))
+                cmd = [taskset, '-c', cpulist, *cmd]
+
+        popen_args = {}
+        if job._gpus:
+            popen_args['env'] = dict(
+                os.environ, CUDA_VISIBLE_DEVICES=','.join(map(str, job._gpus))
+            )
+
         # The new process starts also a new session (session leader), so that
         # we can later kill any other processes that this might spawn by just
         # killing this one.
         proc = osext.run_command_async(
-            os.path.abspath(job.script_filename),
+            cmd,
             stdout=f_stdout,
             stderr=f_stderr,
-            start_new_session=True
+            start_new_session=True,
+            **popen_args
         )
+        if job._cpuset and not taskset:
+            # Pin the job as soon as possible; any processes that it has
+            # already spawned will not be pinned
+            with contextlib.suppress(ProcessLookupError):
+                os.sched_setaffinity(proc.pid, job._cpuset)
 
         # Update job info
         job._jobid = proc.pid
         job._nodelist = [socket.gethostname()]
         job._proc = proc
+        job._pidfd = _pidfd_open(proc.pid)
         job._f_stdout = f_stdout
         job._f_stderr = f_stderr
         job._submit_time = time.time()
@@ -86,6 +132,28 @@ class LocalJobScheduler(sched.JobScheduler):
     def filternodes(self, job, nodes):
         return [sched.AlwaysIdleNode(socket.gethostname())]
 
+    def event_sources(self, *jobs):
+        fds = []
+        for job in jobs:
+            if job is None or job.jobid is None:
+                continue
+
+            if job.state in ('SUCCESS', 'FAILURE', 'TIMEOUT'):
+                # There is nothing to wait for
+                continue
+
+            if job._pidfd is None:
+                return None
+
+            fds.append(job._pidfd)
+
+        return fds
+
+    def _close_pidfd(self, job):
+        if job._pidfd is not None:
+            os.close(job._pidfd)
+            job._pidfd = None
+
     def _kill_all(self, job):
         '''Send SIGKILL to all the processes of the spawned job.'''
         try:
@@ -99,6 +167,7 @@ class LocalJobScheduler(sched.JobScheduler):
             # Close file handles
             job.f_stdout.close()
             job.f_stderr.close()
+            self._close_pidfd(job)
             job._state = 'FAILURE'
 
     def _term_all(self, job):
@@ -111,6 +180,7 @@ class LocalJobScheduler(sched.JobScheduler):
             self.log(f'pid {job.jobid} already dead')
             job.f_stdout.close()
             job.f_stderr.close()
+            self._close_pidfd(job)
             job._state = 'FAILURE'
 
     def cancel(self, job):
@@ -6,6 +6,7 @@
 import functools
 import glob
 import itertools
+import os
 import re
 import shlex
 import time
@@ -64,9 +65,271 @@ def slurm_state_pending(state):
     return False
 
 
+def _is_array_task(jobid, index):
+    '''Check if the Slurm job id ``jobid`` refers to the task ``index`` of
+    a job array.
+
+    Pending tasks of a job array may be reported as a range of indices.
+    '''
+
+    range_match = re.match(r'\d+_\[(\d+)-(\d+)\]$', jobid)
+    if range_match:
+        return int(range_match[1]) <= index <= int(range_match[2])
+
+    return jobid.endswith(f'_{index}')
+
+
 _run_strict = functools.partial(osext.run_command, check=True)
 
 
+class _SlurmQueryService:
+    '''Query the state of the jobs of all the partitions of a system.
+
+    The jobs of every partition are merged in a single query, which is issued
+    at most once per query interval; in between, the last answer is served
+    from a cache.
+    '''
+
+    def __init__(self):
+        self._interval = None
+
+        # The jobs to include in the queries
+        self._jobs = {}
+
+        # The last answer per query command and the time it was obtained
+        self._answers = {}
+
+    def set_interval(self, interval):
+        '''Set the minimum interval between two queries.
+
+        The smallest interval of all the partitions sharing the service is
+        honoured.
+        '''
+
+        if self._interval is None or interval < self._interval:
+            self._interval = interval
+
+    def register(self, job):
+        '''Include a newly submitted job in the next queries.'''
+
+        self._jobs[job.jobid] = job
+
+    def _query(self, command, jobs, run_query):
+        # Forget about the completed jobs; they will not be polled again
+        self._jobs = {jobid: job for jobid, job in self._jobs.items()
+                      if not slurm_state_completed(job.state)}
+        for job in jobs:
+            self._jobs.setdefault(job.jobid, job)
+
+        try:
+            t_query, stdout = self._answers[command]
+        except KeyError:
+            pass
+        else:
+            if time.time() - t_query < self._interval:
+                return t_query, stdout
+
+        t_query = time.time()
+        jobs = list(self._jobs.values())
+
+        # Tasks of the same job array are queried through the array job id
+        jobids = ','.join(dict.fromkeys(job.jobid.split('_')[0]
+                                        for job in jobs))
+        stdout = run_query(jobs, jobids)
+        self._answers[command] = (t_query, stdout)
+        return t_query, stdout
+
+    def sacct(self, jobs):
+        '''Return the time and the output of the last ``sacct`` query
+        including ``jobs``.'''
+
+        def _run_query(jobs, jobids):
+            with rt.temp_environment(env_vars={'SLURM_TIME_FORMAT': '%s'}):
+                t_start = time.strftime(
+                    '%F', time.localtime(min(job.submit_time for job in jobs))
+                )
+                return _run_strict(
+                    f'sacct -S {t_start} -P -j {jobids} '
+                    f'-o jobid,state,exitcode,end,nodelist'
+                ).stdout
+
+        return self._query('sacct', jobs, _run_query)
+
+    def squeue(self, jobs):
+        '''Return the time and the output of the last ``squeue`` query
+        including ``jobs``.'''
+
+        def _run_query(jobs, jobids):
+            # We don't run the command with check=True, because if a job has
+            # finished already, squeue might return an error about an invalid
+            # job id.
+            return osext.run_command(
+                f'squeue -h -j {jobids} -o "%%i|%%T|%%N|%%r"'
+            ).stdout
+
+        return self._query('squeue', jobs, _run_query)
+
+
+# Query services per system
+_query_services = {}
+
+
+class _SlurmNodeInventory:
+    '''Cached inventory of the nodes of a Slurm cluster.
+
+    The nodes are retrieved at most once per query interval and they are
+    indexed by name and partition, so that the node filtering reduces to set
+    operations. If no query interval is set, the nodes are retrieved anew
+    every time all the nodes are requested and the filtering operations
+    reuse the nodes retrieved last.
+    '''
+
+    def __init__(self):
+        self._interval = None
+        self._t_update = None
+
+        # The nodes indexed by name and by partition
+        self._nodes = {}
+        self._partitions = {}
+
+        # Nodes satisfying a constraint, nodes of a reservation and the
+        # default partition; these are forgotten on every update
+        self._constraints = {}
+        self._reservations = {}
+        self._default_partition = None
+
+        # Node names of a node specification; these never change
+        self._hostnames = {}
+
+    def set_interval(self, interval):
+        '''Set the time for which the nodes are cached.
+
+        The smallest interval of all the partitions sharing the inventory is
+        honoured.
+        '''
+
+        if self._interval is None or interval < self._interval:
+            self._interval = interval
+
+    def invalidate(self):
+        '''Retrieve the nodes anew the next time they are needed.'''
+
+        self._t_update = None
+
+    def update(self, node_descriptions):
+        '''Replace the inventory with the nodes of ``node_descriptions``.'''
+
+        nodes = _create_nodes(node_descriptions)
+        self._nodes = {n.name: n for n in nodes}
+        self._partitions = {}
+        for n in nodes:
+            for p in n.partitions:
+                self._partitions.setdefault(p, set()).add(n)
+
+        self._constraints = {}
+        self._reservations = {}
+        self._default_partition = None
+        self._t_update = time.time()
+
+    def _refresh(self, reuse=False):
+        if self._t_update is not None:
+            if reuse and not self._interval:
+                return
+
+            if time.time() - self._t_update < self._interval:
+                return
+
+        try:
+            completed = _run_strict('scontrol -a show -o nodes')
+        except SpawnedProcessError as e:
+            raise JobSchedulerError(
+                'could not retrieve node information') from e
+
+        self.update(completed.stdout.splitlines())
+
+    def nodes(self):
+        '''Return all the nodes.'''
+
+        self._refresh()
+        return set(self._nodes.values())
+
+    def nodes_in_partitions(self, partitions):
+        '''Return the nodes belonging to all of ``partitions``.'''
+
+        self._refresh(reuse=True)
+        if not partitions:
+            return set(self._nodes.values())
+
+        return set.intersection(*(self._partitions.get(p, set())
+                                  for p in partitions))
+
+    def nodes_satisfying(self, constraint):
+        '''Return the nodes satisfying the Slurm ``constraint``.'''
+
+        self._refresh(reuse=True)
+        try:
+            return self._constraints[constraint]
+        except KeyError:
+            nodes = {n for n in self._nodes.values()
+                     if n.satisfies(constraint)}
+            self._constraints[constraint] = nodes
+            return nodes
+
+    def nodes_by_name(self, nodespec):
+        '''Return the nodes of the Slurm node specification ``nodespec``.'''
+
+        self._refresh(reuse=True)
+        try:
+            names = self._hostnames[nodespec]
+        except KeyError:
+            # We don't run the command with check=True, because an invalid
+            # node specification simply matches no nodes
+            completed = osext.run_command(
+                f'scontrol show hostname {nodespec}', log=False
+            )
+            names = set(completed.stdout.split())
+            self._hostnames[nodespec] = names
+
+        return {self._nodes[name] for name in names if name in self._nodes}
+
+    def reservation_nodes(self, reservation):
+        '''Return the nodes of ``reservation``.'''
+
+        self._refresh(reuse=True)
+        try:
+            nodespec = self._reservations[reservation]
+        except KeyError:
+            completed = _run_strict(f'scontrol -a show res {reservation}')
+            node_match = re.search(r'Nodes=(\S+)', completed.stdout)
+            if not node_match:
+                raise JobSchedulerError(
+                    f'could not extract the node names for '
+                    f'reservation {reservation!r}'
+                )
+
+            nodespec = node_match[1]
+            self._reservations[reservation] = nodespec
+
+        return self.nodes_by_name(nodespec)
+
+    def default_partition(self):
+        '''Return the default partition of the cluster or :obj:`None`.'''
+
+        self._refresh(reuse=True)
+        if self._default_partition is None:
+            completed = _run_strict('scontrol -a show -o partitions')
+            partition_match = re.search(r'PartitionName=(?P<partition>\S+)\s+'
+                                        r'.*Default=YES.*', completed.stdout)
+            self._default_partition = (partition_match['partition']
+                                       if partition_match else '')
+
+        return self._default_partition or None
+
+
+# Node inventories per system
+_node_inventories = {}
+
+
 class _SlurmJob(sched.Job):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -77,6 +340,34 @@ class _SlurmJob(sched.Job):
         # every poll as Slurm may be slow in reporting the exact nodelist
         self._nodespec = None
 
+        # The job is waiting to be submitted as part of a job array
+        self._queued = False
+
+    def _submit_if_queued(self):
+        if self._queued:
+            self.scheduler._submit_queued()
+
+        if self._jobid is None and self._exception:
+            # The submission of the job failed
+            raise self._exception
+
+    def wait(self):
+        self._submit_if_queued()
+        super().wait()
+
+    def cancel(self):
+        if self._queued:
+            # The job has not reached Slurm yet; simply drop it
+            self.scheduler._unqueue(self)
+            self._is_cancelling = True
+            return
+
+        return super().cancel()
+
+    def finished(self):
+        self._submit_if_queued()
+        return super().finished()
+
     @property
     def nodelist(self):
         # Generate the nodelist only after the job is finished
@@ -106,6 +397,10 @@ class SlurmJobScheduler(sched.JobScheduler):
     # standard job state polling using sacct.
     SACCT_SQUEUE_RATIO = 10
 
+    # Maximum number of jobs to submit as a single job array; this should not
+    # exceed Slurm's `MaxArraySize`
+    MAX_ARRAY_SIZE = 1000
+
     # This matches the format for both normal and heterogeneous jobs,
     # as well as job arrays.
     # For heterogeneous jobs, the job_id has the following format:
@@ -137,9 +432,23 @@ class SlurmJobScheduler(sched.JobScheduler):
             self._cancel_reasons.append('ReqNodeNotAvail')
 
         self._update_state_count = 0
+        self._queries = _query_services.setdefault(rt.runtime().system.name,
+                                                   _SlurmQueryService())
+        self._queries.set_interval(self.get_option('job_query_interval'))
+        self._node_inventory = _node_inventories.setdefault(
+            rt.runtime().system.name, _SlurmNodeInventory()
+        )
+        self._node_inventory.set_interval(
+            self.get_option('node_query_interval')
+        )
         self._submit_timeout = self.get_option('job_submit_timeout')
         self._use_nodes_opt = self.get_option('use_nodes_option')
         self._resubmit_on_errors = self.get_option('resubmit_on_errors')
+        self._use_job_arrays = self.get_option('use_job_arrays')
+
+        # Jobs waiting to be submitted as job arrays along with the options
+        # that determine which jobs can be grouped together
+        self._queued_jobs = []
 
     def make_job(self, *args, **kwargs):
         return _SlurmJob(*args, **kwargs)
@@ -259,7 +568,123 @@ class SlurmJobScheduler(sched.JobScheduler):
         return list(filter(None, preamble))
 
     def submit(self, job):
-        cmd = f'sbatch {job.script_filename}'
+        if self._use_job_arrays:
+            array_opts = self._array_options(job)
+            if array_opts is not None:
+                self.log(f'queueing job {job.name!r} for a job array '
+                         f'submission')
+                job._queued = True
+                self._queued_jobs.append((array_opts, job))
+                return
+
+        job._jobid = self._sbatch(job.script_filename)
+        job._submit_time = time.time()
+        self._queries.register(job)
+
+    def _array_options(self, job):
+        '''Return the job options that a job array must have in order to
+        include ``job``.
+
+        Jobs with the same options have the same resource requirements and
+        can be submitted as a single job array. If the job cannot be part of
+        a job array, :obj:`None` is returned.
+        '''
+
+        preamble = self.emit_preamble(job)
+        if job.is_array or any(opt.endswith(('hetjob', 'packjob'))
+                               for opt in preamble):
+            # Job arrays of job arrays or heterogeneous jobs are not
+            # supported by Slurm
+            return None
+
+        # The job name and the output files are set per array task
+        return tuple(
+            opt for opt in preamble
+            if not opt.startswith((f'{self._prefix} --job-name',
+                                   f'{self._prefix} --output',
+                                   f'{self._prefix} --error'))
+        )
+
+    def _unqueue(self, job):
+        self._queued_jobs = [(opts, j) for opts, j in self._queued_jobs
+                             if j is not job]
+        job._queued = False
+
+    def _submit_queued(self):
+        '''Submit all the queued jobs grouped in job arrays.'''
+
+        if not self._queued_jobs:
+            return
+
+        groups = {}
+        for opts, job in self._queued_jobs:
+            groups.setdefault(opts, []).append(job)
+            job._queued = False
+
+        self._queued_jobs = []
+        for opts, jobs in groups.items():
+            for i in range(0, len(jobs), self.MAX_ARRAY_SIZE):
+                self._submit_array(opts, jobs[i:i+self.MAX_ARRAY_SIZE])
+
+    def _submit_array(self, options, jobs):
+        if len(jobs) > 1:
+            try:
+                array_jobid = self._sbatch_array(options, jobs)
+            except (SpawnedProcessError, JobSchedulerError, OSError) as e:
+                self.log(f'could not submit job array: {e}; '
+                         f'submitting its jobs individually')
+            else:
+                submit_time = time.time()
+                for i, job in enumerate(jobs):
+                    job._jobid = f'{array_jobid}_{i}'
+                    job._submit_time = submit_time
+                    self._queries.register(job)
+                    self.log(f'submitted job {job.name!r} '
+                             f'(id={job.jobid})')
+
+                return
+
+        for job in jobs:
+            try:
+                with osext.change_dir(job.workdir):
+                    job._jobid = self._sbatch(job.script_filename)
+            except Exception as e:
+                job._exception = e
+            else:
+                job._submit_time = time.time()
+                self._queries.register(job)
+                self.log(f'submitted job {job.name!r} (id={job.jobid})')
+
+    def _sbatch_array(self, options, jobs):
+        '''Submit a job array whose tasks run the scripts of ``jobs``.'''
+
+        script = ['#!/bin/bash', *options,
+                  f'{self._prefix} --job-name="rfm_job_array"',
+                  f'{self._prefix} --array=0-{len(jobs) - 1}',
+                  f'{self._prefix} --output=/dev/null',
+                  f'{self._prefix} --error=/dev/null',
+                  'case $SLURM_ARRAY_TASK_ID in']
+        for i, job in enumerate(jobs):
+            workdir = shlex.quote(job.workdir)
+            cmd = shlex.quote(os.path.join(job.workdir, job.script_filename))
+            stdout = shlex.quote(job.stdout)
+            stderr = shlex.quote(job.stderr)
+            script.append(f'    {i}) cd {workdir} && '
+                          f'exec {cmd} >{stdout} 2>{stderr} ;;')
+
+        script.append('esac')
+
+        # The script is copied by Slurm at submission, so it is safe to place
+        # it in the directory of any of the jobs
+        script_filename = os.path.join(jobs[0].workdir, 'rfm_job_array.sh')
+        with open(script_filename, 'w') as fp:
+            fp.write('\n'.join(script) + '\n')
+
+        self.log(f'submitting {len(jobs)} jobs as a job array')
+        return self._sbatch(script_filename)
+
+    def _sbatch(self, script_filename):
+        cmd = f'sbatch {script_filename}'
         intervals = itertools.cycle([1, 2, 3])
         while True:
             try:
@@ -286,27 +711,13 @@ class SlurmJobScheduler(sched.JobScheduler):
                 'could not retrieve the job id of the submitted job'
             )
 
-        job._jobid = jobid_match.group('jobid')
-        job._submit_time = time.time()
+        return jobid_match.group('jobid')
 
     def allnodes(self):
-        try:
-            completed = _run_strict('scontrol -a show -o nodes')
-        except SpawnedProcessError as e:
-            raise JobSchedulerError(
-                'could not retrieve node information') from e
-
-        node_descriptions = completed.stdout.splitlines()
-        return _create_nodes(node_descriptions)
+        return self._node_inventory.nodes()
 
     def _get_default_partition(self):
-        completed = _run_strict('scontrol -a show -o partitions')
-        partition_match = re.search(r'PartitionName=(?P<partition>\S+)\s+'
-                                    r'.*Default=YES.*', completed.stdout)
-        if partition_match:
-            return partition_match.group('partition')
-
-        return None
+        return self._node_inventory.default_partition()
 
     def _merge_files(self, job):
         with osext.change_dir(job.workdir):
@@ -355,11 +766,11 @@ class SlurmJobScheduler(sched.JobScheduler):
                 f'[F] No partition specified; using {default_partition!r}'
             )
 
-        nodes = {n for n in nodes if n.partitions >= partitions}
+        nodes &= self._node_inventory.nodes_in_partitions(partitions)
         self.log(f'[F] Filtering nodes by partition(s) {partitions}: '
                  f'available nodes now: {len(nodes)}')
         if constraints:
-            nodes = {n for n in nodes if n.satisfies(constraints)}
+            nodes &= self._node_inventory.nodes_satisfying(constraints)
             self.log(f'[F] Filtering nodes by constraint(s) {constraints}: '
                      f'available nodes now: {len(nodes)}')
 
@@ -378,23 +789,10 @@ class SlurmJobScheduler(sched.JobScheduler):
         return nodes
 
     def _get_reservation_nodes(self, reservation):
-        completed = _run_strict('scontrol -a show res %s' % reservation)
-        node_match = re.search(r'(Nodes=\S+)', completed.stdout)
-        if node_match:
-            reservation_nodes = node_match[1]
-        else:
-            raise JobSchedulerError("could not extract the node names for "
-                                    "reservation '%s'" % reservation)
-
-        completed = _run_strict('scontrol -a show -o %s' % reservation_nodes)
-        node_descriptions = completed.stdout.splitlines()
-        return _create_nodes(node_descriptions)
+        return self._node_inventory.reservation_nodes(reservation)
 
     def _get_nodes_by_name(self, nodespec):
-        completed = osext.run_command('scontrol -a show -o node %s' %
-                                      nodespec)
-        node_descriptions = completed.stdout.splitlines()
-        return _create_nodes(node_descriptions)
+        return self._node_inventory.nodes_by_name(nodespec)
 
     def _update_completion_time(self, job, timestamps):
         if job._completion_time is not None:
@@ -409,38 +807,46 @@ class SlurmJobScheduler(sched.JobScheduler):
         if ct:
             job._completion_time = max(ct)
 
+    def _jobs_to_poll(self, jobs):
+        # Submit first any queued jobs, so that they can be polled, too
+        self._submit_queued()
+        return [job for job in jobs
+                if job is not None and job.jobid is not None]
+
+    def _job_info(self, job, job_info):
+        '''Return the entries of ``job_info`` referring to ``job``.'''
+
+        jobid, _, index = job.jobid.partition('_')
+        try:
+            entries = job_info[jobid]
+        except KeyError:
+            return None
+
+        if index:
+            # The job is a task of a job array submitted by us
+            entries = [m for m in entries
+                       if _is_array_task(m.group('jobid'), int(index))]
+
+        return entries or None
+
     def poll(self, *jobs):
         '''Update the status of the jobs.'''
 
-        if jobs:
-            # Filter out non-jobs
-            jobs = [job for job in jobs if job is not None]
-
+        jobs = self._jobs_to_poll(jobs)
         if not jobs:
             return
 
-        with rt.temp_environment(env_vars={'SLURM_TIME_FORMAT': '%s'}):
-            t_start = time.strftime(
-                '%F', time.localtime(min(job.submit_time for job in jobs))
-            )
-            completed = _run_strict(
-                f'sacct -S {t_start} -P '
-                f'-j {",".join(job.jobid for job in jobs)} '
-                f'-o jobid,state,exitcode,end,nodelist'
-            )
-
+        _, stdout = self._queries.sacct(jobs)
         self._update_state_count += 1
 
         # We need the match objects, so we have to use finditer()
         state_match = list(re.finditer(
             fr'^(?P<jobid>{self._jobid_patt})\|(?P<state>\S+)([^\|]*)\|'
             fr'(?P<exitcode>\d+)\:(?P<signal>\d+)\|(?P<end>\S+)\|'
-            fr'(?P<nodespec>.*)', completed.stdout, re.MULTILINE)
+            fr'(?P<nodespec>.*)', stdout, re.MULTILINE)
         )
         if not state_match:
-            self.log(
-                f'Job state not matched (stdout follows)\n{completed.stdout}'
-            )
+            self.log(f'Job state not matched (stdout follows)\n{stdout}')
             return
 
         job_info = {}
@@ -450,9 +856,8 @@ class SlurmJobScheduler(sched.JobScheduler):
             job_info.setdefault(jobid, []).append(s)
 
         for job in jobs:
-            try:
-                jobarr_info = job_info[job.jobid]
-            except KeyError:
+            jobarr_info = self._job_info(job, job_info)
+            if jobarr_info is None:
                 continue
 
             # Join the states with ',' in case of job arrays|heterogeneous jobs
@@ -485,13 +890,32 @@ class SlurmJobScheduler(sched.JobScheduler):
             job._exception = JobError('maximum pending time exceeded',
                                       job.jobid)
 
+    def _squeue_info(self, *jobs):
+        '''Return the time of the last ``squeue`` query and its entries
+        indexed by job id.'''
+
+        t_query, stdout = self._queries.squeue(jobs)
+
+        # We need the match objects, so we have to use finditer()
+        state_match = re.finditer(
+            fr'^(?P<jobid>{self._jobid_patt})\|(?P<state>\S+)\|'
+            fr'(?P<nodespec>\S*)\|(?P<reason>.+)', stdout, re.MULTILINE
+        )
+        jobinfo = {}
+        for s in state_match:
+            jobid = s.group('jobid').split('_')[0]
+            jobinfo.setdefault(jobid, []).append(s)
+
+        return t_query, jobinfo
+
     def _cancel_if_blocked(self, job, reasons=None):
         if (job.is_cancelling or not slurm_state_pending(job.state)):
             return
 
         if not reasons:
-            completed = osext.run_command('squeue -h -j %s -o %%r' % job.jobid)
-            reasons = completed.stdout.splitlines()
+            _, jobinfo = self._squeue_info(job)
+            reasons = [m.group('reason')
+                       for m in self._job_info(job, jobinfo) or []]
             if not reasons:
                 # Can't retrieve job's state. Perhaps it has finished already
                 # and does not show up in the output of squeue
@@ -577,46 +1001,19 @@ class SqueueJobScheduler(SlurmJobScheduler):
     SQUEUE_DELAY = 2
 
     def poll(self, *jobs):
-        if jobs:
-            # Filter out non-jobs
-            jobs = [job for job in jobs if job is not None]
-
+        jobs = self._jobs_to_poll(jobs)
         if not jobs:
             return
 
-        m = max(job.submit_time for job in jobs)
-        time_from_last_submit = time.time() - m
-        rem_wait = self.SQUEUE_DELAY - time_from_last_submit
-        if rem_wait > 0:
-            time.sleep(rem_wait)
-
-        # We don't run the command with check=True, because if the job has
-        # finished already, squeue might return an error about an invalid
-        # job id.
-        completed = osext.run_command(
-            f'squeue -h -j {",".join(job.jobid for job in jobs)} '
-            f'-o "%%i|%%T|%%N|%%r"'
-        )
-
-        # We need the match objects, so we have to use finditer()
-        state_match = list(re.finditer(
-            fr'^(?P<jobid>{self._jobid_patt})\|(?P<state>\S+)\|'
-            fr'(?P<nodespec>\S*)\|(?P<reason>.+)',
-            completed.stdout, re.MULTILINE)
-        )
-        jobinfo = {}
-        for s in state_match:
-            jobid = s.group('jobid').split('_')[0]
-            jobinfo.setdefault(jobid, []).append(s)
-
+        t_query, jobinfo = self._squeue_info(*jobs)
         for job in jobs:
-            if job is None:
-                continue
+            job_match = self._job_info(job, jobinfo)
+            if job_match is None:
+                # Jobs may not show up in squeue right after their submission
+                if t_query - job.submit_time >= self.SQUEUE_DELAY:
+                    job._state = ('CANCELLED' if job.is_cancelling
+                                  else 'COMPLETED')
 
-            try:
-                job_match = jobinfo[job.jobid]
-            except KeyError:
-                job._state = 'CANCELLED' if job.is_cancelling else 'COMPLETED'
                 continue
 
             # Join the states with ',' in case of job arrays
@@ -625,7 +1022,7 @@ class SqueueJobScheduler(SlurmJobScheduler):
             # Use ',' to join nodes to be consistent with Slurm syntax
             job._nodespec = ','.join(m.group('nodespec') for m in job_match)
             self._cancel_if_blocked(
-                job, [s.group('reason') for s in state_match]
+                job, [s.group('reason') for s in job_match]
             )
             self._cancel_if_pending_too_long(job)
 
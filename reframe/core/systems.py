@@ -195,6 +195,13 @@ class SystemPartition(jsonext.JSONSerializable):
         self._extras.setdefault('scheduler', sched_name)
         self._extras.setdefault('launcher', launcher_name)
 
+        # Precomputed names and features for matching the partition against
+        # the `valid_systems` of tests
+        self._match_names = frozenset({
+            '*', '*:*', parent, f'{parent}:*', f'*:{name}', f'{parent}:{name}'
+        })
+        self._feature_set = frozenset(features) | frozenset(self._resources)
+
     @property
     def access(self):
         '''The scheduler options for accessing this system partition.
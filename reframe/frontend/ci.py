@@ -5,7 +5,6 @@
 
 import os
 import sys
-import yaml
 
 import reframe.core.runtime as runtime
 from reframe.core.exceptions import ReframeError
@@ -99,6 +98,8 @@ def emit_pipeline(fp, testcases, child_pipeline_opts=None, backend='gitlab'):
     if backend != 'gitlab':
         raise ReframeError(f'unknown CI backend {backend!r}')
 
+    import yaml
+
     child_pipeline_opts = child_pipeline_opts or []
     yaml.dump(_emit_gitlab_pipeline(testcases, child_pipeline_opts), stream=fp,
               indent=2, sort_keys=False, width=sys.maxsize)
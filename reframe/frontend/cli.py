@@ -29,11 +29,6 @@ import reframe.utility.jsonext as jsonext
 import reframe.utility.osext as osext
 import reframe.utility.typecheck as typ
 
-from reframe.frontend.testgenerators import (distribute_tests,
-                                             getallnodes, repeat_tests,
-                                             parameterize_tests)
-from reframe.frontend.executors.policies import (SerialExecutionPolicy,
-                                                 AsynchronousExecutionPolicy)
 from reframe.frontend.executors import Runner, generate_testcases
 from reframe.frontend.loader import RegressionCheckLoader
 from reframe.frontend.printer import PrettyPrinter
@@ -202,6 +197,31 @@ def logfiles_message():
     return msg
 
 
+def _critical_path_priorities(testgraph, site_config, printer):
+    '''Prioritise the test cases by the length of their critical path.
+
+    The durations of the test cases are taken from the latest run report.
+    '''
+
+    try:
+        report_file = runreport.next_report_filename(
+            osext.expandvars(site_config.get('general/0/report_file')),
+            new=False
+        )
+        durations = runreport.load_report(report_file).durations()
+    except (OSError, errors.ReframeError) as err:
+        printer.verbose(f'could not retrieve the durations of the tests '
+                        f'from the latest run report: {err}')
+        durations = {}
+
+    weights = {
+        c: durations.get((c.check.unique_name,
+                          c.partition.fullname, c.environ.name))
+        for c in testgraph
+    }
+    return dependencies.critical_path_lengths(testgraph, weights)
+
+
 def calc_verbosity(site_config, quiesce):
     curr_verbosity = site_config.get('general/0/verbose')
     return curr_verbosity - quiesce
@@ -409,7 +429,7 @@ def main():
     )
     run_options.add_argument(
         '--exec-order', metavar='ORDER', action='store',
-        choices=['name', 'random', 'rname', 'ruid', 'uid'],
+        choices=['critical-path', 'name', 'random', 'rname', 'ruid', 'uid'],
         help='Impose an execution order for independent tests'
     )
     run_options.add_argument(
@@ -610,6 +630,14 @@ def main():
         action='append',
         help='Directories where ReFrame will look for base configuration'
     )
+    argparser.add_argument(
+        dest='event_driven_polling',
+        envvar='RFM_EVENT_DRIVEN_POLLING',
+        configvar='general/event_driven_polling',
+        action='store',
+        type=typ.Bool,
+        help='Wait for job events instead of polling periodically'
+    )
     argparser.add_argument(
         dest='git_timeout',
         envvar='RFM_GIT_TIMEOUT',
@@ -632,6 +660,47 @@ def main():
         action='store_true',
         help='Ignore ReqNodeNotAvail Slurm error'
     )
+    argparser.add_argument(
+        dest='max_cleanup_workers',
+        envvar='RFM_MAX_CLEANUP_WORKERS',
+        configvar='general/max_cleanup_workers',
+        action='store',
+        help=('Maximum number of threads for the file operations of the '
+              'cleanup phase of tests'),
+        type=int
+    )
+    argparser.add_argument(
+        dest='max_eval_workers',
+        envvar='RFM_MAX_EVAL_WORKERS',
+        configvar='general/max_eval_workers',
+        action='store',
+        help=('Maximum number of worker processes for evaluating the sanity '
+              'and performance of tests'),
+        type=int
+    )
+    argparser.add_argument(
+        dest='max_load_workers',
+        envvar='RFM_MAX_LOAD_WORKERS',
+        configvar='general/max_load_workers',
+        action='store',
+        help='Maximum number of worker processes for loading test files',
+        type=int
+    )
+    argparser.add_argument(
+        dest='max_stage_workers',
+        envvar='RFM_MAX_STAGE_WORKERS',
+        configvar='general/max_stage_workers',
+        action='store',
+        help='Maximum number of threads for populating stage directories',
+        type=int
+    )
+    argparser.add_argument(
+        dest='test_cache_file',
+        envvar='RFM_TEST_CACHE_FILE',
+        configvar='general/test_cache_file',
+        action='store',
+        help='File for caching the tests defined in test files'
+    )
     argparser.add_argument(
         dest='dump_pipeline_progress',
         envvar='RFM_DUMP_PIPELINE_PROGRESS',
@@ -639,6 +708,15 @@ def main():
         action='store_true',
         help='Dump progress information for the async execution'
     )
+    argparser.add_argument(
+        dest='pack_local_jobs',
+        envvar='RFM_PACK_LOCAL_JOBS',
+        configvar='general/pack_local_jobs',
+        action='store',
+        type=typ.Bool,
+        help=('Pack local jobs according to their resources and pin them '
+              'to free CPUs')
+    )
     argparser.add_argument(
         dest='perf_info_level',
         envvar='RFM_PERF_INFO_LEVEL',
@@ -677,6 +755,13 @@ def main():
         action='store_true',
         help='Resolve module conflicts automatically'
     )
+    argparser.add_argument(
+        dest='stage_mode',
+        envvar='RFM_STAGE_MODE',
+        configvar='general/stage_mode',
+        action='store',
+        help='How to populate the stage directories of tests'
+    )
     argparser.add_argument(
         dest='syslog_address',
         envvar='RFM_SYSLOG_ADDRESS',
@@ -965,7 +1050,13 @@ def main():
                                    check_search_recursive,
                                    external_vars,
                                    options.skip_system_check,
-                                   options.skip_prgenv_check)
+                                   options.skip_prgenv_check,
+                                   site_config.get(
+                                       'general/0/max_load_workers'
+                                   ),
+                                   osext.expandvars(site_config.get(
+                                       'general/0/test_cache_file'
+                                   )))
 
     def print_infoline(param, value):
         param = param + ':'
@@ -1022,11 +1113,47 @@ def main():
             else:
                 parsed_job_options.append(f'--{optstr}={valstr}')
 
+        # These pull in the whole test pipeline, so we import them only when
+        # we are about to load the tests
+        from reframe.frontend.executors.policies import (
+            AsynchronousExecutionPolicy, SerialExecutionPolicy
+        )
+        from reframe.frontend.testgenerators import (distribute_tests,
+                                                     getallnodes,
+                                                     parameterize_tests,
+                                                     repeat_tests)
+
         # Locate and load checks; `force=True` is not needed for normal
         # invocations from the command line and has practically no effect, but
         # it is needed to better emulate the behavior of running reframe's CLI
         # from within the unit tests, which call repeatedly `main()`.
-        checks_found = loader.load_all(force=True)
+        #
+        # If the test cache is used, only the tests passing the filters that
+        # need not load the tests are loaded along with their dependencies
+        if (options.filter_expr or options.gpu_only or
+            options.cpu_only or options.failed):
+            select = None
+        else:
+            test_filters = [filters.is_not_fixture(),
+                            filters.have_valid_sysenv()]
+            for name in options.exclude_names or []:
+                test_filters.append(filters.have_not_name(name))
+
+            if options.names:
+                test_filters.append(filters.have_any_name(options.names))
+
+            for tag in options.exclude_tags:
+                test_filters.append(filters.have_not_tag(tag))
+
+            for tag in options.tags:
+                test_filters.append(filters.have_tag(tag))
+
+            for maint in options.maintainers:
+                test_filters.append(filters.have_maintainer(maint))
+
+            select = filters.of_tests(*test_filters)
+
+        checks_found = loader.load_all(force=True, select=select)
         printer.verbose(f'Loaded {len(checks_found)} test(s)')
 
         # Generate all possible test cases first; we will need them for
@@ -1367,6 +1494,11 @@ def main():
             'general/0/keep_stage_files'
         )
         exec_policy.dry_run_mode = options.dry_run
+        if options.exec_order == 'critical-path':
+            exec_policy.task_priorities = _critical_path_priorities(
+                testgraph, site_config, printer
+            )
+
         try:
             errmsg = "invalid option for --flex-alloc-nodes: '{0}'"
             sched_flex_alloc_nodes = int(options.flex_alloc_nodes)
@@ -1397,11 +1529,33 @@ def main():
 
         runner = Runner(exec_policy, printer, options.max_retries,
                         options.maxfail, options.reruns, options.duration)
+        report_writer = None
         try:
             time_start = time.time()
             session_info['time_start'] = time.strftime(
                 '%FT%T%z', time.localtime(time_start),
             )
+
+            # The test cases are written to the report as they finish
+            report_file = os.path.normpath(
+                osext.expandvars(rt.get_option('general/0/report_file'))
+            )
+            basedir = os.path.dirname(report_file)
+            if basedir:
+                os.makedirs(basedir, exist_ok=True)
+
+            report_file = runreport.next_report_filename(report_file)
+            try:
+                report_writer = runreport.RunReportWriter(
+                    report_file, session_info, runner.stats
+                )
+            except OSError as e:
+                printer.warning(
+                    f'failed to generate report in {report_file!r}: {e}'
+                )
+            else:
+                exec_policy.task_listeners.append(report_writer)
+
             runner.runall(testcases, restored_cases)
         finally:
             time_end = time.time()
@@ -1410,6 +1564,11 @@ def main():
             )
             session_info['time_elapsed'] = time_end - time_start
 
+            # The stage directories do not refer to the snapshots of the
+            # test sources, so these can be removed, if any were taken
+            if rt.source_snapshots.basedir is not None:
+                rt.source_snapshots.clear()
+
             # Print a retry report if we did any retries
             if options.max_retries and runner.stats.failed(run=0):
                 printer.info(runner.stats.retry_report())
@@ -1430,48 +1589,42 @@ def main():
             if options.performance_report:
                 printer.info(runner.stats.performance_report())
 
-            # Generate the report for this session
-            report_file = os.path.normpath(
-                osext.expandvars(rt.get_option('general/0/report_file'))
-            )
-            basedir = os.path.dirname(report_file)
-            if basedir:
-                os.makedirs(basedir, exist_ok=True)
-
-            # Build final JSON report
-            run_stats = runner.stats.json()
-            session_info.update({
-                'num_cases': run_stats[0]['num_cases'],
-                'num_failures': run_stats[-1]['num_failures']
-            })
-            json_report = {
-                'session_info': session_info,
-                'runs': run_stats,
-                'restored_cases': []
-            }
+            # Finalize the report for this session
+            restored_records = []
             if options.restore_session is not None:
                 for c in restored_cases:
-                    json_report['restored_cases'].append(report.case(*c))
+                    restored_records.append(report.case(*c))
 
-            report_file = runreport.next_report_filename(report_file)
-            default_loc = os.path.dirname(
-                osext.expandvars(rt.get_default('general/report_file'))
-            )
-            try:
-                runreport.write_report(json_report, report_file,
-                                       rt.get_option(
-                                           'general/0/compress_report'),
-                                       os.path.dirname(report_file) == default_loc)
-            except OSError as e:
-                printer.warning(
-                    f'failed to generate report in {report_file!r}: {e}'
+            if report_writer:
+                default_loc = os.path.dirname(
+                    osext.expandvars(rt.get_default('general/report_file'))
                 )
+                try:
+                    report_writer.finalize(
+                        session_info, restored_records,
+                        rt.get_option('general/0/compress_report'),
+                        os.path.dirname(report_file) == default_loc
+                    )
+                except OSError as e:
+                    printer.warning(
+                        f'failed to generate report in {report_file!r}: {e}'
+                    )
 
             # Generate the junit xml report for this session
             junit_report_file = rt.get_option('general/0/report_junit')
             if junit_report_file:
                 # Expand variables in filename
                 junit_report_file = osext.expandvars(junit_report_file)
+                run_stats = runner.stats.json()
+                session_info.update({
+                    'num_cases': run_stats[0]['num_cases'],
+                    'num_failures': run_stats[-1]['num_failures']
+                })
+                json_report = {
+                    'session_info': session_info,
+                    'runs': run_stats,
+                    'restored_cases': restored_records
+                }
                 junit_xml = runreport.junit_xml_report(json_report)
                 try:
                     with open(junit_report_file, 'w') as fp:
@@ -8,6 +8,7 @@
 #
 
 import collections
+import collections.abc
 import itertools
 import sys
 
@@ -16,15 +17,78 @@ from reframe.core.exceptions import DependencyError
 from reframe.core.logging import getlogger, time_function
 
 
-@time_function
-def build_deps(cases, default_cases=None):
-    '''Build dependency graph from test cases.
+class DependencyGraph(collections.abc.Mapping):
+    '''A test case dependency graph.
+
+    The graph maps every test case to the ordered set of the test cases it
+    depends on. The reverse edges, i.e., the test cases that depend on every
+    test case, are indexed as well and the ``in_degree`` of the test cases is
+    kept up to date as test cases are added to or removed from the graph.
 
-    The graph is represented as an adjacency list in a Python dictionary
-    holding test cases. The dependency information is also encoded inside each
-    test case.
+    Test cases may depend on test cases that are not part of the graph; these
+    dangling edges are indexed and counted in the in-degree, too.
     '''
 
+    def __init__(self):
+        self._adjacency = collections.OrderedDict()
+        self._dependents = {}
+
+    def __getitem__(self, case):
+        return self._adjacency[case]
+
+    def __iter__(self):
+        return iter(self._adjacency)
+
+    def __len__(self):
+        return len(self._adjacency)
+
+    def add(self, case, deps=()):
+        '''Add a test case and its dependencies to the graph.'''
+        if case in self._adjacency:
+            self.remove(case)
+
+        adjacent = util.OrderedSet(deps)
+        self._adjacency[case] = adjacent
+        for d in adjacent:
+            self._dependents.setdefault(d, util.OrderedSet()).add(case)
+            d.in_degree += 1
+
+    def remove(self, case):
+        '''Remove a test case and its dependencies from the graph.
+
+        The dependencies of other test cases on ``case`` become dangling.
+        '''
+        for d in self._adjacency.pop(case):
+            self._dependents[d].discard(case)
+            d.in_degree -= 1
+
+    def dependents(self, case):
+        '''Return the test cases of the graph that depend on ``case``.'''
+        return list(self._dependents.get(case, []))
+
+    def remove_with_dependents(self, cases):
+        '''Remove test cases along with all the test cases that depend on them
+        directly or indirectly.
+
+        :returns: the list of ``cases`` and of all their dependent test cases.
+        '''
+        visited = util.OrderedSet(cases)
+        unvisited = list(visited)
+        while unvisited:
+            v = unvisited.pop()
+            for u in self._dependents.get(v, []):
+                if u not in visited:
+                    visited.add(u)
+                    unvisited.append(u)
+
+        for c in visited:
+            if c in self._adjacency:
+                self.remove(c)
+
+        return list(visited)
+
+
+def _build_graph(cases, default_cases, is_dep):
     # Index cases for quick access
     def build_index(cases):
         if cases is None:
@@ -63,49 +127,24 @@ def build_deps(cases, default_cases=None):
     # p stands for partition
     # e stands for environment
 
-    # We use an ordered dict here, because we need to keep the order of
-    # partitions and environments
-    graph = collections.OrderedDict()
+    graph = DependencyGraph()
     unresolved_cases = []
     for c in cases:
-        psrc = c.partition.name
-        esrc = c.environ.name
         try:
             for dep in c.check.user_deps():
                 tname, when = dep
                 for d in resolve_dep(c, tname):
-                    pdst = d.partition.name
-                    edst = d.environ.name
-                    if when((psrc, esrc), (pdst, edst)):
+                    if is_dep(c, d, when):
                         c.deps.append(d)
         except DependencyError as e:
             getlogger().warning(e)
             unresolved_cases.append(c)
             continue
 
-        graph[c] = util.OrderedSet(c.deps)
+        graph.add(c, c.deps)
 
     # Skip also all cases that depend on the unresolved ones
-    skipped_cases = []
-    skip_nodes = set(unresolved_cases)
-    while skip_nodes:
-        v = skip_nodes.pop()
-        skipped_cases.append(v)
-        for u, adj in graph.items():
-            if v in adj:
-                skip_nodes.add(u)
-
-    # Prune graph
-    for c in skipped_cases:
-        # Cases originally discovered (unresolved_cases) are not in the graph,
-        # but we loop over them here; therefore we use pop()
-        graph.pop(c, None)
-
-    # Calculate in-degree of each node
-    for u, adjacent in graph.items():
-        for v in adjacent:
-            v.in_degree += 1
-
+    skipped_cases = graph.remove_with_dependents(unresolved_cases)
     msg = 'skipping all dependent test cases\n'
     for c in skipped_cases:
         msg += f'  - {c}\n'
@@ -116,6 +155,41 @@ def build_deps(cases, default_cases=None):
     return graph, skipped_cases
 
 
+@time_function
+def build_deps(cases, default_cases=None):
+    '''Build dependency graph from test cases.
+
+    The graph is represented as a :class:`DependencyGraph`, which maps every
+    test case to the ordered set of its dependencies. The dependency
+    information is also encoded inside each test case.
+    '''
+
+    def _is_dep(c, d, when):
+        return when((c.partition.name, c.environ.name),
+                    (d.partition.name, d.environ.name))
+
+    return _build_graph(cases, default_cases, _is_dep)
+
+
+@time_function
+def clone_deps(cases, default_cases=None):
+    '''Clone test cases and build the dependency graph of the clones.
+
+    This is equivalent to calling :func:`build_deps` on the clones of the test
+    cases, but the dependency conditions are not evaluated again; the
+    dependencies of the clones follow those already resolved for the
+    original test cases.
+    '''
+
+    orig_deps = {c: set(c.deps) for c in cases}
+
+    def _is_dep(c, d, when):
+        # Clones compare equal to the test cases they originate from
+        return d in orig_deps[c]
+
+    return _build_graph([c.clone() for c in cases], default_cases, _is_dep)
+
+
 def format_deps(graph, indent=2):
     lines = []
     for c, deps in graph.items():
@@ -209,11 +283,11 @@ def prune_deps(graph, testcases, max_depth=None):
     for u in pruned_graph:
         u.in_degree = 0
 
+    ret = DependencyGraph()
     for u, adjacent in pruned_graph.items():
-        for v in adjacent:
-            v.in_degree += 1
+        ret.add(u, adjacent)
 
-    return pruned_graph
+    return ret
 
 
 @time_function
@@ -271,3 +345,44 @@ def toposort(graph, is_subgraph=False):
 
     return list(itertools.chain(*(retrieve(cases_by_name, n, [])
                                   for n in visited)))
+
+
+@time_function
+def critical_path_lengths(graph, weights):
+    '''Return the length of the longest path from every test case of the
+    graph through the test cases that depend on it.
+
+    The length of a path is the sum of the weights of its test cases.
+    Test cases missing from ``weights`` or with a :obj:`None` weight are
+    assigned the mean of the known weights or ``1`` if no weight is known.
+    Dangling edges are ignored.
+    '''
+
+    known = [w for w in weights.values() if w is not None]
+    default = sum(known) / len(known) if known else 1
+    dependents = {u: [] for u in graph}
+    for u, adjacent in graph.items():
+        for v in adjacent:
+            if v in dependents:
+                dependents[v].append(u)
+
+    # Visit the graph from the test cases without dependents, so that each
+    # test case is visited after all of its dependents
+    num_pending = {u: len(dependents[u]) for u in graph}
+    unvisited = [u for u, n in num_pending.items() if n == 0]
+    lengths = {}
+    while unvisited:
+        u = unvisited.pop()
+        weight = weights.get(u)
+        if weight is None:
+            weight = default
+
+        lengths[u] = weight + max((lengths[v] for v in dependents[u]),
+                                  default=0)
+        for v in graph[u]:
+            if v in num_pending:
+                num_pending[v] -= 1
+                if num_pending[v] == 0:
+                    unvisited.append(v)
+
+    return lengths
@@ -5,6 +5,7 @@
 
 import abc
 import copy
+import functools
 import os
 import signal
 import sys
@@ -136,8 +137,7 @@ def generate_testcases(checks, prepare=False):
 
 
 def clone_testcases(cases):
-    new_cases = [tc.clone() for tc in cases]
-    return dependencies.toposort(dependencies.build_deps(new_cases)[0])
+    return dependencies.toposort(dependencies.clone_deps(cases)[0])
 
 
 class RegressionTask:
@@ -396,8 +396,20 @@ class RegressionTask:
                                          multiline=self._perflog_compat)
 
     @logging.time_function
-    def cleanup(self, *args, **kwargs):
-        self._safe_call(self.check.cleanup, *args, **kwargs)
+    def cleanup(self, *args, cleanup_pool=None, **kwargs):
+        # The file operations of the cleanup phase are submitted to the
+        # cleanup pool, unless the post-cleanup hooks of the test run after
+        # them
+        check = self.check
+        if (cleanup_pool is not None and
+            not check._rfm_pipeline_hooks.get('post_cleanup')):
+            check._cleanup_executor = functools.partial(cleanup_pool.submit,
+                                                        self)
+
+        try:
+            self._safe_call(check.cleanup, *args, **kwargs)
+        finally:
+            check._cleanup_executor = None
 
     def fail(self, exc_info=None, callback='on_task_failure'):
         self._failed_stage = self._current_stage
@@ -599,8 +611,9 @@ class Runner:
             )
 
             # Clone failed cases and rebuild dependencies among them
-            failed_cases = [t.testcase.clone() for t in failures]
-            cases_graph, _ = dependencies.build_deps(failed_cases, cases)
+            cases_graph, _ = dependencies.clone_deps(
+                [t.testcase for t in failures], cases
+            )
             failed_cases = dependencies.toposort(cases_graph, is_subgraph=True)
             self._runall(failed_cases)
             failures = self._stats.failed()
@@ -645,6 +658,10 @@ class ExecutionPolicy(abc.ABC):
         self.sched_flex_alloc_nodes = None
         self.sched_options = []
 
+        # Priorities of the test cases; if set, ready tasks of higher
+        # priority are submitted first
+        self.task_priorities = None
+
         # Task event listeners
         self.task_listeners = []
         self.stats = None
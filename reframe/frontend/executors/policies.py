@@ -3,19 +3,29 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import bisect
+import concurrent.futures
 import contextlib
+import itertools
 import math
+import os
+import pickle
+import select
+import signal
 import sys
+import threading
 import time
 
 import reframe.core.runtime as rt
 import reframe.utility as util
+import reframe.utility.cpuinfo as cpuinfo
 from reframe.core.exceptions import (FailureLimitError,
                                      RunSessionTimeout,
                                      SkipTestError,
                                      TaskDependencyError,
                                      TaskExit)
-from reframe.core.logging import getlogger, level_from_str
+from reframe.core.logging import (configure_logging, getlogger,
+                                  level_from_str)
 from reframe.core.pipeline import (CompileOnlyRegressionTest,
                                    RunOnlyRegressionTest)
 from reframe.frontend.executors import (ExecutionPolicy, RegressionTask,
@@ -67,13 +77,35 @@ class _PollController:
     def reset_snooze_time(self):
         self._sleep_duration = self.SLEEP_MIN
 
-    def snooze(self):
+    def snooze(self, fds=None):
+        '''Wait before polling the jobs again.
+
+        If ``fds`` is :obj:`None` or empty, sleep for the current back-off
+        period. Otherwise, wait until any of the file descriptors becomes
+        readable, but not longer than ``SLEEP_MAX``, so that the scheduler
+        backends still get the chance to check the job time limits.
+        '''
         if self._num_polls == 0:
             self._t_init = time.time()
 
         t_elapsed = time.time() - self._t_init
         self._num_polls += 1
         poll_rate = self._num_polls / t_elapsed if t_elapsed else math.inf
+        if fds:
+            getlogger().debug2(
+                f'Poll rate control: waiting for events on {len(fds)} job(s) '
+                f'(current poll rate: {poll_rate} polls/s)'
+            )
+
+            # Use `poll()`, since `select()` cannot handle file descriptors
+            # beyond `FD_SETSIZE`
+            poller = select.poll()
+            for fd in fds:
+                poller.register(fd, select.POLLIN)
+
+            poller.poll(self.SLEEP_MAX * 1000)
+            return
+
         getlogger().debug2(
             f'Poll rate control: sleeping for {self._sleep_duration}s '
             f'(current poll rate: {poll_rate} polls/s)'
@@ -84,17 +116,396 @@ class _PollController:
         )
 
 
+def _has_hooks(check, phase):
+    disabled = getattr(check, '_disabled_hooks', [])
+    return any(h.__name__ not in disabled
+               for h in check._rfm_pipeline_hooks.get(phase, []))
+
+
+class _PriorityQueue:
+    '''Set of tasks ordered by descending priority.
+
+    Tasks of equal priority are kept in the order they were added. The
+    priority of a task is computed once, when the task is added.
+    '''
+
+    def __init__(self, priority):
+        self._priority = priority
+
+        # Sorted list of ((-priority, sequence number), task) entries
+        self._entries = []
+        self._keys = {}
+        self._seqnum = itertools.count()
+
+    def add(self, task):
+        if task in self._keys:
+            return
+
+        key = (-self._priority(task), next(self._seqnum))
+        bisect.insort(self._entries, (key, task))
+        self._keys[task] = key
+
+    def discard(self, task):
+        key = self._keys.pop(task, None)
+        if key is not None:
+            del self._entries[bisect.bisect_left(self._entries, (key,))]
+
+    def __contains__(self, task):
+        return task in self._keys
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return (task for _, task in self._entries)
+
+
+def _eval_stages(task, stages):
+    '''Evaluate the sanity and performance expressions of the given stages
+    of a task.
+
+    Only the stages themselves are run and not their pipeline hooks, which
+    are left to the main process. Return the results of the evaluated
+    expressions and the error that stopped the evaluation, if any. Results
+    that cannot be sent back to the main process are omitted.
+    '''
+
+    check = task.check
+    check._eval_log = {}
+    error = None
+    with rt.temp_config(task.testcase.partition.fullname):
+        for stage in stages:
+            try:
+                getattr(type(check), stage)(check)
+            except Exception as e:
+                # The error will be reproduced when the stage is run by the
+                # main process
+                error = f'{stage}: {e}'
+                break
+
+    results = {}
+    for key, entry in check._eval_log.items():
+        try:
+            pickle.loads(pickle.dumps(entry))
+        except Exception:
+            continue
+
+        results[key] = entry
+
+    return results, error
+
+
+class _EvalWorkerPool:
+    '''Pool of worker processes for evaluating the sanity and performance
+    stages of tasks off the main loop.
+
+    Each evaluation runs in a forked process, so that it has access to the
+    full state of the test. The evaluated expressions are sent back through
+    a pipe and are reused when the main process runs the stages.
+
+    Workers are only forked while no other threads are running, since a lock
+    held by another thread at the time of the fork would never be released
+    in the worker.
+    '''
+
+    READ_SIZE = 65536
+
+    def __init__(self, max_workers):
+        self._max_workers = max_workers
+
+        # Running workers per task: (pid, read end of their pipe, data read)
+        self._workers = {}
+
+        # Evaluation results of the finished workers per task
+        self._results = {}
+
+        # Whether forking a worker has been refused because of other threads
+        self._fork_refused = False
+
+    @property
+    def num_workers(self):
+        return len(self._workers)
+
+    def running(self, task):
+        return task in self._workers
+
+    def finished(self, task):
+        return task in self._results
+
+    def pop_results(self, task):
+        return self._results.pop(task)
+
+    def can_fork(self):
+        threads = [t.name for t in threading.enumerate()
+                   if t is not threading.current_thread()]
+        if threads and not self._fork_refused:
+            getlogger().warning(
+                f"'max_eval_workers' has no effect while other threads are "
+                f"running ({', '.join(threads)}); sanity and performance "
+                f"will be evaluated in the main process until they finish"
+            )
+            self._fork_refused = True
+
+        return not threads
+
+    def fds(self):
+        return [rfd for _, rfd, _ in self._workers.values()]
+
+    def submit(self, task, stages):
+        '''Start evaluating the stages of a task.
+
+        Return :obj:`False` if there is no free worker.
+        '''
+        if len(self._workers) >= self._max_workers:
+            return False
+
+        rfd, wfd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # Worker process; make sure that we never return from here
+            status = 0
+            try:
+                os.close(rfd)
+                configure_logging(None)
+                data = pickle.dumps(_eval_stages(task, stages))
+                with os.fdopen(wfd, 'wb') as fp:
+                    fp.write(data)
+            except BaseException:
+                status = 1
+            finally:
+                os._exit(status)
+
+        os.close(wfd)
+        os.set_blocking(rfd, False)
+        self._workers[task] = (pid, rfd, bytearray())
+        getlogger().debug2(f'Evaluating {task.info()} in worker {pid}')
+        return True
+
+    def poll(self):
+        '''Collect the results of the finished workers.'''
+
+        if not self._workers:
+            return
+
+        tasks = {}
+        poller = select.poll()
+        for task, (_, rfd, _) in self._workers.items():
+            tasks[rfd] = task
+            poller.register(rfd, select.POLLIN)
+
+        for rfd, _ in poller.poll(0):
+            task = tasks[rfd]
+            pid, _, data = self._workers[task]
+            while True:
+                try:
+                    chunk = os.read(rfd, self.READ_SIZE)
+                except BlockingIOError:
+                    break
+
+                if chunk:
+                    data += chunk
+                    continue
+
+                # The worker has finished
+                os.close(rfd)
+                os.waitpid(pid, 0)
+                del self._workers[task]
+                try:
+                    results, error = pickle.loads(data)
+                except Exception as e:
+                    getlogger().debug(
+                        f'could not retrieve the evaluation results of '
+                        f'{task.info()}: {e}'
+                    )
+                    results, error = {}, None
+
+                if error is not None:
+                    getlogger().debug(
+                        f'evaluation of {task.info()} in worker {pid} '
+                        f'stopped at {error}'
+                    )
+
+                self._results[task] = results
+
+                break
+
+    def shutdown(self):
+        '''Kill all running workers.'''
+
+        for pid, rfd, _ in self._workers.values():
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGKILL)
+
+            os.waitpid(pid, 0)
+            os.close(rfd)
+
+        self._workers.clear()
+        self._results.clear()
+
+
+class _CleanupWorkerPool:
+    '''Pool of threads for performing the file operations of the cleanup
+    phase of tasks off the main loop.
+
+    The files of the tasks are copied to their output directories and their
+    stage directories are removed by the threads. Any errors are reported
+    against the task they belong to, when the pool is polled.
+    '''
+
+    def __init__(self, max_workers):
+        self._max_workers = max_workers
+        self._executor = None
+
+        # Pending file operations per task
+        self._futures = {}
+
+    @property
+    def num_pending(self):
+        return len(self._futures)
+
+    def submit(self, task, fn, *args):
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                self._max_workers
+            )
+
+        self._futures[task] = self._executor.submit(fn, *args)
+        getlogger().debug2(f'Submitted the cleanup of {task.info()}')
+
+    def poll(self):
+        '''Fail the tasks whose file operations have failed.'''
+
+        for task, future in list(self._futures.items()):
+            if not future.done():
+                continue
+
+            del self._futures[task]
+            exc = future.exception()
+            if exc is not None:
+                task.fail((type(exc), exc, exc.__traceback__))
+
+        # Release the threads while idle, so that they do not prevent the
+        # evaluation workers from being forked
+        if not self._futures and self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def shutdown(self, cancel=False):
+        '''Wait for all the pending file operations to finish.
+
+        If ``cancel`` is :obj:`True`, the file operations that have not
+        started are cancelled and no errors are reported.
+        '''
+
+        if cancel:
+            for future in self._futures.values():
+                future.cancel()
+
+            self._futures.clear()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+        self.poll()
+
+
+def _make_cleanup_pool():
+    max_workers = rt.runtime().get_option('general/0/max_cleanup_workers')
+    if max_workers:
+        return _CleanupWorkerPool(int(max_workers))
+
+    return None
+
+
+class _LocalResourcePool:
+    '''Keep track of the CPUs and GPUs of the local host assigned to jobs.
+
+    CPUs are assigned in whole cores, so that jobs running side by side never
+    share a core. Free cores are kept sorted, so that each job receives
+    neighbouring cores whenever possible.
+    '''
+
+    def __init__(self, cores):
+        self._free_cores = sorted(cores)
+        self._num_cpus = sum(len(c) for c in cores)
+        self._free_gpus = []
+        self._num_gpus = 0
+
+        # Resources assigned to each task
+        self._allocations = {}
+
+    def register_gpus(self, num_gpus):
+        '''Make sure that the pool manages at least ``num_gpus`` GPUs.'''
+
+        if num_gpus > self._num_gpus:
+            self._free_gpus += list(range(self._num_gpus, num_gpus))
+            self._num_gpus = num_gpus
+
+    def acquire(self, task, num_cpus, num_gpus):
+        '''Assign free CPUs and GPUs to a task.
+
+        Requests exceeding the resources of the host are capped, so that the
+        task runs alone on the host.
+
+        Return the lists of assigned CPUs and GPUs or :obj:`None` if there
+        are not enough free resources.
+        '''
+
+        num_cpus = min(num_cpus, self._num_cpus)
+        num_gpus = min(num_gpus, self._num_gpus)
+        if len(self._free_gpus) < num_gpus:
+            return None
+
+        cores, count = [], 0
+        for core in self._free_cores:
+            if count >= num_cpus:
+                break
+
+            cores.append(core)
+            count += len(core)
+
+        if count < num_cpus:
+            return None
+
+        gpus = self._free_gpus[:num_gpus]
+        del self._free_gpus[:num_gpus]
+        self._free_cores = self._free_cores[len(cores):]
+        self._allocations[task] = (cores, gpus)
+        return [c for core in cores for c in core], gpus
+
+    def release(self, task):
+        '''Return the resources of a task to the pool.
+
+        Releasing a task without resources is a no-op.
+        '''
+
+        try:
+            cores, gpus = self._allocations.pop(task)
+        except KeyError:
+            return
+
+        self._free_cores = sorted(self._free_cores + cores)
+        self._free_gpus = sorted(self._free_gpus + gpus)
+
+
 class SerialExecutionPolicy(ExecutionPolicy, TaskEventListener):
     def __init__(self):
         super().__init__()
 
         self._pollctl = _PollController()
+        self._poll_events = rt.runtime().get_option(
+            'general/0/event_driven_polling'
+        )
 
         # Index tasks by test cases
         self._task_index = {}
 
         # Tasks that have finished, but have not performed their cleanup phase
         self._retired_tasks = []
+
+        # Worker pool for the file operations of the cleanup phase
+        self._cleanup_pool = _make_cleanup_pool()
         self.task_listeners.append(self)
 
     def runcase(self, case):
@@ -148,7 +559,10 @@ class SerialExecutionPolicy(ExecutionPolicy, TaskEventListener):
                 if task.run_complete():
                     break
 
-                self._pollctl.snooze()
+                if self._poll_events and not self.dry_run_mode:
+                    self._pollctl.snooze(sched.event_sources(task.check.job))
+                else:
+                    self._pollctl.snooze()
 
             task.run_wait()
             if not self.skip_sanity_check:
@@ -163,6 +577,9 @@ class SerialExecutionPolicy(ExecutionPolicy, TaskEventListener):
             return
         except ABORT_REASONS as e:
             task.abort(e)
+            if self._cleanup_pool:
+                self._cleanup_pool.shutdown(cancel=True)
+
             raise
         except BaseException:
             task.fail(sys.exc_info())
@@ -234,13 +651,20 @@ class SerialExecutionPolicy(ExecutionPolicy, TaskEventListener):
             if c in self._task_index:
                 self._task_index[c].ref_count -= 1
 
-        _cleanup_all(self._retired_tasks, not self.keep_stage_files)
+        _cleanup_all(self._retired_tasks, not self.keep_stage_files,
+                     cleanup_pool=self._cleanup_pool)
+        if self._cleanup_pool:
+            self._cleanup_pool.poll()
+
         if self.timeout_expired():
             raise RunSessionTimeout('maximum session duration exceeded')
 
     def exit(self):
         # Clean up all remaining tasks
-        _cleanup_all(self._retired_tasks, not self.keep_stage_files)
+        _cleanup_all(self._retired_tasks, not self.keep_stage_files,
+                     cleanup_pool=self._cleanup_pool)
+        if self._cleanup_pool:
+            self._cleanup_pool.shutdown()
 
 
 class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
@@ -250,6 +674,9 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         super().__init__()
 
         self._pollctl = _PollController()
+        self._poll_events = rt.runtime().get_option(
+            'general/0/event_driven_polling'
+        )
 
         # Index tasks by test cases
         self._task_index = {}
@@ -258,6 +685,28 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         # we want to preserve the order of the tasks.
         self._current_tasks = util.OrderedSet()
 
+        # Queues of the current tasks per pipeline state; only the tasks in
+        # these queues are visited when advancing the pipeline. Tasks waiting
+        # for their dependencies are not queued and tasks ready to compile or
+        # run are queued per partition.
+        self._task_queues = {
+            'startup': util.OrderedSet(),
+            'ready_compile': {},
+            'compiling': util.OrderedSet(),
+            'ready_run': {},
+            'running': util.OrderedSet(),
+            'completing': util.OrderedSet()
+        }
+
+        # Dependency countdown counters: number of unfinished, failed and
+        # skipped dependencies per task
+        self._deps_pending = {}
+        self._deps_failed = {}
+        self._deps_skipped = {}
+
+        # Tasks to notify when a task finishes
+        self._dependents = {}
+
         # Quick look up for the partition schedulers including the
         # `_rfm_local` pseudo-partition
         self._schedulers = {
@@ -279,6 +728,31 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         self._pipeline_statistics = rt.runtime().get_option(
             'systems/0/dump_pipeline_progress'
         )
+
+        # Worker pool for evaluating the sanity and performance stages
+        max_eval_workers = rt.runtime().get_option(
+            'general/0/max_eval_workers'
+        )
+        if max_eval_workers:
+            self._eval_pool = _EvalWorkerPool(max_eval_workers)
+        else:
+            self._eval_pool = None
+
+        # Worker pool for the file operations of the cleanup phase
+        self._cleanup_pool = _make_cleanup_pool()
+
+        # Pool of the local host resources for packing the local jobs
+        self._local_resources = None
+        if rt.runtime().get_option('general/0/pack_local_jobs'):
+            cores = cpuinfo.core_cpusets()
+            if cores is None:
+                getlogger().warning(
+                    'CPU affinity cannot be set on this platform; '
+                    'local jobs will not be packed'
+                )
+            else:
+                self._local_resources = _LocalResourcePool(cores)
+
         self.task_listeners.append(self)
 
     def _init_pipeline_progress(self, num_tasks):
@@ -325,6 +799,17 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         # Set partition-based counters, if not set already
         self._partition_tasks.setdefault(partition.fullname, util.OrderedSet())
         self._max_jobs.setdefault(partition.fullname, partition.max_jobs)
+        for partname in (partition.fullname, '_rfm_local'):
+            for state in ('ready_compile', 'ready_run'):
+                if partname not in self._task_queues[state]:
+                    self._task_queues[state][partname] = self._ready_queue()
+
+        if (self._local_resources and
+            partition.scheduler.registered_name == 'local'):
+            self._local_resources.register_gpus(
+                sum(d.num_devices for d in partition.devices
+                    if d.type == 'gpu')
+            )
 
         task = RegressionTask(case, self.task_listeners)
         self._task_index[case] = task
@@ -334,6 +819,75 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
             f'using {environ.name}'
         )
         self._current_tasks.add(task)
+        self._init_deps_countdown(task)
+        if self._deps_ready(task):
+            self._task_queues['startup'].add(task)
+
+    def _init_deps_countdown(self, task):
+        self._deps_pending[task] = 0
+        self._deps_failed[task] = 0
+        self._deps_skipped[task] = 0
+        for c in task.testcase.deps:
+            # NOTE: Restored dependencies are not in the task_index
+            if c not in self._task_index:
+                continue
+
+            dep = self._task_index[c]
+            if dep.failed:
+                self._deps_failed[task] += 1
+            elif dep.skipped:
+                self._deps_skipped[task] += 1
+            elif not dep.succeeded:
+                self._deps_pending[task] += 1
+                self._dependents.setdefault(dep, []).append(task)
+
+    def _deps_ready(self, task):
+        '''Check if a task waiting for its dependencies may be advanced.'''
+
+        return (self._deps_pending[task] == 0 or
+                self._deps_failed[task] or self._deps_skipped[task])
+
+    def _notify_dependents(self, task):
+        '''Count down the dependencies of the dependents of a finished task.
+
+        Dependents that may be advanced are moved to the startup queue.
+        '''
+
+        for t in self._dependents.pop(task, []):
+            self._deps_pending[t] -= 1
+            if task.failed:
+                self._deps_failed[t] += 1
+            elif task.skipped:
+                self._deps_skipped[t] += 1
+
+            if (t in self._current_tasks and t.state == 'startup' and
+                self._deps_ready(t)):
+                self._task_queues['startup'].add(t)
+
+    def _queue(self, task):
+        '''Return the queue of a task based on its current state.'''
+
+        state = task.state
+        if state not in self._task_queues:
+            return None
+
+        if state == 'ready_compile':
+            partname = _get_partition_name(task, phase='build')
+        elif state == 'ready_run':
+            partname = _get_partition_name(task, phase='run')
+        else:
+            return self._task_queues[state]
+
+        return self._task_queues[state][partname]
+
+    def _requeue(self, task, old_queue):
+        new_queue = self._queue(task) if task in self._current_tasks else None
+        if new_queue is old_queue:
+            return
+
+        old_queue.discard(task)
+        if new_queue is not None:
+            new_queue.add(task)
 
     def exit(self):
         if self._pipeline_statistics:
@@ -343,19 +897,27 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         while self._current_tasks:
             try:
                 self._poll_tasks()
-                num_running = sum(
-                    1 if t.state in ('running', 'compiling') else 0
-                    for t in self._current_tasks
-                )
                 timeout = rt.runtime().get_option(
                     'general/0/pipeline_timeout'
                 )
 
-                self._advance_all(self._current_tasks, timeout)
+                advanced_all = self._advance_all(timeout)
+
+                # Count the tasks still running after advancing, so that we
+                # do not wait for the ones that have just finished
+                num_running = (len(self._task_queues['running']) +
+                               len(self._task_queues['compiling']))
+                if self._eval_pool:
+                    num_running += self._eval_pool.num_workers
+
                 if self._pipeline_statistics:
                     num_retired = len(self._retired_tasks)
 
-                _cleanup_all(self._retired_tasks, not self.keep_stage_files)
+                _cleanup_all(self._retired_tasks, not self.keep_stage_files,
+                             cleanup_pool=self._cleanup_pool)
+                if self._cleanup_pool:
+                    self._cleanup_pool.poll()
+
                 if self._pipeline_statistics:
                     num_retired_actual = num_retired - len(self._retired_tasks)
 
@@ -372,7 +934,20 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
                     )
 
                 if num_running:
-                    self._pollctl.snooze()
+                    # Wait for job events only if all the tasks have been
+                    # visited; otherwise just back off and continue
+                    if advanced_all:
+                        self._pollctl.snooze(self._event_sources())
+                    else:
+                        self._pollctl.snooze()
+            except ABORT_REASONS as e:
+                self._abortall(e)
+                raise
+
+        # Wait for the file operations of the cleanup phase to finish
+        if self._cleanup_pool:
+            try:
+                self._cleanup_pool.shutdown()
             except ABORT_REASONS as e:
                 self._abortall(e)
                 raise
@@ -380,19 +955,52 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         if self._pipeline_statistics:
             self._dump_pipeline_progress('pipeline-progress.json')
 
+    def _pending_jobs(self, partname):
+        jobs = []
+        for t in self._partition_tasks[partname]:
+            if t.state == 'compiling':
+                jobs.append(t.check.build_job)
+            elif t.state == 'running':
+                jobs.append(t.check.job)
+
+        return jobs
+
     def _poll_tasks(self):
         if self.dry_run_mode:
             return
 
         for partname, sched in self._schedulers.items():
-            jobs = []
-            for t in self._partition_tasks[partname]:
-                if t.state == 'compiling':
-                    jobs.append(t.check.build_job)
-                elif t.state == 'running':
-                    jobs.append(t.check.job)
+            sched.poll(*self._pending_jobs(partname))
 
-            sched.poll(*jobs)
+        if self._eval_pool:
+            self._eval_pool.poll()
+
+    def _event_sources(self):
+        '''Return the file descriptors to wait on for job state changes.
+
+        If event-driven polling is disabled or any of the schedulers with
+        pending jobs cannot notify about their state changes, :obj:`None` is
+        returned and the caller must fall back to periodic polling.
+        '''
+        if not self._poll_events or self.dry_run_mode:
+            return None
+
+        fds = []
+        for partname, sched in self._schedulers.items():
+            jobs = self._pending_jobs(partname)
+            if not jobs:
+                continue
+
+            sources = sched.event_sources(*jobs)
+            if sources is None:
+                return None
+
+            fds += sources
+
+        if self._eval_pool:
+            fds += self._eval_pool.fds()
+
+        return fds
 
     def _exec_stage(self, task, stage_methods):
         '''Execute a series of pipeline stages.
@@ -420,28 +1028,109 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         else:
             return True
 
-    def _advance_all(self, tasks, timeout=None):
+    def _advance_all(self, timeout=None):
+        '''Advance all the queued tasks.
+
+        The queues are visited in an order that allows tasks to advance
+        through all the stages that do not depend on their jobs in a single
+        pass. Tasks that have already started are advanced first, so that
+        any job slots they free can be taken by new tasks in the same pass.
+
+        Return :obj:`False` if the pipeline timeout expired before all the
+        queued tasks were visited, :obj:`True` otherwise.
+        '''
+
         t_init = time.time()
         num_progressed = 0
 
-        getlogger().debug2(f'Current tests: {len(tasks)}')
-
-        # We take a snapshot of the tasks to advance by doing a shallow copy,
-        # since the tasks may removed by the individual advance functions.
-        for t in list(tasks):
-            old_state = t.state
-            bump_state = getattr(self, f'_advance_{t.state}')
-            num_progressed += bump_state(t)
-            new_state = t.state
+        getlogger().debug2(f'Current tests: {len(self._current_tasks)}')
+        advance_fns = [
+            (self._task_queues['running'], self._advance_running),
+            (self._task_queues['compiling'], self._advance_compiling),
+            (self._task_queues['completing'], self._advance_completing),
+            (self._task_queues['startup'], self._advance_startup)
+        ]
+        for partname, queue in self._task_queues['ready_compile'].items():
+            advance_fns.append((queue, self._advance_ready_compile))
+
+        for partname, queue in self._task_queues['ready_run'].items():
+            advance_fns.append((queue, self._advance_ready_run))
+
+        for queue, bump_state in advance_fns:
+            # We take a snapshot of the tasks to advance by doing a shallow
+            # copy, since the tasks may be requeued while advancing them.
+            tasks = list(queue)
+            for t in tasks:
+                old_state = t.state
+                progressed = bump_state(t)
+                num_progressed += progressed
+                new_state = t.state
+                self._requeue(t, queue)
+                if self._pipeline_statistics:
+                    self._update_pipeline_progress(old_state, new_state, 1)
 
-            t_elapsed = time.time() - t_init
-            if timeout and t_elapsed > timeout and num_progressed:
-                break
+                t_elapsed = time.time() - t_init
+                if timeout and t_elapsed > timeout and num_progressed:
+                    getlogger().debug2(f'Bumped {num_progressed} test(s)')
+                    return False
 
-            if self._pipeline_statistics:
-                self._update_pipeline_progress(old_state, new_state, 1)
+                if (not progressed and
+                    old_state in ('ready_compile', 'ready_run') and
+                    self._partition_full(t, old_state)):
+                    # No other task of this queue can progress
+                    break
 
         getlogger().debug2(f'Bumped {num_progressed} test(s)')
+        return True
+
+    def _task_priority(self, task):
+        return self.task_priorities.get(task.testcase, 0)
+
+    def _ready_queue(self):
+        # The ready tasks are kept ordered by their priority, if any, so
+        # that the tasks of higher priority are advanced first
+        if self.task_priorities:
+            return _PriorityQueue(self._task_priority)
+
+        return util.OrderedSet()
+
+    def _partition_full(self, task, state):
+        phase = 'build' if state == 'ready_compile' else 'run'
+        partname = _get_partition_name(task, phase)
+        max_jobs = self._max_jobs[partname]
+        return len(self._partition_tasks[partname]) >= max_jobs
+
+    def _acquire_local_resources(self, task):
+        '''Pin the job of a task to free resources of the local host.
+
+        Return :obj:`False` if there are not enough free resources.
+        '''
+
+        job = task.check.job
+        if (self._local_resources is None or
+            job.scheduler.registered_name != 'local'):
+            return True
+
+        num_cpus = max(task.check.num_tasks or 1, 1)
+        num_cpus *= task.check.num_cpus_per_task or 1
+        num_gpus = task.check.num_gpus_per_node or 0
+        resources = self._local_resources.acquire(task, num_cpus, num_gpus)
+        if resources is None:
+            getlogger().debug2(
+                f'Not enough free local resources for {task.info()}: '
+                f'cpus={num_cpus}, gpus={num_gpus}'
+            )
+            return False
+
+        job._cpuset, job._gpus = resources
+        getlogger().debug2(
+            f'Pinning {task.info()} to cpus={job._cpuset}, gpus={job._gpus}'
+        )
+        return True
+
+    def _release_local_resources(self, task):
+        if self._local_resources:
+            self._local_resources.release(task)
 
     def _advance_startup(self, task):
         if self.deps_skipped(task):
@@ -521,8 +1210,13 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         partname = _get_partition_name(task, phase='run')
         max_jobs = self._max_jobs[partname]
         if len(self._partition_tasks[partname]) < max_jobs:
+            if not self._acquire_local_resources(task):
+                return 0
+
             if self._exec_stage(task, [task.run]):
                 self._partition_tasks[partname].add(task)
+            else:
+                self._release_local_resources(task)
 
             return 1
 
@@ -533,6 +1227,7 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         partname = _get_partition_name(task, phase='run')
         try:
             if task.run_complete():
+                self._release_local_resources(task)
                 if self._exec_stage(task, [task.run_wait]):
                     self._partition_tasks[partname].remove(task)
 
@@ -540,11 +1235,60 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
             else:
                 return 0
         except TaskExit:
+            self._release_local_resources(task)
             self._partition_tasks[partname].remove(task)
             self._current_tasks.remove(task)
             return 1
 
+    def _offload_evaluation(self, task):
+        '''Evaluate the sanity and performance stages of a task in the
+        worker pool.
+
+        Return :obj:`True` if the task must wait for the evaluation to finish.
+        '''
+
+        pool = self._eval_pool
+        if pool is None or task.check.is_dry_run():
+            return False
+
+        if pool.running(task):
+            return True
+
+        if pool.finished(task):
+            task.check._eval_results = pool.pop_results(task)
+            return False
+
+        if not pool.can_fork():
+            return False
+
+        # The worker does not run the pipeline hooks, so that they run only
+        # once; the evaluation stops at the first stage preceded by hooks,
+        # since these could change the expressions to be evaluated
+        check = task.check
+        stages = []
+        for stage, skip in (('sanity', self.skip_sanity_check),
+                            ('performance', self.skip_performance_check)):
+            if skip:
+                continue
+
+            if _has_hooks(check, f'pre_{stage}'):
+                break
+
+            stages.append(stage)
+            if _has_hooks(check, f'post_{stage}'):
+                break
+
+        if not stages:
+            return False
+
+        # If there is no free worker, the task will retry in the next pass
+        pool.submit(task, stages)
+        return True
+
     def _advance_completing(self, task):
+        if self._offload_evaluation(task):
+            return 0
+
         try:
             if not self.skip_sanity_check:
                 task.sanity()
@@ -552,33 +1296,37 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
             if not self.skip_performance_check:
                 task.performance()
 
+            task.check._eval_results = None
             task.finalize()
             self._retired_tasks.append(task)
             self._current_tasks.remove(task)
             return 1
         except TaskExit:
+            task.check._eval_results = None
             self._current_tasks.remove(task)
             return 1
 
     def deps_failed(self, task):
-        # NOTE: Restored dependencies are not in the task_index
-        return any(self._task_index[c].failed
-                   for c in task.testcase.deps if c in self._task_index)
+        return self._deps_failed[task] > 0
 
     def deps_succeeded(self, task):
-        # NOTE: Restored dependencies are not in the task_index
-        return all(self._task_index[c].succeeded
-                   for c in task.testcase.deps if c in self._task_index)
+        return (self._deps_pending[task] == 0 and
+                self._deps_failed[task] == 0 and
+                self._deps_skipped[task] == 0)
 
     def deps_skipped(self, task):
-        # NOTE: Restored dependencies are not in the task_index
-        return any(self._task_index[c].skipped
-                   for c in task.testcase.deps if c in self._task_index)
+        return self._deps_skipped[task] > 0
 
     def _abortall(self, cause):
         '''Mark all tests as failures'''
 
         getlogger().debug2(f'Aborting all tasks due to {type(cause).__name__}')
+        if self._eval_pool:
+            self._eval_pool.shutdown()
+
+        if self._cleanup_pool:
+            self._cleanup_pool.shutdown(cancel=True)
+
         for task in self._current_tasks:
             with contextlib.suppress(FailureLimitError):
                 task.abort(cause)
@@ -601,6 +1349,7 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         self._pollctl.reset_snooze_time()
 
     def on_task_skip(self, task):
+        self._notify_dependents(task)
         msg = str(task.exc_info[1])
         self.printer.status('SKIP', msg, just='right')
 
@@ -609,6 +1358,7 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         self.printer.status('ABORT', msg, just='right')
 
     def on_task_failure(self, task):
+        self._notify_dependents(task)
         self._num_failed_tasks += 1
         msg = f'{task.info()}'
         if task.failed_stage == 'cleanup':
@@ -632,6 +1382,7 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
             )
 
     def on_task_success(self, task):
+        self._notify_dependents(task)
         msg = f'{task.info()}'
         self.printer.status('OK', msg, just='right')
         _print_perf(task)
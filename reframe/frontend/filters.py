@@ -4,9 +4,10 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import re
+import types
 
 from reframe.core.exceptions import ReframeError
-from reframe.core.runtime import runtime
+from reframe.core.runtime import runtime, valid_sysenv_comb
 
 
 def re_compile(patt):
@@ -108,6 +109,21 @@ def have_maintainer(patt):
     return _fn
 
 
+def have_valid_sysenv():
+    def _fn(case):
+        return bool(valid_sysenv_comb(case.check.valid_systems,
+                                      case.check.valid_prog_environs))
+
+    return _fn
+
+
+def is_not_fixture():
+    def _fn(case):
+        return not case.check.is_fixture()
+
+    return _fn
+
+
 def have_gpu_only():
     return validates('num_gpus_per_node')
 
@@ -124,3 +140,17 @@ def validates(expr):
             raise ReframeError(f'invalid expression `{expr}`') from err
 
     return _fn
+
+
+def of_tests(*case_filters):
+    '''Combine test case filters into a filter of tests.
+
+    A test passes the returned filter if its test cases would pass all of
+    ``case_filters``; these must look only into the test of a test case.
+    '''
+
+    def _fn(check):
+        case = types.SimpleNamespace(check=check)
+        return all(fn(case) for fn in case_filters)
+
+    return _fn
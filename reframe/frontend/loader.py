@@ -8,12 +8,22 @@
 #
 
 import ast
+import concurrent.futures
 import contextlib
+import functools
+import hashlib
+import importlib.util
 import inspect
+import itertools
+import json
 import os
+import py_compile
 import sys
+import tempfile
 import traceback
 
+import reframe
+import reframe.core.runtime as runtime
 import reframe.utility as util
 import reframe.utility.osext as osext
 from reframe.core.exceptions import NameConflictError, is_severe, what
@@ -54,9 +64,226 @@ class RegressionCheckValidator(ast.NodeVisitor):
                     break
 
 
+def _is_test_file(filename):
+    with open(filename, 'r') as f:
+        source_tree = ast.parse(f.read(), filename)
+
+    validator = RegressionCheckValidator()
+    validator.visit(source_tree)
+    return validator.valid
+
+
+def _prepare_test_file(filename):
+    '''Validate a test file and byte-compile it if needed.
+
+    This is run by the worker processes of the loader, so that the test files
+    are imported from their cached bytecode in the main process.
+    '''
+
+    if not _is_test_file(filename):
+        return False
+
+    if sys.dont_write_bytecode:
+        return True
+
+    cfile = importlib.util.cache_from_source(filename)
+    with contextlib.suppress(OSError):
+        if os.stat(cfile).st_mtime >= os.stat(filename).st_mtime:
+            return True
+
+    # Failing to write the bytecode only means that it will be compiled
+    # during the import
+    with contextlib.suppress(OSError, py_compile.PyCompileError):
+        py_compile.compile(filename, cfile, doraise=True)
+
+    return True
+
+
+def _module_files(name, dirname, level=0):
+    '''Return the files of module ``name`` and of its parent packages, as
+    imported from a file in ``dirname``, if they are found there.'''
+
+    basedir = dirname
+    for _ in range(level - 1):
+        basedir = os.path.dirname(basedir)
+
+    ret = []
+    path = basedir
+    for part in name.split('.'):
+        path = os.path.join(path, part)
+        for f in (f'{path}.py', os.path.join(path, '__init__.py')):
+            if os.path.isfile(f):
+                ret.append(f)
+                break
+        else:
+            break
+
+    return ret
+
+
+def _local_imports(filename):
+    '''Return the files of the modules that ``filename`` imports from its
+    own directory, as well as the files of the modules these import in turn.
+
+    The imports are found statically, so that modules imported dynamically
+    are not detected.
+    '''
+
+    ret = set()
+    to_visit = [filename]
+    while to_visit:
+        path = to_visit.pop()
+        try:
+            with open(path) as fp:
+                tree = ast.parse(fp.read(), path)
+        except (OSError, SyntaxError, ValueError):
+            continue
+
+        dirname = os.path.dirname(path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [(alias.name, 0) for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                prefix = f'{node.module}.' if node.module else ''
+                names = [(prefix + alias.name, node.level)
+                         for alias in node.names]
+                if node.module:
+                    names.append((node.module, node.level))
+            else:
+                continue
+
+            for name, level in names:
+                for f in _module_files(name, dirname, level):
+                    if f != filename and f not in ret:
+                        ret.add(f)
+                        to_visit.append(f)
+
+    return sorted(ret)
+
+
+class _CachedTest:
+    '''A test as recorded in the test cache.
+
+    It provides the attributes of the test that the test filters need, so
+    that the tests can be selected without loading them.
+    '''
+
+    def __init__(self, info):
+        self.unique_name = info['unique_name']
+        self.display_name = info['display_name']
+        self.hashcode = info['hashcode']
+        self.variant_num = info['variant_num']
+        self.tags = set(info['tags'])
+        self.maintainers = info['maintainers']
+        self.valid_systems = info['valid_systems']
+        self.valid_prog_environs = info['valid_prog_environs']
+        self.deps = info['deps']
+        self._is_fixture = info['is_fixture']
+
+    @staticmethod
+    def info(check):
+        return {
+            'class_name': type(check).__name__,
+            'unique_name': check.unique_name,
+            'display_name': check.display_name,
+            'hashcode': check.hashcode,
+            'variant_num': check.variant_num,
+            'tags': sorted(check.tags),
+            'maintainers': list(check.maintainers),
+            'valid_systems': list(check.valid_systems),
+            'valid_prog_environs': list(check.valid_prog_environs),
+            'deps': [name for name, _ in check.user_deps()],
+            'is_fixture': check.is_fixture()
+        }
+
+    def is_fixture(self):
+        return self._is_fixture
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_test_type(class_name):
+    # The filters match the test variants against the test class name
+    return type(class_name, (_CachedTest,), {})
+
+
+class _TestCache:
+    '''Persistent cache of the tests defined in each test file.
+
+    An entry is valid as long as the test file and the modules it imports
+    from its directory are not modified and the cache key, which encodes
+    everything else that may affect the instantiation of the tests, does not
+    change.
+    '''
+
+    def __init__(self, filename, key):
+        self._filename = filename
+        self._key = key
+        try:
+            with open(filename) as fp:
+                self._entries = json.load(fp)['files']
+        except FileNotFoundError:
+            self._entries = {}
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            getlogger().warning(
+                f'could not read the test cache {filename!r}: {err}; '
+                f'ignoring it'
+            )
+            self._entries = {}
+
+    @staticmethod
+    def _file_stamp(filename):
+        st = os.stat(filename)
+        return [st.st_mtime_ns, st.st_size]
+
+    def _stamp(self, filename):
+        return [*self._file_stamp(filename), self._key]
+
+    def tests(self, filename):
+        '''Return the cached tests of ``filename`` or :obj:`None` if there
+        is no valid entry.'''
+
+        try:
+            entry = self._entries[filename]
+            if entry['stamp'] != self._stamp(filename):
+                return None
+
+            for path, *stamp in entry['imports']:
+                if stamp != self._file_stamp(path):
+                    return None
+        except (KeyError, OSError):
+            return None
+
+        return [_cached_test_type(info['class_name'])(info)
+                for info in entry['tests']]
+
+    def update(self, filename, checks):
+        with contextlib.suppress(OSError):
+            self._entries[filename] = {
+                'stamp': self._stamp(filename),
+                'imports': [[path, *self._file_stamp(path)]
+                            for path in _local_imports(filename)],
+                'tests': [_CachedTest.info(c) for c in checks]
+            }
+
+    def save(self):
+        dirname = os.path.dirname(self._filename) or '.'
+        try:
+            os.makedirs(dirname, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', dir=dirname,
+                                             delete=False) as fp:
+                json.dump({'files': self._entries}, fp)
+
+            os.replace(fp.name, self._filename)
+        except OSError as err:
+            getlogger().warning(
+                f'could not save the test cache {self._filename!r}: {err}'
+            )
+
+
 class RegressionCheckLoader:
     def __init__(self, load_path, recurse=False, external_vars=None,
-                 skip_system_check=False, skip_prgenv_check=False):
+                 skip_system_check=False, skip_prgenv_check=False,
+                 max_workers=0, cache_file=None):
         # Expand any environment variables and symlinks
         load_path = [os.path.realpath(osext.expandvars(p)) for p in load_path]
         self._load_path = osext.unique_abs_paths(load_path, recurse)
@@ -71,6 +298,15 @@ class RegressionCheckLoader:
         self._skip_system_check = bool(skip_system_check)
         self._skip_prgenv_check = bool(skip_prgenv_check)
 
+        # Number of worker processes for validating the test files
+        self._max_workers = max_workers
+
+        # File of the test cache; no cache is used if empty
+        self._cache_file = cache_file
+
+        # Files that could not be imported
+        self._failed_files = set()
+
     def unset_vars(self, testname):
         return self._unset_vars.get(testname, [])
 
@@ -88,19 +324,18 @@ class RegressionCheckLoader:
     def _validate_source(self, filename):
         '''Check if `filename` is a valid Reframe source file.'''
 
-        with open(filename, 'r') as f:
-            source_tree = ast.parse(f.read(), filename)
+        valid = _is_test_file(filename)
+        self._log_validation(filename, valid)
+        return valid
 
+    def _log_validation(self, filename, valid):
         msg = f'Validating {filename!r}: '
-        validator = RegressionCheckValidator()
-        validator.visit(source_tree)
-        if validator.valid:
+        if valid:
             msg += 'OK'
         else:
             msg += 'not a test file'
 
         getlogger().debug(msg)
-        return validator.valid
 
     def _validate_check(self, check):
         import reframe.utility as util
@@ -191,6 +426,9 @@ class RegressionCheckLoader:
         if not self._validate_source(filename):
             return []
 
+        return self._import_file(filename, force)
+
+    def _import_file(self, filename, force=False):
         try:
             dirname = os.path.dirname(filename)
             with osext.change_dir(dirname):
@@ -206,6 +444,7 @@ class RegressionCheckLoader:
                         util.import_module_from_file(filename, force, parent)
                     )
         except Exception:
+            self._failed_files.add(filename)
             exc_info = sys.exc_info()
             if not is_severe(*exc_info):
                 # Simply skip the file in this case
@@ -218,31 +457,121 @@ class RegressionCheckLoader:
             else:
                 raise
 
-    def load_from_dir(self, dirname, recurse=False, force=False):
-        checks = []
+    def _test_files(self, dirname, recurse=False):
         for entry in os.scandir(dirname):
             if recurse and entry.is_dir():
-                checks += self.load_from_dir(entry.path, recurse, force)
+                yield from self._test_files(entry.path, recurse)
 
             if (entry.name.startswith('.') or
                 not entry.name.endswith('.py') or
                 not entry.is_file()):
                 continue
 
-            checks += self.load_from_file(entry.path, force)
+            yield entry.path
+
+    def load_from_dir(self, dirname, recurse=False, force=False):
+        checks = []
+        for filename in self._test_files(dirname, recurse):
+            checks += self.load_from_file(filename, force)
 
         return checks
 
+    def _load_files_parallel(self, filenames, force=False):
+        '''Load the tests from ``filenames`` validating the files in
+        parallel.
+
+        The files are imported in the main process in the order they are
+        passed, as soon as they have been validated.
+        '''
+
+        if not filenames:
+            return
+
+        chunksize = max(1, len(filenames) // (4*self._max_workers))
+        with concurrent.futures.ProcessPoolExecutor(
+                self._max_workers) as executor:
+            results = executor.map(_prepare_test_file, filenames,
+                                   chunksize=chunksize)
+            for filename, valid in zip(filenames, results):
+                self._log_validation(filename, valid)
+                if valid:
+                    yield filename, self._import_file(filename, force)
+                else:
+                    yield filename, []
+
+    def _load_files(self, filenames, force=False):
+        '''Load the tests from ``filenames`` and yield them per file.'''
+
+        if self._max_workers > 0:
+            yield from self._load_files_parallel(filenames, force)
+        else:
+            for filename in filenames:
+                yield filename, self.load_from_file(filename, force)
+
+    def _cache_key(self):
+        rt = runtime.runtime()
+        config_files = []
+        for src in rt.site_config.sources:
+            with contextlib.suppress(OSError):
+                config_files.append([src, os.stat(src).st_mtime_ns])
+
+        key = [reframe.VERSION, rt.system.name, config_files,
+               sorted(self._external_vars.items()),
+               self._skip_system_check, self._skip_prgenv_check]
+        return hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+
+    def _files_to_load(self, cached_tests, checks, select):
+        '''Return the cached files that define the tests selected by
+        ``select`` along with the files of their dependencies.
+
+        :arg cached_tests: The cached tests per file.
+        :arg checks: The already loaded tests per file.
+        '''
+
+        file_of = {}
+        for filename, tests in itertools.chain(checks.items(),
+                                               cached_tests.items()):
+            for t in tests:
+                file_of.setdefault(t.unique_name, filename)
+
+        # The dependencies of all the loaded tests must be loaded, too
+        selected = set()
+        to_visit = [c for tests in checks.values() for c in tests]
+        for filename, tests in cached_tests.items():
+            if any(select(t) for t in tests):
+                selected.add(filename)
+                to_visit += tests
+
+        while to_visit:
+            t = to_visit.pop()
+            if isinstance(t, _CachedTest):
+                deps = t.deps
+            else:
+                deps = [name for name, _ in t.user_deps()]
+
+            for name in deps:
+                filename = file_of.get(name)
+                if filename in cached_tests and filename not in selected:
+                    selected.add(filename)
+                    to_visit += cached_tests[filename]
+
+        return selected
+
     @time_function
-    def load_all(self, force=False):
+    def load_all(self, force=False, select=None):
         '''Load all checks in self._load_path.
 
         If a prefix exists, it will be prepended to each path.
 
         :arg force: Force reloading of test files.
+        :arg select: A callable selecting the tests to load. If the test
+            cache is used, only the test files that define the selected tests
+            and their dependencies are loaded, and the callable is passed the
+            tests as recorded in the cache. If :obj:`None`, all the tests are
+            loaded.
         :returns: The list of loaded tests.
         '''
-        checks = []
+        filenames = []
         for d in self._load_path:
             getlogger().debug(f'Looking for tests in {d!r}')
             if not os.path.exists(d):
@@ -250,8 +579,45 @@ class RegressionCheckLoader:
                 continue
 
             if os.path.isdir(d):
-                checks += self.load_from_dir(d, self._recurse, force)
+                filenames += self._test_files(d, self._recurse)
             else:
-                checks += self.load_from_file(d, force)
+                filenames.append(d)
+
+        filenames = [os.path.abspath(f) for f in filenames]
+        if not self._cache_file:
+            return [c for _, tests in self._load_files(filenames, force)
+                    for c in tests]
+
+        cache = _TestCache(self._cache_file, self._cache_key())
+        cached_tests = {}
+        for filename in filenames:
+            tests = cache.tests(filename)
+            if tests is not None:
+                cached_tests[filename] = tests
+
+        checks = {}
+
+        def _load(filenames):
+            for filename, tests in self._load_files(filenames, force):
+                checks[filename] = tests
+                if filename not in self._failed_files:
+                    cache.update(filename, tests)
+
+        if select is None:
+            _load(filenames)
+        else:
+            # The files that are not cached are loaded first; the cached
+            # files are loaded only if they define selected tests or
+            # dependencies of the loaded tests
+            _load([f for f in filenames if f not in cached_tests])
+            selected = self._files_to_load(cached_tests, checks, select)
+            getlogger().debug(
+                f'Loading {len(selected)} out of {len(cached_tests)} '
+                f'cached test file(s)'
+            )
+            _load([f for f in filenames if f in selected])
 
-        return checks
+        cache.save()
+
+        # The tests are returned in the order their files are found
+        return [c for f in filenames for c in checks.get(f, [])]
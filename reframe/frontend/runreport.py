@@ -5,18 +5,22 @@
 
 import decimal
 import functools
+import gzip
+import hashlib
+import io
 import json
-import jsonschema
-import lxml.etree as etree
 import os
 import re
 
 import reframe as rfm
 import reframe.core.exceptions as errors
+import reframe.core.runtime as runtime
 import reframe.utility.jsonext as jsonext
 import reframe.utility.osext as osext
 from reframe.core.logging import getlogger
 from reframe.core.warnings import suppress_deprecations
+from reframe.frontend.executors import TaskEventListener
+from reframe.frontend.statistics import run_counters, testcase_record
 
 # The schema data version
 # Major version bumps are expected to break the validation of previous schemas
@@ -25,25 +29,140 @@ DATA_VERSION = '3.1'
 _SCHEMA = os.path.join(rfm.INSTALL_PREFIX, 'reframe/schemas/runreport.json')
 
 
+# Compression level of gzip-compressed reports; higher levels compress
+# reports only slightly better, but they are much slower
+_GZIP_LEVEL = 6
+
+
+def _is_compressed(filename):
+    return os.fspath(filename).endswith('.gz')
+
+
+def _open_report(filename, compressed):
+    if compressed:
+        return gzip.open(filename, 'wt', compresslevel=_GZIP_LEVEL)
+
+    return open(filename, 'w')
+
+
+class _ChecksumWriter:
+    '''Write a JSON report computing the checksum of its data.
+
+    The checksum is written as the last field of the report and it is
+    computed over all the data written before it.
+    '''
+
+    def __init__(self, fp, indent):
+        self._fp = fp
+        self._indent = indent
+        self._hash = hashlib.sha256()
+
+    def write(self, data):
+        self._hash.update(data.encode())
+        self._fp.write(data)
+
+    def close(self):
+        if self._indent:
+            sep, nl, pad = ': ', '\n', self._indent*' '
+        else:
+            sep, nl, pad = ':', '', ''
+
+        self._fp.write(f',{nl}{pad}"checksum"{sep}'
+                       f'"{self._hash.hexdigest()}"{nl}}}{nl}')
+
+
+def _verify_checksum(data, report):
+    '''Check if the report data match the checksum stored in the report.'''
+
+    checksum = report.get('checksum')
+    if not isinstance(checksum, str):
+        return False
+
+    pos = data.rfind(b',', 0, data.rfind(b'"checksum"'))
+    return pos >= 0 and hashlib.sha256(data[:pos]).hexdigest() == checksum
+
+
+@functools.lru_cache(maxsize=None)
+def _validators():
+    '''Return the validators of the run report and of its test cases.
+
+    The report validator does not validate the test cases of the report,
+    since this can take a lot of time for large reports. Test cases are
+    validated only when they are used.
+    '''
+
+    import jsonschema
+
+    with open(_SCHEMA) as fp:
+        schema = json.load(fp)
+
+    validator_cls = jsonschema.validators.validator_for(schema)
+    testcase_validator = validator_cls(
+        {**schema['defs']['testcase_type'], 'defs': schema['defs']}
+    )
+    props = schema['properties']
+    props['restored_cases']['items'] = {'type': 'object'}
+    props['runs']['items']['properties']['testcases']['items'] = {
+        'type': 'object'
+    }
+    return validator_cls(schema), testcase_validator
+
+
+def _invalid_report_error(report, filename):
+    try:
+        found_ver = report['session_info']['data_version']
+    except (KeyError, TypeError):
+        found_ver = 'n/a'
+
+    return errors.ReframeError(
+        f'invalid report {filename!r} '
+        f'(required data version: {DATA_VERSION}), found: {found_ver})'
+    )
+
+
 class _RunReport:
     '''A wrapper to the run report providing some additional functionality'''
 
-    def __init__(self, report):
+    def __init__(self, report, filename=None, trusted=False):
         self._report = report
+        self._filename = filename
         self._fallbacks = []    # fallback reports
 
+        # Ids of the test cases that have been validated; if the report is
+        # trusted, its test cases are not validated
+        self._trusted = trusted
+        self._validated = set()
+
         # Index all runs by test case; if a test case has run multiple times,
         # only the last time will be indexed
         self._cases_index = {}
-        for run in self._report['runs']:
-            for tc in run['testcases']:
+        try:
+            for run in self._report['runs']:
+                for tc in run['testcases']:
+                    c, p, e = (tc['unique_name'], tc['system'],
+                               tc['environment'])
+                    self._cases_index[c, p, e] = tc
+
+            # Index also the restored cases
+            for tc in self._report['restored_cases']:
                 c, p, e = tc['unique_name'], tc['system'], tc['environment']
                 self._cases_index[c, p, e] = tc
+        except (KeyError, TypeError) as e:
+            raise _invalid_report_error(report, filename) from e
 
-        # Index also the restored cases
-        for tc in self._report['restored_cases']:
-            c, p, e = tc['unique_name'], tc['system'], tc['environment']
-            self._cases_index[c, p, e] = tc
+    def _validate_case(self, tc):
+        if self._trusted or id(tc) in self._validated:
+            return tc
+
+        import jsonschema
+
+        try:
+            _validators()[1].validate(tc)
+        except jsonschema.ValidationError as e:
+            raise _invalid_report_error(self._report, self._filename) from e
+
+        self._validated.add(id(tc))
+        return tc
 
     def __getitem__(self, key):
         return self._report[key]
@@ -62,7 +181,7 @@ class _RunReport:
             returned = set()
 
         for tc in self._report['runs'][-1]['testcases']:
-            val = tc[prop]
+            val = self._validate_case(tc)[prop]
             if unique and val in returned:
                 continue
 
@@ -80,12 +199,34 @@ class _RunReport:
     def case(self, check, part, env):
         c, p, e = check.unique_name, part.fullname, env.name
         ret = self._cases_index.get((c, p, e))
-        if ret is None:
-            # Look up the case in the fallback reports
-            for rpt in self._fallbacks:
-                ret = rpt._cases_index.get((c, p, e))
-                if ret is not None:
-                    break
+        if ret is not None:
+            return self._validate_case(ret)
+
+        # Look up the case in the fallback reports
+        for rpt in self._fallbacks:
+            ret = rpt._cases_index.get((c, p, e))
+            if ret is not None:
+                return rpt._validate_case(ret)
+
+        return None
+
+    def durations(self):
+        '''Return the total time of the test cases of the report.
+
+        The durations are indexed by ``(unique_name, system, environment)``
+        tuples. Test cases without timing information are ignored.
+        '''
+
+        ret = {}
+        for rpt in reversed(self._fallbacks):
+            ret.update(rpt.durations())
+
+        for key, tc in self._cases_index.items():
+            # Only the `time_total` field is used, so we simply check its
+            # type instead of validating the whole test case
+            time_total = tc.get('time_total')
+            if isinstance(time_total, (int, float)):
+                ret[key] = time_total
 
         return ret
 
@@ -140,35 +281,81 @@ def next_report_filename(filepatt, new=True):
     return filepatt.format(sessionid=new_id)
 
 
+def _load_journal(fp):
+    # Load the report of an unfinished session from the test case records
+    # appended by the `RunReportWriter`
+    header = json.loads(fp.readline())
+    if not isinstance(header, dict) or header.keys() != {'session_info'}:
+        raise ValueError('not a run report journal')
+
+    runs = {0: {}}
+    for line in fp:
+        try:
+            rec = json.loads(line)
+        except json.JSONDecodeError:
+            if fp.readline():
+                raise
+
+            # The session was interrupted while writing the last record
+            break
+
+        tc = rec['testcase']
+        key = (tc['unique_name'], tc['system'], tc['environment'])
+        runs.setdefault(rec['runid'], {})[key] = tc
+
+    report = {
+        'session_info': header['session_info'],
+        'runs': [],
+        'restored_cases': []
+    }
+    for runid, testcases in sorted(runs.items()):
+        report['runs'].append({
+            **run_counters(tc['result'] for tc in testcases.values()),
+            'runid': runid,
+            'testcases': list(testcases.values())
+        })
+
+    report['session_info'].update({
+        'num_cases': report['runs'][0]['num_cases'],
+        'num_failures': report['runs'][-1]['num_failures']
+    })
+    return report
+
+
 def _load_report(filename):
     try:
-        with open(filename) as fp:
-            report = json.load(fp)
-    except OSError as e:
+        with open(filename, 'rb') as fp:
+            data = fp.read()
+
+        # Reports are detected as compressed from their content, so that
+        # they can be loaded regardless of their name
+        if data[:2] == b'\x1f\x8b':
+            data = gzip.decompress(data)
+    except (OSError, EOFError) as e:
         raise errors.ReframeError(
             f'failed to load report file {filename!r}') from e
+
+    try:
+        report = json.loads(data)
     except json.JSONDecodeError as e:
-        raise errors.ReframeError(
-            f'report file {filename!r} is not a valid JSON file') from e
+        # This may be the report of a session that did not finish
+        try:
+            report = _load_journal(io.BytesIO(data))
+        except (json.JSONDecodeError, ValueError, KeyError, TypeError):
+            raise errors.ReframeError(
+                f'report file {filename!r} is not a valid JSON file'
+            ) from e
 
-    # Validate the report
-    with open(_SCHEMA) as fp:
-        schema = json.load(fp)
+    # Validate the report; its test cases are validated when used, unless
+    # the report has not been modified since ReFrame generated it
+    import jsonschema
 
     try:
-        jsonschema.validate(report, schema)
+        _validators()[0].validate(report)
     except jsonschema.ValidationError as e:
-        try:
-            found_ver = report['session_info']['data_version']
-        except KeyError:
-            found_ver = 'n/a'
+        raise _invalid_report_error(report, filename) from e
 
-        raise errors.ReframeError(
-            f'invalid report {filename!r} '
-            f'(required data version: {DATA_VERSION}), found: {found_ver})'
-        ) from e
-
-    return _RunReport(report)
+    return _RunReport(report, filename, _verify_checksum(data, report))
 
 
 def load_report(*filenames):
@@ -182,39 +369,231 @@ def load_report(*filenames):
     return rpt
 
 
-def write_report(report, filename, compress=False, link_to_last=False):
-    with open(filename, 'w') as fp:
-        if compress:
-            jsonext.dump(report, fp)
+def _link_to_last(filename):
+    # Add a symlink to the latest report
+    basedir = os.path.dirname(filename)
+    with osext.change_dir(basedir):
+        link_name = 'latest.json'
+        if _is_compressed(filename):
+            link_name += '.gz'
+
+        create_symlink = functools.partial(
+            os.symlink, os.path.basename(filename), link_name
+        )
+        if not os.path.exists(link_name):
+            create_symlink()
         else:
-            jsonext.dump(report, fp, indent=2)
-            fp.write('\n')
+            if os.path.islink(link_name):
+                os.remove(link_name)
+                create_symlink()
+            else:
+                getlogger().warning('could not create a symlink '
+                                    'to the latest report file: '
+                                    'path exists and is not a symlink')
+
 
-        if not link_to_last:
+def write_report(report, filename, compress=False, link_to_last=False):
+    # Any checksum of a previously loaded report is replaced by the new one
+    report = {k: v for k, v in report.items() if k != 'checksum'}
+    indent = None if compress else 2
+    with _open_report(filename, _is_compressed(filename)) as fp:
+        writer = _ChecksumWriter(fp, indent)
+
+        # Leave out the closing brace; the writer adds it after the checksum
+        writer.write(jsonext.dumps(report, indent=indent)[:-1].rstrip())
+        writer.close()
+
+    if link_to_last:
+        _link_to_last(filename)
+
+
+class RunReportWriter(TaskEventListener):
+    '''Write the run report of a session incrementally.
+
+    The record of each test case is appended to the report file as a single
+    line of JSON as soon as the test case finishes, so that the report of a
+    session that did not finish can still be loaded. When the session
+    finishes, :func:`finalize` rewrites the report file in the standard
+    report format, without loading all the records in memory.
+
+    If ``filename`` ends in ``.gz``, the final report is compressed with
+    gzip. The records of the test cases are never compressed.
+
+    If ``stats`` is given, the test cases of each run are written to the
+    final report in the order of its tasks, as with
+    :func:`TestStats.json`. Otherwise, they are written in the order they
+    finished.
+
+    If a record cannot be written, e.g., because the disk is full, a warning
+    is issued and no further records are written; :func:`finalize` then
+    raises the original error.
+    '''
+
+    def __init__(self, filename, session_info, stats=None):
+        self._filename = filename
+        self._stats = stats
+        self._journal = open(filename, 'wb+')
+
+        # The error that stopped the journaling of the test cases
+        self._error = None
+
+        # Offsets of the test case records in the report file and their
+        # results indexed by run and test case; a test case may be recorded
+        # multiple times in a run, e.g., if its cleanup fails after it has
+        # succeeded, in which case its last record is used
+        self._index = {0: {}}
+        self._append({'session_info': session_info})
+
+    def _append(self, record):
+        offset = self._journal.tell()
+        self._journal.write(jsonext.dumps(record).encode() + b'\n')
+        self._journal.flush()
+        return offset
+
+    def _add_testcase(self, task):
+        if self._error:
             return
 
-        # Add a symlink to the latest report
-        basedir = os.path.dirname(filename)
-        with osext.change_dir(basedir):
-            link_name = 'latest.json'
-            create_symlink = functools.partial(
-                os.symlink, os.path.basename(filename), link_name
+        tc = testcase_record(task)
+        runid = runtime.runtime().current_run
+        key = (tc['unique_name'], tc['system'], tc['environment'])
+        try:
+            offset = self._append({'runid': runid, 'testcase': tc})
+        except OSError as e:
+            getlogger().warning(
+                f'failed to write to report {self._filename!r}: {e}; '
+                f'no more test cases will be written'
             )
-            if not os.path.exists(link_name):
-                create_symlink()
-            else:
-                if os.path.islink(link_name):
-                    os.remove(link_name)
-                    create_symlink()
-                else:
-                    getlogger().warning('could not create a symlink '
-                                        'to the latest report file: '
-                                        'path exists and is not a symlink')
+            self._error = e
+        else:
+            self._index.setdefault(runid, {})[key] = (offset, tc['result'])
+
+    def _testcases(self, runid):
+        '''Return the records of the test cases of a run in task order.'''
+
+        records = dict(self._index[runid])
+        if self._stats is None:
+            return list(records.values())
+
+        ret = []
+        for t in self._stats.tasks(runid):
+            key = (t.check.unique_name,
+                   t.testcase.partition.fullname, t.testcase.environ.name)
+            if key in records:
+                ret.append(records.pop(key))
+
+        # Any records of test cases not known to `stats` come last
+        return ret + list(records.values())
+
+    def on_task_setup(self, task):
+        pass
+
+    def on_task_run(self, task):
+        pass
+
+    def on_task_compile(self, task):
+        pass
+
+    def on_task_exit(self, task):
+        pass
+
+    def on_task_compile_exit(self, task):
+        pass
+
+    def on_task_skip(self, task):
+        self._add_testcase(task)
+
+    def on_task_failure(self, task):
+        self._add_testcase(task)
+
+    def on_task_abort(self, task):
+        self._add_testcase(task)
+
+    def on_task_success(self, task):
+        self._add_testcase(task)
+
+    def finalize(self, session_info, restored_cases,
+                 compress=False, link_to_last=False):
+        '''Write the final report.
+
+        The ``num_cases`` and ``num_failures`` fields of ``session_info`` are
+        updated from the recorded test cases.
+
+        :raises OSError: if the test cases could not be recorded during the
+            session or the final report cannot be written.
+        '''
+
+        if self._error:
+            self._journal.close()
+            raise self._error
+
+        indent = None if compress else 2
+        nl = '\n' if indent else ''
+        sep = ': ' if indent else ':'
+
+        def _newline(level):
+            return nl + level*(indent or 0)*' '
+
+        def _dumps(obj, level):
+            ret = jsonext.dumps(obj, indent=indent)
+            if indent:
+                # Indent the object to the nesting level it is written at
+                ret = ret.replace('\n', _newline(level))
+
+            return ret
+
+        def _write_testcases(fp, records):
+            fp.write('[')
+            for i, (offset, _) in enumerate(records):
+                self._journal.seek(offset)
+                tc = json.loads(self._journal.readline())['testcase']
+                fp.write((',' if i else '') + _newline(4) + _dumps(tc, 4))
+
+            fp.write((_newline(3) if records else '') + ']')
+
+        runs = []
+        for runid, testcases in sorted(self._index.items()):
+            runs.append({
+                **run_counters(result for _, result in testcases.values()),
+                'runid': runid
+            })
+
+        session_info.update({
+            'num_cases': runs[0]['num_cases'],
+            'num_failures': runs[-1]['num_failures']
+        })
+        tmp_filename = f'{self._filename}.tmp'
+        with _open_report(tmp_filename,
+                          _is_compressed(self._filename)) as report_fp:
+            fp = _ChecksumWriter(report_fp, indent)
+            fp.write('{' + _newline(1) + '"session_info"' + sep +
+                     _dumps(session_info, 1) + ',')
+            fp.write(_newline(1) + '"runs"' + sep + '[')
+            for i, run in enumerate(runs):
+                fp.write((',' if i else '') + _newline(2) + '{')
+                for key, val in run.items():
+                    fp.write(_newline(3) + f'"{key}"{sep}{val},')
+
+                fp.write(_newline(3) + '"testcases"' + sep)
+                _write_testcases(fp, self._testcases(run['runid']))
+                fp.write(_newline(2) + '}')
+
+            fp.write(_newline(1) + '],')
+            fp.write(_newline(1) + '"restored_cases"' + sep +
+                     _dumps(restored_cases, 1))
+            fp.close()
+
+        self._journal.close()
+        os.replace(tmp_filename, self._filename)
+        if link_to_last:
+            _link_to_last(self._filename)
 
 
 def junit_xml_report(json_report):
     '''Generate a JUnit report from a standard ReFrame JSON report.'''
 
+    import lxml.etree as etree
+
     xml_testsuites = etree.Element('testsuites')
     for run_id, rfm_run in enumerate(json_report['runs']):
         xml_testsuite = etree.SubElement(
@@ -266,6 +645,8 @@ def junit_xml_report(json_report):
 
 
 def junit_dump(xml, fp):
+    import lxml.etree as etree
+
     fp.write(
         etree.tostring(xml, encoding='utf8', pretty_print=True,
                        method='xml', xml_declaration=True).decode()
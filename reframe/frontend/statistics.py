@@ -20,6 +20,147 @@ def _getattr(obj, attr):
         return getattr(obj, attr)
 
 
+def testcase_record(task):
+    '''Return the run report record of a test case task.'''
+
+    check = task.check
+    partition = check.current_partition
+    entry = {
+        'build_stderr': None,
+        'build_stdout': None,
+        'dependencies_actual': [
+            (d.check.unique_name,
+             d.partition.fullname, d.environ.name)
+            for d in task.testcase.deps
+        ],
+        'dependencies_conceptual': [
+            d[0] for d in task.check.user_deps()
+        ],
+        'description': check.descr,
+        'display_name': check.display_name,
+        'environment': None,
+        'fail_phase': None,
+        'fail_reason': None,
+        'filename': inspect.getfile(type(check)),
+        'fixture': check.is_fixture(),
+        'hash': check.hashcode,
+        'jobid': None,
+        'job_stderr': None,
+        'job_stdout': None,
+        'maintainers': check.maintainers,
+        'name': check.name,
+        'nodelist': [],
+        'outputdir': None,
+        'perfvars': None,
+        'prefix': check.prefix,
+        'result': None,
+        'stagedir': check.stagedir,
+        'scheduler': None,
+        'system': check.current_system.name,
+        'tags': list(check.tags),
+        'time_compile': task.duration('compile_complete'),
+        'time_performance': task.duration('performance'),
+        'time_run': task.duration('run_complete'),
+        'time_sanity': task.duration('sanity'),
+        'time_setup': task.duration('setup'),
+        'time_total': task.duration('total'),
+        'unique_name': check.unique_name
+    }
+
+    # We take partition and environment from the test case and not
+    # from the check, since if the test fails before `setup()`,
+    # these are not set inside the check.
+    partition = task.testcase.partition
+    environ = task.testcase.environ
+    entry['system'] = partition.fullname
+    entry['scheduler'] = partition.scheduler.registered_name
+    entry['environment'] = environ.name
+    if check.job:
+        entry['jobid'] = str(check.job.jobid)
+        entry['job_stderr'] = check.stderr.evaluate()
+        entry['job_stdout'] = check.stdout.evaluate()
+        entry['nodelist'] = check.job.nodelist or []
+
+    if check.build_job:
+        entry['build_stderr'] = check.build_stderr.evaluate()
+        entry['build_stdout'] = check.build_stdout.evaluate()
+
+    if task.failed:
+        entry['result'] = 'failure'
+    elif task.aborted:
+        entry['result'] = 'aborted'
+
+    if task.failed or task.aborted:
+        entry['fail_phase'] = task.failed_stage
+        if task.exc_info is not None:
+            entry['fail_reason'] = errors.what(*task.exc_info)
+            entry['fail_info'] = {
+                'exc_type':  task.exc_info[0],
+                'exc_value': task.exc_info[1],
+                'traceback': task.exc_info[2]
+            }
+            entry['fail_severe'] = errors.is_severe(*task.exc_info)
+    elif task.skipped:
+        entry['result'] = 'skipped'
+    else:
+        entry['result'] = 'success'
+        entry['outputdir'] = check.outputdir
+
+    if check.perfvalues:
+        # Record performance variables
+        entry['perfvars'] = []
+        for key, ref in check.perfvalues.items():
+            var = key.split(':')[-1]
+            val, ref, lower, upper, unit = ref
+            entry['perfvars'].append({
+                'name': var,
+                'reference': ref,
+                'thres_lower': lower,
+                'thres_upper': upper,
+                'unit': unit,
+                'value': val
+            })
+
+    # Add any loggable variables and parameters
+    entry['check_vars'] = {}
+    test_cls = type(check)
+    for name, var in test_cls.var_space.items():
+        if var.is_loggable():
+            try:
+                entry['check_vars'][name] = _getattr(check, name)
+            except AttributeError:
+                entry['check_vars'][name] = '<undefined>'
+
+    entry['check_params'] = {}
+    test_cls = type(check)
+    for name, param in test_cls.param_space.items():
+        if param.is_loggable():
+            entry['check_params'][name] = _getattr(check, name)
+
+    return entry
+
+
+def run_counters(results):
+    '''Return the counters of a run given the results of its test cases.'''
+
+    counters = {
+        'num_cases': 0,
+        'num_failures': 0,
+        'num_aborted': 0,
+        'num_skipped': 0
+    }
+    for r in results:
+        counters['num_cases'] += 1
+        if r == 'failure':
+            counters['num_failures'] += 1
+        elif r == 'aborted':
+            counters['num_aborted'] += 1
+        elif r == 'skipped':
+            counters['num_skipped'] += 1
+
+    return counters
+
+
 class TestStats:
     '''Stores test case statistics.'''
 
@@ -102,135 +243,9 @@ class TestStats:
             return self._run_data
 
         for runid, run in enumerate(self._alltasks):
-            testcases = []
-            num_failures = 0
-            num_aborted = 0
-            num_skipped = 0
-            for t in run:
-                check = t.check
-                partition = check.current_partition
-                entry = {
-                    'build_stderr': None,
-                    'build_stdout': None,
-                    'dependencies_actual': [
-                        (d.check.unique_name,
-                         d.partition.fullname, d.environ.name)
-                        for d in t.testcase.deps
-                    ],
-                    'dependencies_conceptual': [
-                        d[0] for d in t.check.user_deps()
-                    ],
-                    'description': check.descr,
-                    'display_name': check.display_name,
-                    'environment': None,
-                    'fail_phase': None,
-                    'fail_reason': None,
-                    'filename': inspect.getfile(type(check)),
-                    'fixture': check.is_fixture(),
-                    'hash': check.hashcode,
-                    'jobid': None,
-                    'job_stderr': None,
-                    'job_stdout': None,
-                    'maintainers': check.maintainers,
-                    'name': check.name,
-                    'nodelist': [],
-                    'outputdir': None,
-                    'perfvars': None,
-                    'prefix': check.prefix,
-                    'result': None,
-                    'stagedir': check.stagedir,
-                    'scheduler': None,
-                    'system': check.current_system.name,
-                    'tags': list(check.tags),
-                    'time_compile': t.duration('compile_complete'),
-                    'time_performance': t.duration('performance'),
-                    'time_run': t.duration('run_complete'),
-                    'time_sanity': t.duration('sanity'),
-                    'time_setup': t.duration('setup'),
-                    'time_total': t.duration('total'),
-                    'unique_name': check.unique_name
-                }
-
-                # We take partition and environment from the test case and not
-                # from the check, since if the test fails before `setup()`,
-                # these are not set inside the check.
-                partition = t.testcase.partition
-                environ = t.testcase.environ
-                entry['system'] = partition.fullname
-                entry['scheduler'] = partition.scheduler.registered_name
-                entry['environment'] = environ.name
-                if check.job:
-                    entry['jobid'] = str(check.job.jobid)
-                    entry['job_stderr'] = check.stderr.evaluate()
-                    entry['job_stdout'] = check.stdout.evaluate()
-                    entry['nodelist'] = check.job.nodelist or []
-
-                if check.build_job:
-                    entry['build_stderr'] = check.build_stderr.evaluate()
-                    entry['build_stdout'] = check.build_stdout.evaluate()
-
-                if t.failed:
-                    num_failures += 1
-                    entry['result'] = 'failure'
-                elif t.aborted:
-                    entry['result'] = 'aborted'
-                    num_aborted += 1
-
-                if t.failed or t.aborted:
-                    entry['fail_phase'] = t.failed_stage
-                    if t.exc_info is not None:
-                        entry['fail_reason'] = errors.what(*t.exc_info)
-                        entry['fail_info'] = {
-                            'exc_type':  t.exc_info[0],
-                            'exc_value': t.exc_info[1],
-                            'traceback': t.exc_info[2]
-                        }
-                        entry['fail_severe'] = errors.is_severe(*t.exc_info)
-                elif t.skipped:
-                    entry['result'] = 'skipped'
-                    num_skipped += 1
-                else:
-                    entry['result'] = 'success'
-                    entry['outputdir'] = check.outputdir
-
-                if check.perfvalues:
-                    # Record performance variables
-                    entry['perfvars'] = []
-                    for key, ref in check.perfvalues.items():
-                        var = key.split(':')[-1]
-                        val, ref, lower, upper, unit = ref
-                        entry['perfvars'].append({
-                            'name': var,
-                            'reference': ref,
-                            'thres_lower': lower,
-                            'thres_upper': upper,
-                            'unit': unit,
-                            'value': val
-                        })
-
-                # Add any loggable variables and parameters
-                entry['check_vars'] = {}
-                test_cls = type(check)
-                for name, var in test_cls.var_space.items():
-                    if var.is_loggable():
-                        try:
-                            entry['check_vars'][name] = _getattr(check, name)
-                        except AttributeError:
-                            entry['check_vars'][name] = '<undefined>'
-
-                entry['check_params'] = {}
-                test_cls = type(check)
-                for name, param in test_cls.param_space.items():
-                    if param.is_loggable():
-                        entry['check_params'][name] = _getattr(check, name)
-
-                testcases.append(entry)
-
+            testcases = [testcase_record(t) for t in run]
             self._run_data.append({
-                'num_cases': len(run),
-                'num_failures': num_failures,
-                'num_aborted': num_aborted,
-                'num_skipped': num_skipped,
+                **run_counters(tc['result'] for tc in testcases),
                 'runid': runid,
                 'testcases': testcases
             })
@@ -304,16 +319,16 @@ class TestStats:
         printer.info(line_width * '=')
         printer.info('SUMMARY OF FAILURES')
 
-        run_report = self.json()
-        for run_no, run_info in enumerate(run_report, start=1):
-            if not global_stats and run_no != len(run_report):
+        # Generate the records of the failed test cases only
+        for run_no in range(1, self.num_runs + 1):
+            if not global_stats and run_no != self.num_runs:
                 continue
 
-            for r in run_info['testcases']:
-                if r['result'] in {'success', 'aborted', 'skipped'}:
+            for t in self.tasks(run_no - 1):
+                if not t.failed:
                     continue
 
-                _print_failure_info(r, run_no, len(run_report))
+                _print_failure_info(testcase_record(t), run_no, self.num_runs)
 
         printer.info(line_width * '-')
 
@@ -372,12 +387,12 @@ class TestStats:
 
         # Collect all the records from performance tests
         perf_records = {}
-        for run in self.json():
-            for tc in run['testcases']:
-                if tc['perfvars']:
-                    key = tc['unique_name']
-                    perf_records.setdefault(key, [])
-                    perf_records[key].append(tc)
+        for t in self.tasks(run=None):
+            if t.check.perfvalues:
+                tc = testcase_record(t)
+                key = tc['unique_name']
+                perf_records.setdefault(key, [])
+                perf_records[key].append(tc)
 
         if not perf_records:
             return ''
@@ -298,3 +298,33 @@ def cpuinfo():
 
     ret.update(topology)
     return ret
+
+
+def core_cpusets(topology=None):
+    '''Return the CPUs of each core that the current process may run on.
+
+    :arg topology: the topology of the host as returned by :func:`cpuinfo`.
+        If :obj:`None`, the topology of the host is detected.
+    :returns: a sorted list of lists with the CPU ids of each core or
+        :obj:`None` if the CPU affinity of processes cannot be set on this
+        platform. CPUs that do not appear in the topology are treated as
+        single-CPU cores.
+    '''
+
+    try:
+        allowed = os.sched_getaffinity(0)
+    except AttributeError:
+        return None
+
+    if topology is None:
+        topology = _sysfs_topo() if os.path.isdir('/sys') else {}
+
+    cores = []
+    for mask in topology.get('topology', {}).get('cores', []):
+        cpus = [c for c in _bits_from_str(mask) if c in allowed]
+        if cpus:
+            cores.append(cpus)
+
+    covered = {c for core in cores for c in core}
+    cores += [[c] for c in allowed - covered]
+    return sorted(cores)
@@ -8,9 +8,13 @@
 #
 
 import collections.abc
+import concurrent.futures
+import contextlib
 import errno
+import functools
 import getpass
 import grp
+import hashlib
 import os
 import re
 import semver
@@ -381,16 +385,42 @@ def osgroup():
 
 
 def copytree(src, dst, symlinks=False, ignore=None, copy_function=shutil.copy2,
-             ignore_dangling_symlinks=False, dirs_exist_ok=False):
+             ignore_dangling_symlinks=False, dirs_exist_ok=False,
+             max_workers=0):
     '''Compatibility version of :py:func:`shutil.copytree` for Python < 3.8.
 
     This function will automatically delegate to :py:func:`shutil.copytree`
     for Python versions >= 3.8.
+
+    If ``max_workers`` is greater than zero, the files are copied
+    concurrently by a pool of ``max_workers`` threads.
+
+    .. versionchanged:: 4.7
+       The ``max_workers`` argument is added.
     '''
     if src == os.path.commonpath([src, dst]):
         raise ValueError("cannot copy recursively the parent directory "
                          "`%s' into one of its descendants `%s'" % (src, dst))
 
+    if max_workers > 0:
+        # The directories are still created by the calling thread, so the
+        # files can be copied as soon as their directory is created
+        futures = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            def _submit_copy(src, dst, **kwargs):
+                futures.append(
+                    executor.submit(copy_function, src, dst, **kwargs)
+                )
+                return dst
+
+            ret = copytree(src, dst, symlinks, ignore, _submit_copy,
+                           ignore_dangling_symlinks, dirs_exist_ok)
+
+        for f in futures:
+            f.result()
+
+        return ret
+
     if sys.version_info[1] >= 8:
         return shutil.copytree(src, dst, symlinks, ignore, copy_function,
                                ignore_dangling_symlinks, dirs_exist_ok)
@@ -436,7 +466,8 @@ def copytree(src, dst, symlinks=False, ignore=None, copy_function=shutil.copy2,
 
 def copytree_virtual(src, dst, file_links=None,
                      symlinks=False, copy_function=shutil.copy2,
-                     ignore_dangling_symlinks=False, dirs_exist_ok=False):
+                     ignore_dangling_symlinks=False, dirs_exist_ok=False,
+                     max_workers=0):
     '''Copy ``src`` to ``dst``, but create symlinks for the files listed in
     ``file_links``.
 
@@ -446,15 +477,35 @@ def copytree_virtual(src, dst, file_links=None,
     If you try to pass ``'.'`` in ``file_links``, an :py:class:`OSError` will
     be raised.
 
-    '''
+    .. versionchanged:: 4.7
+       The ``max_workers`` argument is added.
 
-    file_links = file_links or []
-    if not hasattr(file_links, '__iter__'):
-        raise TypeError('expecting an iterable as file_links')
+    '''
 
     # Work with absolute paths
     src = os.path.abspath(src)
     dst = os.path.abspath(dst)
+    link_targets = _file_link_targets(src, file_links)
+    if not link_targets:
+        ignore = None
+    else:
+        def ignore(dir, contents):
+            return {c for c in contents
+                    if os.path.join(dir, c) in link_targets}
+
+    # Copy to dst ignoring the file_links
+    copytree(src, dst, symlinks, ignore,
+             copy_function, ignore_dangling_symlinks, dirs_exist_ok,
+             max_workers)
+
+    # Now create the symlinks
+    _create_file_links(src, dst, link_targets, dirs_exist_ok)
+
+
+def _file_link_targets(src, file_links):
+    file_links = file_links or []
+    if not hasattr(file_links, '__iter__'):
+        raise TypeError('expecting an iterable as file_links')
 
     # 1. Check that the link targets are valid
     # 2. Convert link targets to absolute paths
@@ -479,18 +530,10 @@ def copytree_virtual(src, dst, file_links=None,
     if '.' in file_links or '..' in file_links:
         raise ValueError(f"'.' or '..' are not allowed in file_links")
 
-    if not file_links:
-        ignore = None
-    else:
-        def ignore(dir, contents):
-            return {c for c in contents
-                    if os.path.join(dir, c) in link_targets}
+    return link_targets
 
-    # Copy to dst ignoring the file_links
-    copytree(src, dst, symlinks, ignore,
-             copy_function, ignore_dangling_symlinks, dirs_exist_ok)
 
-    # Now create the symlinks
+def _create_file_links(src, dst, link_targets, dirs_exist_ok):
     for f in link_targets:
         link_name = f.replace(src, dst)
         try:
@@ -500,6 +543,216 @@ def copytree_virtual(src, dst, file_links=None,
                 raise
 
 
+# The FICLONE ioctl request of Linux
+_FICLONE = 0x40049409
+
+
+def reflink(src, dst):
+    '''Create ``dst`` as a reflink of the file ``src``.
+
+    A reflink is a copy-on-write clone of a file: it shares the data blocks
+    of the original file until either of them is modified. Reflinks are
+    supported only on Linux and by some filesystems, such as Btrfs and XFS.
+
+    :raises OSError: if the reflink cannot be created.
+
+    .. versionadded:: 4.7
+    '''
+    import fcntl
+
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+
+    shutil.copystat(src, dst)
+
+
+# Link modes and devices of the source and destination files for which the
+# links are not supported
+_unsupported_links = set()
+
+
+def copyfile_linked(src, dst, mode='reflink', *, follow_symlinks=True):
+    '''Copy the file ``src`` to ``dst`` by linking it if possible.
+
+    :arg mode: How to link the file: ``'reflink'`` creates a reflink of the
+        file (see :func:`reflink`) and ``'hardlink'`` creates a hard link to
+        it. If the link cannot be created, e.g., because ``src`` and ``dst``
+        are in different filesystems, the file is copied.
+    :returns: ``dst``.
+
+    This function can be passed as the ``copy_function`` of
+    :func:`copytree`. An existing ``dst`` is replaced.
+
+    .. versionadded:: 4.7
+    '''
+    if mode not in ('reflink', 'hardlink'):
+        raise ValueError(f'invalid link mode: {mode!r}')
+
+    # Remove any existing file first; linking to it or copying over it would
+    # modify the files that it may be linked to
+    if os.path.lexists(dst):
+        os.remove(dst)
+
+    # Trying to create an unsupported link is costly, so we try only once
+    # for every pair of devices
+    devices = (mode, os.stat(src).st_dev,
+               os.stat(os.path.dirname(dst) or '.').st_dev)
+    if devices not in _unsupported_links:
+        try:
+            if mode == 'hardlink':
+                os.link(src, dst, follow_symlinks=follow_symlinks)
+            else:
+                reflink(src, dst)
+
+            return dst
+        except OSError as e:
+            force_remove_file(dst)
+            if e.errno in (errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTSUP,
+                           errno.EINVAL, errno.ENOTTY):
+                _unsupported_links.add(devices)
+
+    shutil.copy2(src, dst, follow_symlinks=follow_symlinks)
+    return dst
+
+
+class TreeSnapshots:
+    '''Snapshots of directory trees.
+
+    A snapshot of a directory tree is a copy of it that is taken only once
+    for all the trees with the same content. The content of a tree is
+    identified by the names, sizes and modification times of its files.
+    Directory trees are copied by linking the files of their snapshot.
+
+    The snapshots are stored in a private directory, which is created under
+    ``prefix`` when the first snapshot is taken. Snapshots are therefore
+    never shared between different :class:`TreeSnapshots` objects, even if
+    they use the same ``prefix``.
+
+    :arg prefix: The directory under which the snapshots are stored.
+
+    .. versionadded:: 4.7
+    '''
+
+    def __init__(self, prefix):
+        self._prefix = prefix
+        self._basedir = None
+
+    @property
+    def prefix(self):
+        return self._prefix
+
+    @property
+    def basedir(self):
+        '''The directory where the snapshots are stored.
+
+        This is :obj:`None` if no snapshot has been taken.
+        '''
+        return self._basedir
+
+    def _digest(self, src, file_links):
+        ret = hashlib.sha256()
+        for f in file_links:
+            ret.update(f'link:{f}\0'.encode())
+
+        # The linked files are not part of the snapshot, so we do not descend
+        # into them
+        for dirpath, dirnames, filenames in os.walk(src, followlinks=True):
+            reldir = os.path.relpath(dirpath, src)
+            dirnames[:] = sorted(
+                d for d in dirnames
+                if os.path.normpath(os.path.join(reldir, d)) not in file_links
+            )
+            ret.update(f'dir:{reldir}\0'.encode())
+            for f in sorted(filenames):
+                if os.path.normpath(os.path.join(reldir, f)) in file_links:
+                    continue
+
+                st = os.stat(os.path.join(dirpath, f))
+                ret.update(
+                    f'file:{f}:{st.st_size}:{st.st_mtime_ns}\0'.encode()
+                )
+
+        return ret.hexdigest()
+
+    def snapshot(self, src, file_links=None):
+        '''Take a snapshot of the directory tree ``src``.
+
+        The files listed in ``file_links`` are left out of the snapshot. The
+        files of the snapshot are reflinks of the original files, if this is
+        possible, otherwise they are copies.
+
+        The content of ``src`` is examined on every call, but the snapshot of
+        every tree is taken only once; if ``src`` has the same content as a
+        tree that has already been snapshotted, the existing snapshot is
+        returned.
+
+        :returns: the directory of the snapshot.
+        '''
+        src = os.path.abspath(src)
+        file_links = frozenset(os.path.normpath(f) for f in file_links or [])
+        if self._basedir is None:
+            os.makedirs(self._prefix, exist_ok=True)
+            self._basedir = tempfile.mkdtemp(dir=self._prefix)
+
+        snapshot_dir = os.path.join(self._basedir,
+                                    self._digest(src, sorted(file_links)))
+        if not os.path.exists(snapshot_dir):
+            def ignore(dir, contents):
+                reldir = os.path.relpath(dir, src)
+                return {c for c in contents
+                        if os.path.normpath(os.path.join(reldir, c))
+                        in file_links}
+
+            # Take the snapshot in a temporary directory first, so that
+            # incomplete snapshots are never used
+            tmpdir = tempfile.mkdtemp(dir=self._basedir)
+            try:
+                copytree(src, tmpdir, ignore=ignore,
+                         copy_function=copyfile_linked, dirs_exist_ok=True)
+                os.rename(tmpdir, snapshot_dir)
+            except BaseException:
+                rmtree(tmpdir, ignore_errors=True)
+                raise
+
+        return snapshot_dir
+
+    def copytree(self, src, dst, file_links=None, mode='reflink',
+                 dirs_exist_ok=False, max_workers=0):
+        '''Copy ``src`` to ``dst`` by linking the files of its snapshot.
+
+        This is equivalent to :func:`copytree_virtual`, except that the files
+        of ``dst`` are links to the files of the snapshot of ``src`` (see
+        :func:`snapshot`). Since the files are not linked to the files of
+        ``src`` directly, modifying them will not modify ``src``, but it may
+        modify the same files of other copies of ``src``, if they are hard
+        links.
+
+        :arg mode: How to link the files; see :func:`copyfile_linked`.
+        '''
+        src = os.path.abspath(src)
+        dst = os.path.abspath(dst)
+        link_targets = _file_link_targets(src, file_links)
+        copytree(self.snapshot(src, file_links), dst,
+                 copy_function=functools.partial(copyfile_linked, mode=mode),
+                 dirs_exist_ok=dirs_exist_ok, max_workers=max_workers)
+        _create_file_links(src, dst, link_targets, dirs_exist_ok)
+
+    def clear(self):
+        '''Remove all the snapshots.
+
+        The ``prefix`` is also removed, if it is left empty.
+        '''
+
+        if self._basedir is None:
+            return
+
+        rmtree(self._basedir, ignore_errors=True)
+        with contextlib.suppress(OSError):
+            os.rmdir(self._prefix)
+
+        self._basedir = None
+
+
 def rmtree(*args, max_retries=3, **kwargs):
     '''Persistent version of :py:func:`shutil.rmtree`.
 
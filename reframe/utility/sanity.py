@@ -40,6 +40,104 @@ def _open(filename, *args, **kwargs):
         raise SanityError(f'{filename}: {e.strerror}')
 
 
+# Contents of the files read by the pattern matching functions, indexed by
+# their absolute path and encoding; files are cached only inside a
+# `file_cache()` context
+_cached_files = None
+
+
+@contextlib.contextmanager
+def file_cache():
+    '''Cache the contents of the files read by the sanity functions.
+
+    Inside this context, every file is read only once by the functions that
+    search for patterns in files, no matter how many of them examine it.
+    A file is read again only if its modification time or size changes.
+    Files that are processed in streaming mode are not cached.
+
+    ReFrame caches the files examined by the sanity and performance
+    expressions of a test, while it evaluates them.
+
+    .. versionadded:: 4.7
+    '''
+    global _cached_files
+
+    if _cached_files is not None:
+        # Nested contexts use the cache of the outermost one
+        yield
+        return
+
+    _cached_files = {}
+    try:
+        yield
+    finally:
+        _cached_files = None
+
+
+def _read(filename, encoding):
+    '''Read the whole file, using the file cache, if enabled.'''
+    if _cached_files is None or isinstance(filename, int):
+        with _open(filename, 'rt', encoding=encoding) as fp:
+            return fp.read()
+
+    key = (os.path.abspath(filename), encoding)
+    try:
+        st = os.stat(filename)
+        stamp, contents = _cached_files[key]
+        if stamp == (st.st_mtime_ns, st.st_size):
+            return contents
+    except (OSError, KeyError):
+        # Let `_open()` report any errors
+        pass
+
+    with _open(filename, 'rt', encoding=encoding) as fp:
+        st = os.fstat(fp.fileno())
+        contents = fp.read()
+
+    _cached_files[key] = ((st.st_mtime_ns, st.st_size), contents)
+    return contents
+
+
+# Approximate size in characters of the chunks that files are read in when
+# they are processed in streaming mode
+_STREAM_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def _read_chunks(fp):
+    '''Read file in chunks of whole lines.'''
+    while True:
+        chunk = fp.read(_STREAM_CHUNK_SIZE)
+        if not chunk:
+            return
+
+        if chunk[-1] != '\n':
+            chunk += fp.readline()
+
+        yield chunk
+
+
+def _finditer_file(patt, filename, encoding, stream):
+    if not stream:
+        yield from re.finditer(patt, _read(filename, encoding), re.MULTILINE)
+        return
+
+    with _open(filename, 'rt', encoding=encoding) as fp:
+        # An empty match at the end of a chunk is also an empty match at the
+        # start of the next one, so we skip it to avoid reporting it twice
+        regex = re.compile(patt, re.MULTILINE)
+        chunks = _read_chunks(fp)
+        chunk = next(chunks, '')
+        while chunk is not None:
+            next_chunk = next(chunks, None)
+            for m in regex.finditer(chunk):
+                if next_chunk is not None and m.start() == len(chunk):
+                    break
+
+                yield m
+
+            chunk = next_chunk
+
+
 def make_performance_function(func, unit, *args, **kwargs):
     '''Convert a callable or deferred expression into a performance function.
 
@@ -418,7 +516,7 @@ def assert_le(a, b, msg=None):
 
 
 @deferrable
-def assert_found(patt, filename, msg=None, encoding='utf-8'):
+def assert_found(patt, filename, msg=None, encoding='utf-8', stream=False):
     '''Assert that regex pattern ``patt`` is found in the file ``filename``.
 
     :arg patt: The regex pattern to search.
@@ -434,14 +532,18 @@ def assert_found(patt, filename, msg=None, encoding='utf-8'):
     :arg msg: The error message to use if the assertion fails. You may use
         ``{0}`` ... ``{N}`` as placeholders for the function arguments.
     :arg encoding: The name of the encoding used to decode the file.
+    :arg stream: Process the file in streaming mode; see :func:`findall`.
     :returns: ``True`` on success.
     :raises reframe.core.exceptions.SanityError: if assertion fails.
+
+    .. versionchanged:: 4.7
+       The ``stream`` argument is added.
     '''
-    with _open(filename, 'rt', encoding=encoding) as fp:
-        return assert_found_s(
-            patt, fp.read(),
-            msg or f'pattern {patt!r} not found in {filename!r}'
-        )
+    for _ in _finditer_file(patt, filename, encoding, stream):
+        return True
+
+    error_msg = msg or f'pattern {patt!r} not found in {filename!r}'
+    raise SanityError(_format(error_msg, patt, filename))
 
 
 @deferrable
@@ -468,7 +570,8 @@ def assert_found_s(patt, string, msg=None):
 
 
 @deferrable
-def assert_not_found(patt, filename, msg=None, encoding='utf-8'):
+def assert_not_found(patt, filename, msg=None, encoding='utf-8',
+                     stream=False):
     '''Assert that regex pattern ``patt`` is not found in the file
     ``filename``.
 
@@ -476,11 +579,15 @@ def assert_not_found(patt, filename, msg=None, encoding='utf-8'):
 
     :returns: ``True`` on success.
     :raises reframe.core.exceptions.SanityError: if assertion fails.
+
+    .. versionchanged:: 4.7
+       The ``stream`` argument is added.
     '''
-    with _open(filename, 'rt', encoding=encoding) as fp:
-        return assert_not_found_s(
-            patt, fp.read(), msg or f'pattern {patt!r} found in {filename!r}'
-        )
+    for _ in _finditer_file(patt, filename, encoding, stream):
+        error_msg = msg or f'pattern {patt!r} found in {filename!r}'
+        raise SanityError(_format(error_msg, patt, filename))
+
+    return True
 
 
 @deferrable
@@ -590,15 +697,17 @@ def assert_reference(val, ref, lower_thres=None, upper_thres=None, msg=None):
 # Pattern matching functions
 
 @deferrable
-def finditer(patt, filename, encoding='utf-8'):
+def finditer(patt, filename, encoding='utf-8', stream=False):
     '''Get an iterator over the matches of the regex ``patt`` in ``filename``.
 
     This function is equivalent to :func:`findall()` except that it returns
     a generator object instead of a list, which you can use to iterate over
     the raw matches.
+
+    .. versionchanged:: 4.7
+       The ``stream`` argument is added.
     '''
-    with _open(filename, 'rt', encoding=encoding) as fp:
-        yield from re.finditer(patt, fp.read(), re.MULTILINE)
+    yield from _finditer_file(patt, filename, encoding, stream)
 
 
 @deferrable
@@ -615,7 +724,7 @@ def finditer_s(patt, string):
 
 
 @deferrable
-def findall(patt, filename, encoding='utf-8'):
+def findall(patt, filename, encoding='utf-8', stream=False):
     '''Get all matches of regex ``patt`` in ``filename``.
 
     :arg patt: The regex pattern to search.
@@ -627,12 +736,25 @@ def findall(patt, filename, encoding='utf-8'):
         is set for the pattern search.
     :arg filename: The name of the file to examine.
     :arg encoding: The name of the encoding used to decode the file.
+    :arg stream: Process the file in streaming mode.
+        Instead of reading the whole file in memory, the file is read and
+        searched in chunks of whole lines, so that the memory needed does not
+        depend on the size of the file.
+        The pattern matches are the same as in non-streaming mode, as long as
+        they do not span multiple lines and the pattern does not use the
+        ``\\A`` or ``\\Z`` anchors or lookarounds across line boundaries.
+        The positions in the match objects refer to the chunk, in which the
+        pattern was matched.
     :returns: A list of raw `regex match objects
         <https://docs.python.org/3/library/re.html#match-objects>`_.
     :raises reframe.core.exceptions.SanityError: In case an :class:`OSError` is
         raised while processing ``filename``.
+
+    .. versionchanged:: 4.7
+       The ``stream`` argument is added.
     '''
-    return list(evaluate(x) for x in finditer(patt, filename, encoding))
+    return list(evaluate(x)
+                for x in finditer(patt, filename, encoding, stream))
 
 
 @deferrable
@@ -663,12 +785,12 @@ def _callable_name(fn):
     return fn_name
 
 
-def _extractiter_singletag(patt, string, tag, conv):
+def _extractiter_singletag(patt, matches, tag, conv):
     if isinstance(conv, collections.abc.Iterable):
         raise SanityError(f'multiple conversion functions given for the '
                           f'single capturing group {tag!r}')
 
-    for m in finditer_s(patt, string):
+    for m in matches:
         try:
             val = m.group(tag)
         except (IndexError, KeyError):
@@ -683,8 +805,8 @@ def _extractiter_singletag(patt, string, tag, conv):
             )
 
 
-def _extractiter_multitag(patt, string, tags, conv):
-    for m in finditer_s(patt, string):
+def _extractiter_multitag(patt, matches, tags, conv):
+    for m in matches:
         val = []
         for t in tags:
             try:
@@ -712,17 +834,29 @@ def _extractiter_multitag(patt, string, tags, conv):
         yield tuple(converted_vals)
 
 
+def _extractiter(patt, matches, tag, conv):
+    if isinstance(tag, collections.abc.Iterable) and not isinstance(tag, str):
+        yield from _extractiter_multitag(patt, matches, tag, conv)
+    else:
+        yield from _extractiter_singletag(patt, matches, tag, conv)
+
+
 @deferrable
-def extractiter(patt, filename, tag=0, conv=None, encoding='utf-8'):
+def extractiter(patt, filename, tag=0, conv=None, encoding='utf-8',
+                stream=False):
     '''Get an iterator over the values extracted from the capturing group
     ``tag`` of a matching regex ``patt`` in the file ``filename``.
 
     This function is equivalent to :func:`extractall` except that it returns
     a generator object, instead of a list, which you can use to iterate over
     the extracted values.
+
+    .. versionchanged:: 4.7
+       The ``stream`` argument is added.
     '''
-    with _open(filename, 'rt', encoding=encoding) as fp:
-        yield from extractiter_s(patt, fp.read(), tag, conv)
+    yield from _extractiter(
+        patt, _finditer_file(patt, filename, encoding, stream), tag, conv
+    )
 
 
 @deferrable
@@ -736,14 +870,12 @@ def extractiter_s(patt, string, tag=0, conv=None):
 
     .. versionadded:: 3.4.1
     '''
-    if isinstance(tag, collections.abc.Iterable) and not isinstance(tag, str):
-        yield from _extractiter_multitag(patt, string, tag, conv)
-    else:
-        yield from _extractiter_singletag(patt, string, tag, conv)
+    yield from _extractiter(patt, finditer_s(patt, string), tag, conv)
 
 
 @deferrable
-def extractall(patt, filename, tag=0, conv=None, encoding='utf-8'):
+def extractall(patt, filename, tag=0, conv=None, encoding='utf-8',
+               stream=False):
     '''Extract all values from the capturing group ``tag`` of a matching regex
     ``patt`` in the file ``filename``.
 
@@ -770,6 +902,7 @@ def extractall(patt, filename, tag=0, conv=None, encoding='utf-8'):
         If more conversion functions are supplied than the corresponding
         capturing groups in ``tag``, the last conversion function will be used
         for the additional capturing groups.
+    :arg stream: Process the file in streaming mode; see :func:`findall`.
     :returns: A list of tuples of converted values extracted from the
          capturing groups specified in ``tag``, if ``tag`` is an iterable.
          Otherwise, a list of the converted values extracted from the single
@@ -779,9 +912,13 @@ def extractall(patt, filename, tag=0, conv=None, encoding='utf-8'):
     .. versionchanged:: 3.1
         Multiple regex capturing groups are now supporetd via ``tag`` and
         multiple conversion functions can be used in ``conv``.
+
+    .. versionchanged:: 4.7
+       The ``stream`` argument is added.
     '''
     return list(evaluate(x)
-                for x in extractiter(patt, filename, tag, conv, encoding))
+                for x in extractiter(patt, filename, tag,
+                                     conv, encoding, stream))
 
 
 @deferrable
@@ -801,7 +938,8 @@ def extractall_s(patt, string, tag=0, conv=None):
 
 
 @deferrable
-def extractsingle(patt, filename, tag=0, conv=None, item=0, encoding='utf-8'):
+def extractsingle(patt, filename, tag=0, conv=None, item=0, encoding='utf-8',
+                  stream=False):
     '''Extract a single value from the capturing group ``tag`` of a matching
     regex ``patt`` in the file ``filename``.
 
@@ -815,15 +953,20 @@ def extractsingle(patt, filename, tag=0, conv=None, item=0, encoding='utf-8'):
     :arg tag: as in :func:`extractall`.
     :arg conv: as in :func:`extractall`.
     :arg item: the specific element to extract.
+    :arg stream: as in :func:`extractall`.
     :returns: The extracted value.
     :raises reframe.core.exceptions.SanityError: In case of errors.
 
+    .. versionchanged:: 4.7
+       The ``stream`` argument is added.
     '''
     try:
         # Explicitly evaluate the expression here, so as to force any exception
         # to be thrown in this context and not during the evaluation of an
         # expression containing this one.
-        return evaluate(extractall(patt, filename, tag, conv, encoding)[item])
+        return evaluate(
+            extractall(patt, filename, tag, conv, encoding, stream)[item]
+        )
     except IndexError:
         raise SanityError(
             f'not enough matches of pattern {patt!r} in file {filename!r} '
@@ -1099,6 +1099,21 @@ def test_exec_order(run_reframe, exec_order):
         assert repeat_no == 10
 
 
+def test_exec_order_critical_path(run_reframe):
+    # The second run takes the test durations from the report of the first
+    for _ in range(2):
+        returncode, stdout, stderr = run_reframe(
+            system='sys0',
+            environs=['e0', 'e1'],
+            more_options=['--exec-order=critical-path'],
+            checkpath=['unittests/resources/checks_unlisted/deps_simple.py']
+        )
+        assert 'Traceback' not in stdout
+        assert 'Traceback' not in stderr
+        assert 'Ran 36/36 test case(s)' in stdout
+        assert returncode == 0
+
+
 def test_detect_host_topology(run_reframe):
     from reframe.utility.cpuinfo import cpuinfo
 
@@ -1252,3 +1267,16 @@ def test_testlib_inherit_fixture_in_different_files(run_reframe):
     assert returncode == 0
     assert 'Ran 3/3 test case(s)' in stdout
     assert 'FAILED' not in stdout
+
+
+def test_lazy_imports():
+    # The command line must not import the test pipeline or any heavy
+    # third-party modules, unless it needs to load tests
+    completed = osext.run_command(
+        f'{sys.executable} -c "import sys; import reframe.frontend.cli; '
+        f'print(*sys.modules)"', check=True
+    )
+    modules = completed.stdout.split()
+    for m in ('jsonschema', 'lxml', 'requests', 'yaml',
+              'reframe.core.buildsystems', 'reframe.core.pipeline'):
+        assert m not in modules
@@ -73,6 +73,67 @@ def test_evaluate_cached():
     assert expr.evaluate() == 3
 
 
+def test_evaluation_session():
+    from reframe.core.deferrable import _EvaluationSession
+
+    num_calls = 0
+
+    @sn.deferrable
+    def my_expr(x):
+        nonlocal num_calls
+        num_calls += 1
+        return x
+
+    @sn.deferrable
+    def make_list(x):
+        return [x]
+
+    with _EvaluationSession() as session:
+        # Identical subexpressions are evaluated only once
+        assert 2 == sn.evaluate(my_expr(1) + my_expr(1))
+        assert 1 == sn.evaluate(my_expr(1))
+        assert num_calls == 1
+
+        # Arguments of different type are not identical
+        assert isinstance(sn.evaluate(my_expr(1.0)), float)
+        assert num_calls == 2
+
+        # Nested sessions are merged with the outer one
+        with _EvaluationSession() as inner_session:
+            assert inner_session is session
+            assert 1 == sn.evaluate(my_expr(1))
+
+        assert num_calls == 2
+
+        # Other arguments are identified by their identity
+        l = [1]
+        assert [1] == sn.evaluate(my_expr(l))
+        assert [1] == sn.evaluate(my_expr(l))
+        assert [1] == sn.evaluate(my_expr([1]))
+        assert num_calls == 4
+
+        # Iterators are not reused
+        assert 2 == len(list(sn.evaluate(sn.finditer_s('a', 'aa'))))
+        assert 2 == len(list(sn.evaluate(sn.finditer_s('a', 'aa'))))
+
+        # Mutable results are reused as copies
+        for _ in range(2):
+            ret = sn.evaluate(make_list(1))
+            assert [1] == ret
+            ret.append(99)
+
+        assert session.timings[make_list(1)._fn.__qualname__][:2] == [1, 1]
+
+    timings = session.timings[my_expr(1)._fn.__qualname__]
+    assert timings[:2] == [4, 4]
+    assert timings[2] >= 0
+    assert session.timings['finditer_s'][:2] == [2, 0]
+
+    # Outside the session every evaluation calls the function
+    assert 1 == sn.evaluate(my_expr(1))
+    assert num_calls == 5
+
+
 def test_implicit_eval():
     # Call to bool() on a deferred expression triggers its immediate
     # evaluation.
@@ -609,6 +609,88 @@ def test_skip_unresolved_deps(make_exec_ctx):
     assert skipped_tests == {'t1', 't2', 't3'}
 
 
+def test_dependency_graph(default_exec_ctx):
+    #
+    #   t0 <-- t1 <-- t2
+    #
+    t0 = make_test('t0')
+    t1 = make_test('t1')
+    t2 = make_test('t2')
+    t1.depends_on('t0', udeps.by_case)
+    t2.depends_on('t1', udeps.by_case)
+    deps, _ = dependencies.build_deps(
+        executors.generate_testcases([t0, t1, t2])
+    )
+    assert isinstance(deps, dependencies.DependencyGraph)
+    assert len(deps) == 12
+    for p in ['sys0:p0', 'sys0:p1']:
+        for e in ['e0', 'e1']:
+            node = functools.partial(Node, pname=p, ename=e)
+            assert deps.dependents(node('t0')) == [node('t1')]
+            assert deps.dependents(node('t1')) == [node('t2')]
+            assert deps.dependents(node('t2')) == []
+            assert in_degree(deps, node('t0')) == 1
+            assert in_degree(deps, node('t1')) == 1
+            assert in_degree(deps, node('t2')) == 0
+
+    # Removing a test case leaves a dangling edge to it
+    node = functools.partial(Node, pname='sys0:p0', ename='e0')
+    t1_case = next(c for c in deps if c == node('t1'))
+    t0_case, = deps[t1_case]
+    deps.remove(t1_case)
+    assert len(deps) == 11
+    assert t1_case not in deps
+    assert t0_case.in_degree == 0
+    assert deps.dependents(node('t0')) == []
+    assert deps.dependents(node('t1')) == [node('t2')]
+
+    # Removing a test case removes also its dependents
+    removed = deps.remove_with_dependents(
+        c for c in deps if c.check.unique_name == 't0'
+    )
+    assert len(removed) == 4 + 3 + 3
+    assert len(deps) == 1
+    assert node('t2') in deps
+
+
+def test_clone_deps(default_exec_ctx):
+    #
+    #   t0 <-- t1 <-- t2    t3 <-- t4
+    #
+    t0 = make_test('t0')
+    t1 = make_test('t1')
+    t2 = make_test('t2')
+    t3 = make_test('t3')
+    t4 = make_test('t4')
+    t1.depends_on('t0', udeps.by_env)
+    t2.depends_on('t1')
+    t4.depends_on('t3', udeps.by_case)
+    cases = executors.generate_testcases([t0, t1, t2, t3, t4])
+    deps, _ = dependencies.build_deps(cases)
+
+    def _edges(graph):
+        return {(u, v) for u, adj in graph.items() for v in adj}
+
+    cloned_deps, skipped_cases = dependencies.clone_deps(cases)
+    assert skipped_cases == []
+    assert _edges(cloned_deps) == _edges(deps)
+    assert not set(map(id, cloned_deps)) & set(map(id, cases))
+    for c in cloned_deps:
+        assert all(d in cloned_deps for d in cloned_deps[c])
+        assert c.in_degree == len(deps.dependents(c))
+
+    # Clones fall back to the default test cases for dependencies that are
+    # not cloned and are skipped if they cannot be resolved
+    t2_cases = [c for c in cases if c.check.unique_name == 't2']
+    cloned_deps, _ = dependencies.clone_deps(t2_cases, cases)
+    assert _edges(cloned_deps) == {
+        (u, v) for u, v in _edges(deps) if u.check.unique_name == 't2'
+    }
+    cloned_deps, skipped_cases = dependencies.clone_deps(t2_cases)
+    assert len(cloned_deps) == 0
+    assert skipped_cases == t2_cases
+
+
 def assert_topological_order(cases, graph):
     cases_order = []
     visited_tests = set()
@@ -796,3 +878,67 @@ def test_toposort_subgraph(default_exec_ctx):
 
     assert cases_by_level[1] == {'t3'}
     assert cases_by_level[2] == {'t4'}
+
+
+def test_critical_path_lengths(default_exec_ctx):
+    #
+    #       t0       +-->t5<--+
+    #       ^        |        |
+    #       |        |        |
+    #   +-->t1<--+   t6       t7
+    #   |        |            ^
+    #   t2<------t3           |
+    #   ^        ^            |
+    #   |        |            t8
+    #   +---t4---+
+    #
+    t0 = make_test('t0')
+    t1 = make_test('t1')
+    t2 = make_test('t2')
+    t3 = make_test('t3')
+    t4 = make_test('t4')
+    t5 = make_test('t5')
+    t6 = make_test('t6')
+    t7 = make_test('t7')
+    t8 = make_test('t8')
+    t1.depends_on('t0')
+    t2.depends_on('t1')
+    t3.depends_on('t1')
+    t3.depends_on('t2')
+    t4.depends_on('t2')
+    t4.depends_on('t3')
+    t6.depends_on('t5')
+    t7.depends_on('t5')
+    t8.depends_on('t7')
+    deps, _ = dependencies.build_deps(
+        executors.generate_testcases([t0, t1, t2, t3, t4,
+                                      t5, t6, t7, t8])
+    )
+
+    def lengths_by_name(weights):
+        ret = {}
+        for c, length in dependencies.critical_path_lengths(
+                deps, weights).items():
+            ret.setdefault(c.check.unique_name, set())
+            ret[c.check.unique_name].add(length)
+
+        return ret
+
+    # Without weights, the lengths count the test cases of the paths
+    assert lengths_by_name({}) == {
+        't0': {5}, 't1': {4}, 't2': {3}, 't3': {2}, 't4': {1},
+        't5': {3}, 't6': {1}, 't7': {2}, 't8': {1}
+    }
+
+    weights = {c: 10 if c.check.unique_name == 't8' else 1 for c in deps}
+    assert lengths_by_name(weights) == {
+        't0': {5}, 't1': {4}, 't2': {3}, 't3': {2}, 't4': {1},
+        't5': {12}, 't6': {1}, 't7': {11}, 't8': {10}
+    }
+
+    # Unknown weights are replaced by the mean of the known ones
+    weights = {c: 10 if c.check.unique_name == 't8' else None for c in deps}
+    assert lengths_by_name(weights) == {
+        't0': {50}, 't1': {40}, 't2': {30}, 't3': {20}, 't4': {10},
+        't5': {30}, 't6': {10}, 't7': {20}, 't8': {10}
+    }
@@ -96,6 +96,37 @@ def test_same_filename_different_path(loader_with_path_tmpdir):
     assert 3 == len(checks)
 
 
+def test_load_all_parallel():
+    serial_loader = RegressionCheckLoader(['unittests/resources/checks'],
+                                          recurse=True)
+    parallel_loader = RegressionCheckLoader(['unittests/resources/checks'],
+                                            recurse=True, max_workers=2)
+    serial_checks = serial_loader.load_all()
+    parallel_checks = parallel_loader.load_all()
+    assert 13 == len(parallel_checks)
+    assert ([c.unique_name for c in serial_checks] ==
+            [c.unique_name for c in parallel_checks])
+
+
+def test_load_all_parallel_name_conflict(tmp_path):
+    test_dir_a = tmp_path / 'a'
+    test_dir_b = tmp_path / 'b'
+    os.mkdir(test_dir_a)
+    os.mkdir(test_dir_b)
+    shutil.copyfile('unittests/resources/checks/emptycheck.py',
+                    test_dir_a / 'test_a.py')
+    shutil.copyfile('unittests/resources/checks/emptycheck.py',
+                    test_dir_b / 'test_b.py')
+    loader = RegressionCheckLoader(
+        [test_dir_a.as_posix(), test_dir_b.as_posix()], max_workers=2
+    )
+
+    # The conflicting test of the second file is skipped
+    checks = loader.load_all()
+    assert 1 == len(checks)
+    assert checks[0].__module__.startswith('test_a')
+
+
 def test_special_test():
     with pytest.raises(ReframeSyntaxError):
         @rfm.simple_test
@@ -154,3 +185,123 @@ def test_relative_import_outside_rfm_prefix(loader, tmp_path):
     )
     tests = loader.load_from_file(str(tmp_path / 'testlib' / 'simple.py'))
     assert len(tests) == 2
+
+
+def test_load_all_test_cache(tmp_path):
+    test_dir = tmp_path / 'checks'
+    test_dir.mkdir()
+    (test_dir / 'test_a.py').write_text(
+        'import reframe as rfm\n'
+        '\n'
+        '\n'
+        '@rfm.simple_test\n'
+        'class T0(rfm.RunOnlyRegressionTest):\n'
+        '    valid_systems = ["*"]\n'
+        '    valid_prog_environs = ["*"]\n'
+    )
+    (test_dir / 'test_b.py').write_text(
+        'import reframe as rfm\n'
+        '\n'
+        '\n'
+        '@rfm.simple_test\n'
+        'class T1(rfm.RunOnlyRegressionTest):\n'
+        '    valid_systems = ["*"]\n'
+        '    valid_prog_environs = ["*"]\n'
+        '\n'
+        '    @run_after("init")\n'
+        '    def set_deps(self):\n'
+        '        self.depends_on("T0")\n'
+    )
+    (test_dir / 'test_c.py').write_text(
+        'import reframe as rfm\n'
+        'from helpers import TAGS\n'
+        '\n'
+        '\n'
+        '@rfm.simple_test\n'
+        'class T2(rfm.RunOnlyRegressionTest):\n'
+        '    valid_systems = ["*"]\n'
+        '    valid_prog_environs = ["*"]\n'
+        '    tags = TAGS\n'
+    )
+    (test_dir / 'helpers.py').write_text('TAGS = {"foo"}\n')
+
+    def _select(test):
+        return test.unique_name == 'T1'
+
+    def _load_all(select):
+        loader = RegressionCheckLoader([str(test_dir)],
+                                       cache_file=str(tmp_path / 'cache'))
+        return sorted(c.unique_name for c in loader.load_all(force=True,
+                                                             select=select))
+
+    # The cache is empty, so all the files are loaded
+    assert _load_all(_select) == ['T0', 'T1', 'T2']
+
+    # Only the files of the selected tests and their dependencies are loaded
+    assert _load_all(_select) == ['T0', 'T1']
+    assert _load_all(lambda t: 'foo' in t.tags) == ['T2']
+    assert _load_all(None) == ['T0', 'T1', 'T2']
+
+    # Modified files are loaded again
+    with open(test_dir / 'test_c.py', 'a') as fp:
+        fp.write('    maintainers = ["me"]\n')
+
+    assert _load_all(_select) == ['T0', 'T1', 'T2']
+    assert _load_all(_select) == ['T0', 'T1']
+
+    # So are the files whose imported modules are modified
+    (test_dir / 'helpers.py').write_text('TAGS = {"bar"}\n')
+    assert 'T2' in _load_all(lambda t: False)
+    assert _load_all(lambda t: False) == []
+
+    # The dependencies of the modified files are loaded, too
+    with open(test_dir / 'test_b.py', 'a') as fp:
+        fp.write('        self.maintainers = ["me"]\n')
+
+    assert _load_all(lambda t: False) == ['T0', 'T1']
+    assert _load_all(lambda t: False) == []
+
+
+def test_load_all_test_cache_order(tmp_path):
+    test_dir = tmp_path / 'checks'
+    test_dir.mkdir()
+    loads = tmp_path / 'loads'
+    for i in range(4):
+        (test_dir / f'test_{i}.py').write_text(
+            f'import reframe as rfm\n'
+            f'\n'
+            f'\n'
+            f'@rfm.simple_test\n'
+            f'class T{i}(rfm.RunOnlyRegressionTest):\n'
+            f'    valid_systems = ["*"]\n'
+            f'    valid_prog_environs = ["*"]\n'
+            f'\n'
+            f'    @run_after("init")\n'
+            f'    def log_load(self):\n'
+            f'        with open({str(loads)!r}, "a") as fp:\n'
+            f'            fp.write("T{i}\\n")\n'
+        )
+
+    def _load_all(select):
+        loads.write_text('')
+        loader = RegressionCheckLoader([str(test_dir)],
+                                       cache_file=str(tmp_path / 'cache'))
+        loader.load_all(force=True, select=select)
+        return loads.read_text().split()
+
+    # The files are loaded in the order they are found without the cache
+    order = _load_all(None)
+    assert sorted(order) == ['T0', 'T1', 'T2', 'T3']
+
+    # The uncached files are loaded first and only the cached files that
+    # are needed are loaded after them
+    with open(test_dir / f'test_{order[2][1]}.py', 'a') as fp:
+        fp.write('    maintainers = ["me"]\n')
+
+    assert _load_all(lambda t: t.unique_name == order[3]) == order[2:]
+    assert _load_all(lambda t: t.unique_name == order[3]) == order[3:]
+    with open(test_dir / f'test_{order[3][1]}.py', 'a') as fp:
+        fp.write('    maintainers = ["me"]\n')
+
+    assert _load_all(lambda t: t.unique_name == order[0]) == [order[3],
+                                                              order[0]]
@@ -3,12 +3,15 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import http.server
+import json
 import logging
 import logging.handlers
 import os
 import pytest
 import re
 import sys
+import threading
 import time
 from datetime import datetime
 
@@ -17,6 +20,7 @@ import reframe.core.logging as rlog
 import reframe.core.runtime as rt
 from reframe.core.exceptions import ConfigError, ReframeError
 from reframe.core.backends import (getlauncher, getscheduler)
+from reframe.core.meta import make_test
 from reframe.core.schedulers import Job
 
 
@@ -555,3 +559,206 @@ def test_httpjson_handler_no_port(make_exec_ctx, config_file,
         })
     )
     rlog.configure_logging(rt.runtime().site_config)
+
+
+@pytest.fixture
+def httpjson_server():
+    class _RequestHandler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            server = self.server
+            server.received.set()
+            server.unblocked.wait()
+            data = self.rfile.read(int(self.headers['Content-Length']))
+            if server.status == 200:
+                server.requests.append(
+                    (self.headers['Content-type'], data.decode())
+                )
+
+            self.send_response(server.status)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('localhost', 0),
+                                             _RequestHandler)
+    server.requests = []
+    server.status = 200
+    server.received = threading.Event()
+    server.unblocked = threading.Event()
+    server.unblocked.set()
+    server.url = f'http://localhost:{server.server_port}/rfm'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.unblocked.set()
+    server.shutdown()
+    server.server_close()
+
+
+def _message_to_json(record, extras, ignore_keys):
+    return json.dumps({'message': record.getMessage()})
+
+
+@pytest.fixture
+def make_httpjson_logger(fake_check):
+    def _make_logger(handler):
+        logger = rlog.Logger('reframe')
+        logger.addHandler(handler)
+        return rlog.LoggerAdapter(logger, fake_check)
+
+    return _make_logger
+
+
+def test_httpjson_handler_batched(httpjson_server, make_httpjson_logger):
+    handler = rlog.HTTPJSONHandler(httpjson_server.url, batch_size=4,
+                                   json_formatter=_message_to_json)
+    logger = make_httpjson_logger(handler)
+
+    # Logging must not block while the server is busy
+    httpjson_server.unblocked.clear()
+    logger.info('record 0')
+    httpjson_server.received.wait()
+    for i in range(1, 9):
+        logger.info(f'record {i}')
+
+    httpjson_server.unblocked.set()
+    handler.close()
+
+    # The first record is sent immediately, the rest are batched
+    requests = httpjson_server.requests
+    assert [len(data.splitlines()) for _, data in requests] == [1, 4, 4]
+    assert all(ctype == 'application/x-ndjson' for ctype, _ in requests)
+    messages = [json.loads(line)['message']
+                for _, data in requests for line in data.splitlines()]
+    assert messages == [f'record {i}' for i in range(9)]
+
+
+def test_httpjson_handler_spool(httpjson_server, make_httpjson_logger,
+                                tmp_path):
+    spool_file = tmp_path / 'httpjson.spool'
+    httpjson_server.status = 503
+    handler = rlog.HTTPJSONHandler(httpjson_server.url,
+                                   json_formatter=_message_to_json,
+                                   retries=1, retry_backoff=0,
+                                   spool_file=spool_file)
+    logger = make_httpjson_logger(handler)
+    for i in range(3):
+        logger.info(f'record {i}')
+
+    handler.close()
+    assert httpjson_server.requests == []
+    with open(spool_file) as fp:
+        assert len(fp.readlines()) == 3
+
+    # The spooled records are sent first, once the server is back
+    httpjson_server.status = 200
+    handler = rlog.HTTPJSONHandler(httpjson_server.url,
+                                   json_formatter=_message_to_json,
+                                   spool_file=spool_file)
+    logger = make_httpjson_logger(handler)
+    logger.info('record 3')
+    handler.close()
+    messages = [json.loads(data)['message']
+                for _, data in httpjson_server.requests]
+    assert messages == [f'record {i}' for i in range(4)]
+    assert not os.path.exists(spool_file)
+
+
+def test_httpjson_handler_server_down(httpjson_server, make_httpjson_logger,
+                                      tmp_path):
+    spool_file = tmp_path / 'httpjson.spool'
+    httpjson_server.status = 503
+    handler = rlog.HTTPJSONHandler(httpjson_server.url,
+                                   json_formatter=_message_to_json,
+                                   retries=0, spool_file=spool_file)
+    logger = make_httpjson_logger(handler)
+    logger.info('record 0')
+    handler.flush()
+
+    # Once a request has failed, the records are spooled directly
+    httpjson_server.status = 200
+    for i in range(1, 4):
+        logger.info(f'record {i}')
+
+    handler.close()
+    assert httpjson_server.requests == []
+    with open(spool_file) as fp:
+        messages = [json.loads(line)['message'] for line in fp]
+
+    assert messages == [f'record {i}' for i in range(4)]
+
+
+def test_httpjson_handler_shutdown_timeout(httpjson_server,
+                                           make_httpjson_logger, tmp_path):
+    spool_file = tmp_path / 'httpjson.spool'
+    handler = rlog.HTTPJSONHandler(httpjson_server.url,
+                                   json_formatter=_message_to_json,
+                                   queue_size=2, spool_file=spool_file)
+    handler.SHUTDOWN_TIMEOUT = 0.5
+    logger = make_httpjson_logger(handler)
+    httpjson_server.unblocked.clear()
+    logger.info('record 0')
+    httpjson_server.received.wait()
+    logger.info('record 1')
+    logger.info('record 2')
+
+    # Closing does not wait for the busy server longer than the timeout,
+    # even if the queue is full
+    worker = handler._worker
+    t_start = time.time()
+    handler.close()
+    assert time.time() - t_start < 5
+    with open(spool_file) as fp:
+        messages = [json.loads(line)['message'] for line in fp]
+
+    assert messages == ['record 1', 'record 2']
+
+    # The worker finishes as soon as the server responds
+    httpjson_server.unblocked.set()
+    worker.join()
+
+
+def test_multifile_handler(tmp_path, monkeypatch):
+    num_makedirs = 0
+    makedirs = os.makedirs
+
+    def _makedirs(*args, **kwargs):
+        nonlocal num_makedirs
+        num_makedirs += 1
+        return makedirs(*args, **kwargs)
+
+    monkeypatch.setattr(os, 'makedirs', _makedirs)
+    handler = rlog.MultiFileHandler(str(tmp_path / 'perflogs'), mode='w+',
+                                    fmt='%(check_name)s|%(message)s',
+                                    max_open_files=2)
+    handler.setFormatter(rlog.RFC3339Formatter('%(check_name)s|%(message)s'))
+    logger = rlog.Logger('reframe')
+    logger.addHandler(handler)
+
+    # Log to more files than can be kept open
+    checks = []
+    for i in range(3):
+        test = make_test(f'_T{i}', (rfm.RunOnlyRegressionTest,), {})()
+        checks.append(rlog.LoggerAdapter(logger, test))
+
+    for n in range(2):
+        for log in checks:
+            log.info(f'record {n}')
+
+    assert num_makedirs == 1
+    logfiles = sorted((tmp_path / 'perflogs').iterdir())
+    assert len(logfiles) == 3
+
+    # Records are written out on flush
+    handler.flush()
+    for logfile in logfiles:
+        with open(logfile) as fp:
+            lines = fp.read().splitlines()
+
+        assert len(lines) == 3
+        assert lines[0] == 'name|message'
+        assert [line.split('|')[1] for line in lines[1:]] == ['record 0',
+                                                              'record 1']
+
+    handler.close()
@@ -3,6 +3,7 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import copy
 import os
 import pytest
 import re
@@ -158,6 +159,22 @@ def test_eq():
     assert hash(t1) == hash(t2)
 
 
+def test_deepcopy(hellotest, local_exec_ctx):
+    hellotest.executable_opts = ['foo']
+    test_copy = copy.deepcopy(hellotest)
+    assert test_copy is not hellotest
+    assert type(test_copy) is type(hellotest)
+    assert test_copy.name == hellotest.name
+    assert test_copy.executable_opts == ['foo']
+
+    # The copy must be independent of the original test
+    test_copy.executable_opts.append('bar')
+    assert hellotest.executable_opts == ['foo']
+    _run(test_copy, *local_exec_ctx)
+    assert test_copy.stagedir is not None
+    assert hellotest.stagedir is None
+
+
 def test_environ_setup(hellotest, local_exec_ctx):
     # Use test environment for the regression check
     hellotest.env_vars = {'_FOO_': 1, '_BAR_': 2}
@@ -708,6 +725,11 @@ def test_supports_sysenv(testsys_exec_ctx):
         check_environs=False
     )
 
+    # Check that the specs are compiled only once
+    hits = rt._compile_specs.cache_info().hits
+    rt.valid_sysenv_comb(['+cuda'], ['PrgEnv-cray'])
+    assert rt._compile_specs.cache_info().hits == hits + 4
+
 
 def test_sourcesdir_none(local_exec_ctx):
     @test_util.custom_prefix('unittests/resources/checks')
@@ -736,6 +758,42 @@ def test_sourcesdir_build_system(local_exec_ctx):
     _run(MyTest(), *local_exec_ctx)
 
 
+@pytest.fixture(params=['copy', 'reflink', 'hardlink'])
+def stage_mode(request):
+    return request.param
+
+
+def test_stage_mode(local_exec_ctx, stage_mode):
+    rt.runtime().site_config.add_sticky_option('general/stage_mode',
+                                               stage_mode)
+    rt.runtime().site_config.add_sticky_option('general/max_stage_workers', 2)
+
+    @test_util.custom_prefix('unittests/resources/checks')
+    class MyTest(rfm.RunOnlyRegressionTest):
+        valid_systems = ['*']
+        valid_prog_environs = ['*']
+        executable = 'echo'
+        readonly_files = ['homer.txt']
+
+    test = MyTest()
+    test.setup(*local_exec_ctx)
+    test.run()
+    test.run_wait()
+    sources = os.path.join(test.prefix, 'src')
+    assert os.path.exists(os.path.join(test.stagedir, 'code', 'Makefile'))
+    assert (os.readlink(os.path.join(test.stagedir, 'homer.txt')) ==
+            os.path.join(sources, 'homer.txt'))
+
+    # The stage directory must never be linked to the original sources
+    assert not os.path.samefile(os.path.join(test.stagedir, 'hello.c'),
+                                os.path.join(sources, 'hello.c'))
+    snapshots = rt.runtime().source_snapshots
+    if stage_mode == 'copy':
+        assert snapshots.basedir is None
+    else:
+        assert len(os.listdir(snapshots.basedir)) == 1
+
+
 def test_sourcesdir_none_generated_sources(local_exec_ctx):
     @test_util.custom_prefix('unittests/resources/checks')
     class MyTest(rfm.RegressionTest):
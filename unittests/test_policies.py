@@ -4,6 +4,8 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import contextlib
+import errno
+import gzip
 import io
 import json
 import jsonschema
@@ -11,6 +13,7 @@ import os
 import pytest
 import socket
 import sys
+import threading
 import time
 
 import reframe as rfm
@@ -26,6 +29,7 @@ import reframe.utility.sanity as sn
 import unittests.utility as test_util
 
 from lxml import etree
+from types import SimpleNamespace
 from reframe.core.exceptions import (AbortTaskError,
                                      FailureLimitError,
                                      ForceExitError,
@@ -526,6 +530,160 @@ def test_duration_limit(make_runner, make_cases, common_exec_ctx):
             assert num_aborted == 1
 
 
+def test_eval_workers(make_cases, make_exec_ctx):
+    make_exec_ctx(system='generic',
+                  options={'general/max_eval_workers': 2})
+    runner = executors.Runner(policies.AsynchronousExecutionPolicy())
+    runner.runall(make_cases())
+    assert 9 == runner.stats.num_cases()
+    assert_runall(runner)
+    assert 5 == len(runner.stats.failed())
+    assert 2 == num_failures_stage(runner, 'setup')
+    assert 1 == num_failures_stage(runner, 'sanity')
+    assert 1 == num_failures_stage(runner, 'performance')
+    assert 1 == num_failures_stage(runner, 'cleanup')
+    for t in runner.stats.tasks():
+        assert t.check._eval_results is None
+
+
+def test_eval_workers_reuse_results(make_exec_ctx, make_cases, tmp_path):
+    make_exec_ctx(system='generic',
+                  options={'general/max_eval_workers': 2})
+    calls = tmp_path / 'calls.txt'
+
+    @sn.deferrable
+    def record_call():
+        with open(calls, 'a') as fp:
+            fp.write(f'{os.getpid()}\n')
+
+        return True
+
+    @test_util.custom_prefix('unittests/resources/checks')
+    class _EvalTest(rfm.RunOnlyRegressionTest):
+        valid_systems = ['*']
+        valid_prog_environs = ['*']
+        executable = 'echo'
+        sanity_patterns = sn.assert_true(record_call())
+
+        @run_after('sanity')
+        def record_hook(self):
+            with open(calls, 'a') as fp:
+                fp.write('hook\n')
+
+    runner = executors.Runner(policies.AsynchronousExecutionPolicy())
+    runner.runall(make_cases([_EvalTest()]))
+    assert_runall(runner)
+    assert 0 == len(runner.stats.failed())
+
+    # The expression is evaluated once by a worker and its hook runs once in
+    # the main process
+    worker_pid, hook = calls.read_text().split()
+    assert worker_pid != str(os.getpid())
+    assert hook == 'hook'
+
+
+def test_eval_workers_threads():
+    pool = policies._EvalWorkerPool(2)
+    assert pool.can_fork()
+
+    # Workers are not forked while other threads are running
+    done = threading.Event()
+    thread = threading.Thread(target=done.wait)
+    thread.start()
+    try:
+        assert not pool.can_fork()
+    finally:
+        done.set()
+        thread.join()
+
+    assert pool.can_fork()
+
+
+def test_cleanup_workers(make_runner, make_cases, make_exec_ctx):
+    make_exec_ctx(system='generic',
+                  options={'general/max_cleanup_workers': 2})
+
+    @test_util.custom_prefix('unittests/resources/checks')
+    class _BrokenKeepFiles(rfm.RunOnlyRegressionTest):
+        valid_systems = ['*']
+        valid_prog_environs = ['*']
+        executable = 'ln -s /foo/bar broken.txt'
+        keep_files = ['broken.txt']
+        sanity_patterns = sn.assert_true(1)
+
+    runner = make_runner()
+    runner.runall(make_cases() + make_cases([_BrokenKeepFiles()]))
+    assert 10 == runner.stats.num_cases()
+    assert_runall(runner)
+    assert 6 == len(runner.stats.failed())
+    assert 2 == num_failures_stage(runner, 'setup')
+    assert 1 == num_failures_stage(runner, 'sanity')
+    assert 1 == num_failures_stage(runner, 'performance')
+    assert 2 == num_failures_stage(runner, 'cleanup')
+
+    # The failure of the file operations is reported against its test
+    for t in runner.stats.failed():
+        if t.check.name == '_BrokenKeepFiles':
+            assert t.failed_stage == 'cleanup'
+            assert isinstance(t.exc_info[1], FileNotFoundError)
+
+    # The file operations of the successful tests have finished
+    for t in runner.stats.tasks():
+        check = t.check
+        if t.succeeded and not t.failed and check.job:
+            assert os.path.exists(
+                os.path.join(check.outputdir, check.job.script_filename)
+            )
+            assert not os.path.exists(check.stagedir)
+
+    # The threads of the pool are released when idle
+    assert threading.active_count() == 1
+
+
+def test_event_driven_polling(make_runner, make_cases, make_sleep_check,
+                              common_exec_ctx):
+    if not hasattr(os, 'pidfd_open'):
+        pytest.skip('process file descriptors are not supported')
+
+    runner = make_runner()
+
+    # With event-driven polling we should not wait for the back-off period
+    runner.policy._pollctl.SLEEP_MIN = 10
+    with timer() as tm:
+        runner.runall(make_cases([make_sleep_check(.5)]))
+
+    t_start, t_end = tm.timestamps()
+    assert_runall(runner)
+    assert 0 == len(runner.stats.failed())
+    assert t_end - t_start < 5
+
+
+def test_snooze_events():
+    pollctl = policies._PollController()
+    pollctl.reset_snooze_time()
+
+    # Without any file descriptors, we back off
+    t_start = time.time()
+    pollctl.snooze([])
+    assert time.time() - t_start >= pollctl.SLEEP_MIN
+
+    # File descriptors beyond `FD_SETSIZE` can be waited on
+    rfd, wfd = os.pipe()
+    try:
+        high_fd = os.dup2(rfd, 2048)
+    except OSError:
+        pytest.skip('cannot open a high file descriptor')
+
+    try:
+        os.write(wfd, b'x')
+        t_start = time.time()
+        pollctl.snooze([high_fd])
+        assert time.time() - t_start < pollctl.SLEEP_MAX
+    finally:
+        for fd in (rfd, wfd, high_fd):
+            os.close(fd)
+
+
 @pytest.fixture
 def dep_checks(make_loader):
     return make_loader(
@@ -571,6 +729,21 @@ def test_dependencies_with_retries(make_runner, dep_cases, common_exec_ctx):
     assert_dependency_run(runner)
 
 
+def test_dependencies_countdown(dep_cases, common_exec_ctx):
+    policy = policies.AsynchronousExecutionPolicy()
+    executors.Runner(policy)
+    policy.enter()
+    for c in dep_cases:
+        policy.runcase(c)
+
+    # Only tasks without dependencies must be queued initially
+    queued = {t.testcase for t in policy._task_queues['startup']}
+    assert queued == {c for c in dep_cases if not c.deps}
+    for c in dep_cases:
+        task = policy._task_index[c]
+        assert policy._deps_pending[task] == len(c.deps)
+
+
 class _TaskEventMonitor(executors.TaskEventListener):
     '''Event listener for monitoring the execution of the asynchronous
     execution policy.
@@ -761,6 +934,96 @@ def test_concurrency_none(make_async_runner, make_cases,
     assert all(begin_after_end)
 
 
+def test_local_resource_pool():
+    pool = policies._LocalResourcePool([[0, 4], [1, 5], [2, 6], [3, 7]])
+    pool.register_gpus(2)
+    assert ([0, 4, 1, 5], [0]) == pool.acquire('t0', 3, 1)
+    assert pool.acquire('t1', 8, 0) is None
+    assert pool.acquire('t1', 2, 2) is None
+    assert ([2, 6], [1]) == pool.acquire('t1', 2, 1)
+    pool.release('t0')
+    assert ([0, 4], []) == pool.acquire('t2', 1, 0)
+
+    # Releasing twice or releasing a task without resources is a no-op
+    pool.release('t0')
+    pool.release('t3')
+    pool.release('t1')
+    pool.release('t2')
+
+    # Requests exceeding the resources of the host are capped
+    assert ([0, 4, 1, 5, 2, 6, 3, 7], [0, 1]) == pool.acquire('t3', 16, 4)
+
+
+def test_concurrency_packed(make_async_runner, make_cases,
+                            make_sleep_check, make_exec_ctx):
+    if not hasattr(os, 'sched_setaffinity'):
+        pytest.skip('CPU affinity cannot be set on this platform')
+
+    num_checks = 3
+    make_exec_ctx(options={**max_jobs_opts(num_checks),
+                           'general/pack_local_jobs': True})
+
+    # Each check requests all the CPUs, so the checks must run one by one
+    cpus = sorted(os.sched_getaffinity(0))
+    checks = [make_sleep_check(.5) for i in range(num_checks)]
+    for c in checks:
+        c.num_cpus_per_task = len(cpus)
+
+    runner, monitor = make_async_runner()
+    runner.runall(make_cases(checks))
+
+    assert num_checks == runner.stats.num_cases()
+    assert_runall(runner)
+    assert 0 == len(runner.stats.failed())
+    assert 1 == max(monitor.num_tasks)
+    for t in monitor.tasks:
+        assert cpus == sorted(t.check.job._cpuset)
+
+    begin_stamps, end_stamps = _read_timestamps(monitor.tasks)
+    begin_after_end = (b > e
+                       for b, e in zip(begin_stamps[1:], end_stamps[:-1]))
+    assert all(begin_after_end)
+
+
+def test_task_priorities(make_async_runner, make_cases,
+                         make_sleep_check, make_exec_ctx):
+    num_checks = 3
+    make_exec_ctx(options=max_jobs_opts(1))
+    runner, monitor = make_async_runner()
+    cases = make_cases([make_sleep_check(.1) for i in range(num_checks)])
+    runner.policy.task_priorities = {c: i for i, c in enumerate(cases)}
+    runner.runall(cases)
+
+    assert num_checks == runner.stats.num_cases()
+    assert_runall(runner)
+    assert 0 == len(runner.stats.failed())
+
+    # Tasks of higher priority must run first
+    assert ([c.check.name for c in reversed(cases)] ==
+            [t.check.name for t in monitor.tasks])
+
+
+def test_priority_queue():
+    priorities = {'a': 1, 'b': 3, 'c': 1, 'd': 2}
+    queue = policies._PriorityQueue(priorities.get)
+    for t in 'abcd':
+        queue.add(t)
+
+    # Tasks of equal priority keep the order they were added in
+    assert list(queue) == ['b', 'd', 'a', 'c']
+    queue.add('b')
+    assert len(queue) == 4
+
+    queue.discard('d')
+    queue.discard('d')
+    queue.discard('a')
+    assert 'a' not in queue
+    assert list(queue) == ['b', 'c']
+
+    queue.add('a')
+    assert list(queue) == ['b', 'c', 'a']
+
+
 def assert_interrupted_run(runner):
     assert 4 == runner.stats.num_cases()
     assert_runall(runner)
@@ -972,6 +1235,167 @@ def test_restore_session(report_file, make_runner,
         report.restore_dangling(testgraph)
 
 
+def test_report_durations(report_file, dep_cases):
+    durations = runreport.load_report(report_file).durations()
+    assert durations
+    cases = {(c.check.unique_name, c.partition.fullname, c.environ.name)
+             for c in dep_cases}
+    for key, time_total in durations.items():
+        assert key in cases
+        assert time_total >= 0
+
+
+@pytest.fixture(params=[False, True], ids=['indent', 'compress'])
+def compress_report(request):
+    return request.param
+
+
+@pytest.fixture(params=['report.json', 'report.json.gz'])
+def report_filename(request, tmp_path):
+    return tmp_path / request.param
+
+
+def test_report_writer(make_runner, make_cases, common_exec_ctx,
+                       compress_report, report_filename):
+    def _results(run):
+        return sorted((tc['name'], tc['result']) for tc in run['testcases'])
+
+    filename = report_filename
+    runner = make_runner(max_retries=1)
+    writer = runreport.RunReportWriter(
+        filename, {'data_version': runreport.DATA_VERSION}, runner.stats
+    )
+    runner.policy.task_listeners.append(writer)
+    runner.runall(make_cases())
+    expected = [_results(run) for run in runner.stats.json()]
+    assert len(expected) == 2
+
+    # The report can be loaded before the session finishes
+    report = runreport.load_report(filename)
+    assert [_results(run) for run in report['runs']] == expected
+    assert report['session_info']['num_cases'] == 9
+    assert report['session_info']['num_failures'] == 5
+
+    # A test case record that was not written completely is ignored
+    with open(filename, 'rb') as fp:
+        journal = fp.read()
+
+    truncated = filename.parent / 'truncated.json'
+    truncated.write_bytes(journal[:-10])
+    complete = filename.parent / 'complete.json'
+    complete.write_bytes(journal[:journal.rindex(b'\n', 0, -1) + 1])
+    report = runreport.load_report(truncated)
+    expected_report = runreport.load_report(complete)
+    assert ([_results(run) for run in report['runs']] ==
+            [_results(run) for run in expected_report['runs']])
+
+    session_info = {'data_version': runreport.DATA_VERSION}
+    writer.finalize(session_info, [], compress_report, link_to_last=True)
+    assert session_info['num_cases'] == 9
+    assert session_info['num_failures'] == 5
+    if filename.suffix == '.gz':
+        with gzip.open(filename, 'rt') as fp:
+            report = json.load(fp)
+
+        assert os.readlink(filename.parent / 'latest.json.gz') == filename.name
+    else:
+        with open(filename) as fp:
+            report = json.load(fp)
+
+        assert os.readlink(filename.parent / 'latest.json') == filename.name
+
+    assert report['session_info'] == session_info
+    assert report['restored_cases'] == []
+    for run, stats in zip(report['runs'], runner.stats.json()):
+        assert _results(run) == _results(stats)
+        assert run['runid'] == stats['runid']
+        assert run['num_cases'] == stats['num_cases']
+        assert run['num_failures'] == stats['num_failures']
+
+        # The test cases are written in the order of the tasks
+        assert ([tc['name'] for tc in run['testcases']] ==
+                [tc['name'] for tc in stats['testcases']])
+
+    # Load and validate the final report
+    runreport.load_report(filename)
+
+
+def test_report_writer_error(make_runner, make_cases, common_exec_ctx,
+                             tmp_path, monkeypatch):
+    def _append(record):
+        raise OSError(errno.ENOSPC, 'No space left on device')
+
+    runner = make_runner()
+    writer = runreport.RunReportWriter(
+        tmp_path / 'report.json', {'data_version': runreport.DATA_VERSION},
+        runner.stats
+    )
+    monkeypatch.setattr(writer, '_append', _append)
+    runner.policy.task_listeners.append(writer)
+
+    # Failing to write the report does not affect the session
+    runner.runall(make_cases())
+    assert_runall(runner)
+    assert 9 == runner.stats.num_cases()
+    assert 5 == len(runner.stats.failed())
+    with pytest.raises(OSError, match='No space left'):
+        writer.finalize({'data_version': runreport.DATA_VERSION}, [])
+
+
+def test_report_checksum(make_runner, make_cases, common_exec_ctx,
+                         compress_report, tmp_path):
+    runner = make_runner()
+    with timer() as tm:
+        runner.runall(make_cases())
+
+    report = _generate_runreport(runner.stats.json(), *tm.timestamps())
+    report_file = tmp_path / 'report.json'
+    runreport.write_report(report, report_file, compress_report)
+    with open(report_file) as fp:
+        report = json.load(fp)
+
+    # Test cases of unmodified reports are not validated
+    assert 'checksum' in report
+    loaded = runreport.load_report(report_file)
+    assert loaded._trusted
+    for tc in report['runs'][0]['testcases']:
+        check = SimpleNamespace(unique_name=tc['unique_name'])
+        part = SimpleNamespace(fullname=tc['system'])
+        env = SimpleNamespace(name=tc['environment'])
+        assert loaded.case(check, part, env) == tc
+
+    # Writing a loaded report replaces its checksum
+    runreport.write_report(loaded._report, report_file, compress_report)
+    assert runreport.load_report(report_file)._trusted
+
+    # Test cases of modified reports are validated when used
+    tc = report['runs'][0]['testcases'][0]
+    tc['time_total'] = 'invalid'
+    with open(report_file, 'w') as fp:
+        jsonext.dump(report, fp)
+
+    loaded = runreport.load_report(report_file)
+    assert not loaded._trusted
+    assert (tc['unique_name'], tc['system'],
+            tc['environment']) not in loaded.durations()
+    check = SimpleNamespace(unique_name=tc['unique_name'])
+    part = SimpleNamespace(fullname=tc['system'])
+    env = SimpleNamespace(name=tc['environment'])
+    with pytest.raises(ReframeError, match=r'invalid report'):
+        loaded.case(check, part, env)
+
+    with pytest.raises(ReframeError, match=r'invalid report'):
+        list(loaded.slice('name'))
+
+    # Test cases without the required fields are not valid either
+    del tc['unique_name']
+    with open(report_file, 'w') as fp:
+        jsonext.dump(report, fp)
+
+    with pytest.raises(ReframeError, match=r'invalid report'):
+        runreport.load_report(report_file)
+
+
 def test_config_params(make_runner, make_exec_ctx):
     '''Test that configuration parameters are properly retrieved with the
     various execution policies.
@@ -1327,6 +1751,45 @@ def test_perf_logging_multiline(make_runner, make_exec_ctx, perf_test,
     )
 
 
+@pytest.fixture(params=[False, True], ids=['default', 'compat'])
+def perflog_compat(request):
+    return request.param
+
+
+def test_perf_logging_sqlite(make_runner, make_exec_ctx, perf_test,
+                             config_perflog, perflog_compat, tmp_path):
+    make_exec_ctx(
+        config_perflog(
+            fmt='%(check_name)s',
+            logging_opts={
+                'perflog_compat': perflog_compat,
+                'handlers_perflog': [{'type': 'sqlite', 'level': 'info'}]
+            }
+        )
+    )
+    logging.configure_logging(rt.runtime().site_config)
+    for _ in range(2):
+        runner = make_runner()
+        testcases = executors.generate_testcases([perf_test])
+        _assert_no_logging_error(runner.runall, testcases)
+
+    db = logging.PerflogDatabase(tmp_path / 'perflogs' / 'perflogs.db')
+    results = db.last_results('_MyPerfTest', 10)
+    assert len(results) == 4
+    assert results[0]['timestamp'] >= results[-1]['timestamp']
+    assert all(r['system'] == 'generic' and r['partition'] == 'default' and
+               r['result'] == 'pass' for r in results)
+
+    results = db.last_results('_MyPerfTest', 1, system='generic',
+                              perf_var='perf1')
+    assert len(results) == 1
+    assert results[0]['perf_value'] == 50.0
+    assert results[0]['perf_ref'] == 0
+    assert results[0]['perf_unit'] == 'unit1'
+    assert db.last_results('_MyPerfTest', system='foo') == []
+    db.close()
+
+
 def test_perf_logging_lazy(make_runner, make_exec_ctx, lazy_perf_test,
                            config_perflog, tmp_path):
     make_exec_ctx(
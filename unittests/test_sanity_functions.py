@@ -542,6 +542,21 @@ def test_assert_found(_assert_found):
         sn.evaluate(assert_found(r'foo: \d+', where))
 
 
+@pytest.mark.parametrize('stream', [False, True])
+def test_assert_found_msg(tempfile, stream):
+    # The placeholders refer to the function arguments in both modes
+    with pytest.raises(SanityError) as exc_info:
+        sn.evaluate(sn.assert_found('foo', tempfile, '{0} not in {1}',
+                                    stream=stream))
+
+    assert str(exc_info.value) == f'foo not in {tempfile}'
+    with pytest.raises(SanityError) as exc_info:
+        sn.evaluate(sn.assert_not_found('Step', tempfile, '{0} found in {1}',
+                                        stream=stream))
+
+    assert str(exc_info.value) == f'Step found in {tempfile}'
+
+
 def test_assert_found_encoding(utf16_file):
     assert sn.assert_found('Odyssey', utf16_file, encoding='utf-16')
 
@@ -811,6 +826,80 @@ def test_extractall_multiple_tags(_extractall):
         )
 
 
+@pytest.mark.parametrize('chunk_size', [1, 7, 1024])
+def test_stream(tempfile, tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(sn, '_STREAM_CHUNK_SIZE', chunk_size)
+    empty_file = tmp_path / 'empty'
+    empty_file.touch()
+    no_newline_file = tmp_path / 'no_newline'
+    no_newline_file.write_text('Step: 1\n\nStep: 2')
+    for filename in (tempfile, str(empty_file), str(no_newline_file)):
+        for patt in (r'Step: \d+', r'^', r'$', r'\d*', r'^$',
+                     r'^Number: (\d+) (\d+)$'):
+            expected = sn.evaluate(sn.findall(patt, filename))
+            found = sn.evaluate(sn.findall(patt, filename, stream=True))
+            assert ([m.group(0) for m in found] ==
+                    [m.group(0) for m in expected])
+
+    res = sn.evaluate(sn.extractall(r'Number: (\d+) (\d+)', tempfile,
+                                    (1, 2), int, stream=True))
+    assert res == [(1, 2), (2, 4), (3, 6)]
+    assert 3 == sn.extractsingle(r'Step: (\d+)', tempfile, 1, int, 2,
+                                 stream=True)
+    with pytest.raises(SanityError):
+        sn.evaluate(sn.extractsingle(r'Step: (\d+)', tempfile, 1, int, 3,
+                                     stream=True))
+
+    assert sn.assert_found(r'Step: \d+', tempfile, stream=True)
+    with pytest.raises(SanityError, match=r'pattern .* not found'):
+        sn.evaluate(sn.assert_found(r'foo: \d+', tempfile, stream=True))
+
+    assert sn.assert_not_found(r'foo: \d+', tempfile, stream=True)
+    with pytest.raises(SanityError, match=r'pattern .* found'):
+        sn.evaluate(sn.assert_not_found(r'Step: \d+', tempfile, stream=True))
+
+    with pytest.raises(SanityError):
+        sn.evaluate(sn.findall(r'Step: \d+', 'foo.txt', stream=True))
+
+
+def test_file_cache(tempfile, monkeypatch):
+    num_reads = 0
+    _open = sn._open
+
+    def _counting_open(*args, **kwargs):
+        nonlocal num_reads
+        num_reads += 1
+        return _open(*args, **kwargs)
+
+    monkeypatch.setattr(sn, '_open', _counting_open)
+    with sn.file_cache():
+        assert sn.assert_found(r'Step: \d+', tempfile)
+        assert sn.assert_not_found(r'foo: \d+', tempfile)
+        assert 3 == sn.count(sn.findall(r'Step: \d+', tempfile))
+        assert [1, 2, 3] == sn.extractall(r'Step: (\d+)', tempfile, 1, int)
+        assert 3 == sn.extractsingle(r'Number: (\d+)', tempfile, 1, int, 2)
+        with sn.file_cache():
+            assert sn.assert_found(r'Number: \d+', tempfile)
+
+        assert num_reads == 1
+
+        # The file is read again if it changes
+        with open(tempfile, 'a') as fp:
+            fp.write('Step: 4\n')
+
+        assert [1, 2, 3, 4] == sn.extractall(r'Step: (\d+)', tempfile, 1, int)
+        assert num_reads == 2
+
+        # Streaming bypasses the cache
+        assert 4 == sn.count(sn.findall(r'Step: \d+', tempfile, stream=True))
+        assert num_reads == 3
+
+    # Files are no more cached outside the context
+    assert sn.assert_found(r'Step: \d+', tempfile)
+    assert sn.assert_found(r'Step: \d+', tempfile)
+    assert num_reads == 5
+
+
 def test_safe_format():
     from reframe.utility.sanity import _format
 
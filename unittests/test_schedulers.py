@@ -6,11 +6,15 @@
 import os
 import pytest
 import re
+import select
+import shutil
 import signal
 import socket
+import subprocess
 import time
 
 import reframe.core.runtime as rt
+import reframe.utility.osext as osext
 import unittests.utility as test_util
 from reframe.core.backends import (getlauncher, getscheduler)
 from reframe.core.environments import Environment
@@ -18,7 +22,7 @@ from reframe.core.exceptions import (
     ConfigError, JobError, JobNotStartedError, JobSchedulerError
 )
 from reframe.core.schedulers import Job
-from reframe.core.schedulers.slurm import _SlurmNode, _create_nodes
+from reframe.core.schedulers.slurm import _SlurmNode
 
 
 @pytest.fixture
@@ -499,6 +503,21 @@ def test_submit(make_job, exec_ctx):
         assert not stderr.read().strip()
 
 
+def test_submit_pinned(minimal_job, local_only):
+    if not hasattr(os, 'sched_getaffinity') or not shutil.which('taskset'):
+        pytest.skip('CPU affinity cannot be set on this platform')
+
+    cpu = max(os.sched_getaffinity(0))
+    minimal_job._cpuset = {cpu}
+    prepare_job(minimal_job,
+                command='grep Cpus_allowed_list /proc/self/status')
+    submit_job(minimal_job)
+    minimal_job.wait()
+    assert minimal_job.exitcode == 0
+    with open(minimal_job.stdout) as fp:
+        assert re.search(rf'Cpus_allowed_list:\s+{cpu}$', fp.read(), re.M)
+
+
 def test_submit_timelimit(minimal_job, local_only):
     minimal_job.time_limit = '2s'
     prepare_job(minimal_job, 'sleep 10')
@@ -523,6 +542,20 @@ def test_submit_timelimit(minimal_job, local_only):
         assert minimal_job.state == 'TIMEOUT'
 
 
+def test_event_sources(minimal_job, local_only):
+    prepare_job(minimal_job, 'sleep 1')
+    submit_job(minimal_job)
+    fds = minimal_job.scheduler.event_sources(minimal_job)
+    if fds is None:
+        pytest.skip('process file descriptors are not supported')
+
+    assert len(fds) == 1
+    ready, *_ = select.select(fds, [], [], 10)
+    assert ready == fds
+    minimal_job.wait()
+    assert minimal_job.scheduler.event_sources(minimal_job) == []
+
+
 def test_submit_job_array(make_job, slurm_only, exec_ctx):
     job = make_job(sched_access=exec_ctx.access)
     job.options = ['--array=0-1']
@@ -537,6 +570,145 @@ def test_submit_job_array(make_job, slurm_only, exec_ctx):
                     re.search('Task id: 1', output)])
 
 
+def test_submit_job_arrays(tmp_path, monkeypatch):
+    import reframe.core.schedulers.slurm as slurm
+
+    commands = []
+
+    def _run_strict(cmd, **kwargs):
+        commands.append(cmd)
+        if cmd.startswith('sbatch'):
+            stdout = f'Submitted batch job {len(commands)}'
+        else:
+            stdout = ('1_[0-1]|PENDING|0:0|Unknown|None assigned\n'
+                      '1_2|COMPLETED|0:0|1700000000|nid001\n'
+                      '1_2.batch|COMPLETED|0:0|1700000000|nid001\n'
+                      '2|RUNNING|0:0|Unknown|nid002\n')
+
+        return subprocess.CompletedProcess(cmd, 0, stdout, '')
+
+    monkeypatch.setattr(slurm, '_run_strict', _run_strict)
+    monkeypatch.setattr(slurm, '_query_services', {})
+    sched = getscheduler('slurm')()
+    sched._use_job_arrays = True
+
+    jobs = []
+    for i in range(4):
+        workdir = tmp_path / f'test{i}'
+        workdir.mkdir()
+        job = Job.create(sched, getlauncher('local')(),
+                         name=f'testjob{i}',
+                         workdir=str(workdir),
+                         script_filename='job.sh',
+                         stdout='job.out',
+                         stderr='job.err')
+        job.num_tasks = 4 if i < 3 else 8
+        with osext.change_dir(workdir):
+            prepare_job(job)
+            submit_job(job)
+
+        jobs.append(job)
+
+    # Nothing is submitted until the jobs are polled
+    assert commands == []
+    assert all(job.jobid is None for job in jobs)
+    queued = set(jobs)
+    assert len(queued) == 4
+    sched.poll(*jobs)
+
+    # The jobs can still be looked up after they are given their job ids
+    assert all(job in queued for job in jobs)
+
+    # The jobs with the same resources are submitted as a job array
+    assert [job.jobid for job in jobs] == ['1_0', '1_1', '1_2', '2']
+    assert commands[0] == f'sbatch {tmp_path}/test0/rfm_job_array.sh'
+    with open(tmp_path / 'test0' / 'rfm_job_array.sh') as fp:
+        script = fp.read()
+
+    assert '#SBATCH --ntasks=4' in script
+    assert '#SBATCH --array=0-2' in script
+    for i in range(3):
+        assert (f'{i}) cd {tmp_path}/test{i} && '
+                f'exec {tmp_path}/test{i}/job.sh >job.out 2>job.err') in script
+
+    assert commands[1] == 'sbatch job.sh'
+
+    # The array tasks are polled through the job id of the array
+    assert re.search(r'-j 1,2 ', commands[2])
+    assert [job.state for job in jobs] == [
+        'PENDING', 'PENDING', 'COMPLETED', 'RUNNING'
+    ]
+    assert jobs[2].exitcode == 0
+    assert jobs[2].completion_time == 1700000000
+
+
+def test_shared_job_queries(make_exec_ctx, monkeypatch):
+    import reframe.core.schedulers.slurm as slurm
+
+    commands = []
+
+    def _run_strict(cmd, **kwargs):
+        commands.append(cmd)
+        return subprocess.CompletedProcess(
+            cmd, 0, ('1|RUNNING|0:0|Unknown|nid001\n'
+                     '2|COMPLETED|0:0|1700000000|nid002\n'), ''
+        )
+
+    monkeypatch.setattr(slurm, '_run_strict', _run_strict)
+    monkeypatch.setattr(slurm, '_query_services', {})
+    make_exec_ctx(test_util.TEST_CONFIG_FILE, 'generic',
+                  options={'systems/sched_options/job_query_interval': 60})
+
+    # Schedulers of different partitions share the same queries
+    jobs = []
+    for i in range(2):
+        job = Job.create(getscheduler('slurm')(), getlauncher('local')(),
+                         name=f'testjob{i}')
+        job._jobid = str(i + 1)
+        job._submit_time = time.time()
+        job.scheduler._queries.register(job)
+        jobs.append(job)
+
+    assert jobs[0].scheduler._queries is jobs[1].scheduler._queries
+    for job in jobs:
+        job.scheduler.poll(job)
+
+    assert len(commands) == 1
+    assert re.search(r'-j 1,2 ', commands[0])
+    assert jobs[0].state == 'RUNNING'
+    assert jobs[1].state == 'COMPLETED'
+
+    # Completed jobs are not queried again
+    jobs[0].scheduler._queries._answers.clear()
+    jobs[0].scheduler.poll(jobs[0])
+    assert len(commands) == 2
+    assert re.search(r'-j 1 ', commands[1])
+
+
+def test_cancel_queued_job(tmp_path, monkeypatch):
+    import reframe.core.schedulers.slurm as slurm
+
+    def _run_strict(cmd, **kwargs):
+        pytest.fail(f'unexpected command: {cmd}')
+
+    monkeypatch.setattr(slurm, '_run_strict', _run_strict)
+    monkeypatch.setattr(slurm, '_query_services', {})
+    sched = getscheduler('slurm')()
+    sched._use_job_arrays = True
+    job = Job.create(sched, getlauncher('local')(),
+                     name='testjob',
+                     workdir=str(tmp_path),
+                     script_filename=str(tmp_path / 'job.sh'),
+                     stdout=str(tmp_path / 'job.out'),
+                     stderr=str(tmp_path / 'job.err'))
+    prepare_job(job)
+    submit_job(job)
+    job.cancel()
+    assert job.is_cancelling
+    sched.poll(job)
+    assert job.jobid is None
+
+
 def test_cancel(make_job, exec_ctx):
     minimal_job = make_job(sched_access=exec_ctx.access)
     prepare_job(minimal_job, 'sleep 30')
@@ -644,7 +816,7 @@ def test_combined_access_verbatim_constraint(make_job, slurm_only):
     assert re.search(r'(?m)^#SBATCH -C c3$', script_content)
 
 
-def test_guess_num_tasks(minimal_job, scheduler):
+def test_guess_num_tasks(minimal_job, scheduler, monkeypatch):
     minimal_job.num_tasks = 0
     if scheduler.registered_name == 'local':
         # We want to trigger bug #1087 (Github), that's why we set allocation
@@ -659,9 +831,14 @@ def test_guess_num_tasks(minimal_job, scheduler):
         minimal_job.num_tasks = 0
         minimal_job._sched_flex_alloc_nodes = 'all'
 
-        # Monkey patch `allnodes()` to simulate extraction of
+        # Monkey patch `_run_strict()` to simulate extraction of
         # slurm nodes through the use of `scontrol show`
-        minimal_job.scheduler.allnodes = lambda: set()
+        import reframe.core.schedulers.slurm as slurm
+
+        monkeypatch.setattr(
+            slurm, '_run_strict',
+            lambda cmd, **kwargs: subprocess.CompletedProcess(cmd, 0, '', '')
+        )
 
         # monkey patch `_get_default_partition()` to simulate extraction
         # of the default partition through the use of `scontrol show`
@@ -943,9 +1120,17 @@ def slurm_nodes():
 
 
 @pytest.fixture
-def slurm_scheduler_patched(slurm_nodes):
+def slurm_scheduler_patched(slurm_nodes, monkeypatch):
+    import reframe.core.schedulers.slurm as slurm
+
+    def _run_strict(cmd, **kwargs):
+        assert cmd == 'scontrol -a show -o nodes'
+        return subprocess.CompletedProcess(cmd, 0, '\n'.join(slurm_nodes), '')
+
+    # Retrieve the node inventory as if through the use of `scontrol show`
+    monkeypatch.setattr(slurm, '_run_strict', _run_strict)
+    monkeypatch.setattr(slurm, '_node_inventories', {})
     ret = getscheduler('slurm')()
-    ret.allnodes = lambda: _create_nodes(slurm_nodes)
     ret._get_default_partition = lambda: 'pdef'
     ret._get_reservation_nodes = lambda res: {
         n for n in ret.allnodes() if n.name != 'nid00001'
@@ -1204,6 +1389,65 @@ def test_flex_alloc_not_enough_nodes_constraint_expr(make_flexible_job):
         prepare_job(job)
 
 
+def test_node_inventory(make_exec_ctx, slurm_nodes, monkeypatch):
+    import reframe.core.schedulers.slurm as slurm
+
+    commands = []
+
+    def _run_command(cmd, **kwargs):
+        commands.append(cmd)
+        if cmd.startswith('scontrol show hostname'):
+            stdout = 'nid00001\nnid00003\nnid00009\n'
+        else:
+            stdout = '\n'.join(slurm_nodes)
+
+        return subprocess.CompletedProcess(cmd, 0, stdout, '')
+
+    monkeypatch.setattr(slurm, '_run_strict', _run_command)
+    monkeypatch.setattr(slurm.osext, 'run_command', _run_command)
+    monkeypatch.setattr(slurm, '_node_inventories', {})
+    make_exec_ctx(test_util.TEST_CONFIG_FILE, 'generic')
+
+    # Schedulers of different partitions share the same inventory
+    inventory = getscheduler('slurm')()._node_inventory
+    assert inventory is getscheduler('slurm')()._node_inventory
+    assert len(inventory.nodes()) == 6
+    assert {n.name for n in inventory.nodes_in_partitions({'p1', 'p3'})} == {
+        'nid00003', 'nid00004', 'nid00005'
+    }
+    assert {n.name for n in inventory.nodes_satisfying('f1&f3')} == {
+        'nid00003'
+    }
+    assert {n.name for n in inventory.nodes_by_name('nid[00001,00003,'
+                                                    '00009]')} == {
+        'nid00001', 'nid00003'
+    }
+    assert commands == ['scontrol -a show -o nodes',
+                        'scontrol show hostname nid[00001,00003,00009]']
+
+    # Node specifications are expanded only once
+    inventory.nodes_by_name('nid[00001,00003,00009]')
+    assert len(commands) == 2
+
+    # Nodes are retrieved anew on demand
+    inventory.invalidate()
+    inventory.nodes()
+    assert len(commands) == 3
+
+    # Without a query interval, all the nodes are retrieved every time
+    inventory.nodes()
+    assert len(commands) == 4
+
+    # Nodes are reused within the query interval
+    monkeypatch.setattr(slurm, '_node_inventories', {})
+    make_exec_ctx(test_util.TEST_CONFIG_FILE, 'generic',
+                  options={'systems/sched_options/node_query_interval': 60})
+    inventory = getscheduler('slurm')()._node_inventory
+    inventory.nodes()
+    inventory.nodes()
+    assert len(commands) == 5
+
+
 @pytest.fixture
 def slurm_node_allocated():
     return _SlurmNode(
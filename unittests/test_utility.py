@@ -6,6 +6,7 @@
 import os
 import pytest
 import random
+import shutil
 import signal
 import sys
 import time
@@ -657,6 +658,90 @@ def test_virtual_copy_symlinks_dirs_exist(tmp_path, symlinks):
     assert (dst / 'foo.link').is_symlink() == symlinks
 
 
+def test_virtual_copy_max_workers(direntries):
+    file_links = ['bar/', 'foo/bar.txt', 'foo.txt']
+    osext.copytree_virtual(*direntries, file_links,
+                           dirs_exist_ok=True, max_workers=4)
+    assert_target_directory(*direntries, file_links)
+
+
+@pytest.fixture(params=['reflink', 'hardlink'])
+def link_mode(request):
+    return request.param
+
+
+def test_copyfile_linked(tmp_path, link_mode):
+    src = tmp_path / 'src.txt'
+    src.write_text('hello\n')
+    dst = tmp_path / 'dst.txt'
+    dst.write_text('bye\n')
+    assert osext.copyfile_linked(src, dst, link_mode) == dst
+    assert dst.read_text() == 'hello\n'
+    if link_mode == 'hardlink':
+        assert os.path.samefile(src, dst)
+
+    # The link modes fall back to copying the file, if linking fails
+    os.remove(dst)
+    with pytest.raises(FileNotFoundError):
+        osext.copyfile_linked(tmp_path / 'foo.txt', dst, link_mode)
+
+    with pytest.raises(ValueError):
+        osext.copyfile_linked(src, dst, 'symlink')
+
+
+def test_tree_snapshots(direntries, tmp_path, link_mode):
+    src, dst = direntries
+    file_links = ['bar/', 'foo/bar.txt']
+    snapshots = osext.TreeSnapshots(tmp_path / 'snapshots')
+    assert snapshots.basedir is None
+    snapshots.copytree(src, dst, file_links, link_mode,
+                       dirs_exist_ok=True, max_workers=4)
+    assert_target_directory(src, dst, file_links)
+    assert len(os.listdir(snapshots.basedir)) == 1
+
+    # Modifying a copy does not modify the original tree
+    with open(dst / 'foo.txt', 'w') as fp:
+        fp.write('hello\n')
+
+    assert (src / 'foo.txt').read_text() == ''
+
+    # Trees with the same content share their snapshot
+    src_copy = tmp_path / 'src_copy'
+    osext.copytree(src, src_copy, copy_function=shutil.copy2)
+    assert (snapshots.snapshot(src, file_links) ==
+            snapshots.snapshot(src_copy, file_links))
+    assert len(os.listdir(snapshots.basedir)) == 1
+
+    # Trees with different content or file links do not
+    src_other = tmp_path / 'src_other'
+    osext.copytree(src, src_other, copy_function=shutil.copy2)
+    (src_other / 'foo.txt').write_text('hello\n')
+    snapshots.snapshot(src_other, file_links)
+    snapshots.snapshot(src)
+    assert len(os.listdir(snapshots.basedir)) == 3
+
+    # A tree that has changed since its last snapshot gets a new one
+    snapshot_dir = snapshots.snapshot(src_copy, file_links)
+    (src_copy / 'foo.txt').write_text('hello world\n')
+    assert snapshots.snapshot(src_copy, file_links) != snapshot_dir
+    assert len(os.listdir(snapshots.basedir)) == 4
+
+    # Snapshots are not shared with other objects using the same prefix
+    other_snapshots = osext.TreeSnapshots(snapshots.prefix)
+    other_snapshots.snapshot(src)
+    assert other_snapshots.basedir != snapshots.basedir
+    assert len(os.listdir(snapshots.basedir)) == 4
+
+    basedir = snapshots.basedir
+    snapshots.clear()
+    assert not os.path.exists(basedir)
+    assert snapshots.basedir is None
+    assert os.path.exists(other_snapshots.basedir)
+
+    other_snapshots.clear()
+    assert not os.path.exists(snapshots.prefix)
+
+
 def test_import_from_file_load_relpath():
     module = util.import_module_from_file('reframe/__init__.py')
     assert reframe.VERSION == module.VERSION
@@ -2089,3 +2174,21 @@ def test_cached_return_value():
     t_elapsed = time.time() - t_start
     assert r == 10
     assert t_elapsed >= 0.2 and t_elapsed < 0.4
+
+
+def test_core_cpusets():
+    import reframe.utility.cpuinfo as cpuinfo
+
+    if not hasattr(os, 'sched_getaffinity'):
+        assert cpuinfo.core_cpusets() is None
+        return
+
+    cpus = sorted(os.sched_getaffinity(0))
+    assert cpus == sorted(c for core in cpuinfo.core_cpusets() for c in core)
+
+    # CPUs the process may not run on are ignored
+    mask = hex(sum(1 << c for c in cpus) | 1 << (cpus[-1] + 1))
+    assert [cpus] == cpuinfo.core_cpusets({'topology': {'cores': [mask]}})
+
+    # CPUs missing from the topology are treated as single-CPU cores
+    assert [[c] for c in cpus] == cpuinfo.core_cpusets({})